@@ -1,20 +1,32 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from app.api.schemas import (
     DocumentUploadResponse,
+    BatchUploadResponse,
     QueryRequest,
     QueryResponse,
     DocumentInfo,
-    HealthResponse
+    DocumentDeleteResponse,
+    HealthResponse,
+    JobStatusResponse,
+    ChunkReference,
+    ChunkTextResponse
 )
 from app.core.rag_engine import RAGEngine
+from app.core.job_queue import job_queue, JOB_QUEUED, JOB_DONE
+from app.core.upload_index import UploadHashIndex
+from app.core.bulk_ingest import BulkIngestor, stream_document
+from app.core.config import settings
 from app.database.postgres import postgres_db
 from app.database.mongodb import mongodb
 from app.models.document import Document
-from typing import List
+from app.utils.file_utils import save_with_hash
+from typing import Callable, Dict, List, Optional
+import asyncio
+import json
 import os
 import uuid
-import shutil
 
 router = APIRouter()
 rag_engine = RAGEngine()
@@ -44,12 +56,15 @@ async def upload_document(
     """
     Upload a PDF document
     
+    The file is saved and queued for background ingestion; poll
+    GET /jobs/{job_id} to follow its progress.
+    
     Args:
         file: PDF file to upload
         user_id: User identifier
         
     Returns:
-        Upload status and document information
+        Upload status with the ingestion job ID
     """
     try:
         # Validate file type
@@ -59,54 +74,355 @@ async def upload_document(
         # Generate unique document ID
         doc_id = str(uuid.uuid4())
         
-        # Save file
+        # Save file and hash its bytes without blocking the event loop
         file_path = os.path.join(UPLOAD_DIR, f"{doc_id}_{file.filename}")
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        file_size, file_hash = await run_in_threadpool(save_with_hash, file.file, file_path)
+        
+        # Known content: return the existing document, no parsing or embedding
+        existing = await run_in_threadpool(upload_index.claim, user_id, file_hash, doc_id)
+        if existing is not None:
+            os.remove(file_path)
+            return await run_in_threadpool(_duplicate_response, existing, file.filename)
+        
+        # Hand processing to the ingestion workers
+        job_id = job_queue.submit(
+            lambda progress: _ingest_document(
+                file_path, doc_id, file.filename, file_size, file_hash, user_id, progress
+            ),
+            doc_id=doc_id,
+            filename=file.filename
+        )
         
-        file_size = os.path.getsize(file_path)
+        if job_id is None:
+            upload_index.release(user_id, file_hash)
+            os.remove(file_path)
+            raise HTTPException(status_code=503, detail="Ingestion queue is full, please retry later")
+        upload_index.set_job(user_id, file_hash, job_id)
         
-        # Process PDF with RAG engine
+        return DocumentUploadResponse(
+            success=True,
+            doc_id=doc_id,
+            filename=file.filename,
+            job_id=job_id,
+            status=JOB_QUEUED,
+            message="Document queued for processing"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error uploading document: {str(e)}")
+
+upload_index = UploadHashIndex(lookup=postgres_db.find_document_id_by_hash)
+
+def _duplicate_response(existing: Dict, filename: str) -> DocumentUploadResponse:
+    """Build the upload response for content that was already uploaded"""
+    job = job_queue.get(existing["job_id"]) if existing["job_id"] else None
+    if job is not None and (job["status"] != JOB_DONE or job["doc_id"] == existing["doc_id"]):
+        # Still being ingested (or finished in this process); batch job
+        # totals cover several documents, so only report them for one
+        single = job["doc_id"] == existing["doc_id"]
+        return DocumentUploadResponse(
+            success=True,
+            doc_id=existing["doc_id"],
+            filename=filename,
+            num_pages=job["num_pages"] if single else None,
+            num_chunks=job["num_chunks"] if single else None,
+            job_id=job["job_id"],
+            status=job["status"],
+            duplicate=True,
+            message="Document already uploaded"
+        )
+    
+    with postgres_db.get_session() as session:
+        doc = session.query(Document).filter_by(id=existing["doc_id"]).first()
+        return DocumentUploadResponse(
+            success=True,
+            doc_id=existing["doc_id"],
+            filename=filename,
+            num_pages=doc.num_pages if doc else None,
+            num_chunks=doc.num_chunks if doc else None,
+            job_id=existing["job_id"],
+            status=JOB_DONE,
+            duplicate=True,
+            message="Document already uploaded"
+        )
+
+def _ingest_document(
+    file_path: str,
+    doc_id: str,
+    filename: str,
+    file_size: int,
+    file_hash: str,
+    user_id: str,
+    progress_callback: Callable
+) -> Dict:
+    """
+    Process an uploaded PDF and record it in PostgreSQL
+    
+    Runs on an ingestion worker thread. On any failure the vectors, the
+    file and the hash index entry are removed again.
+    """
+    try:
         result = rag_engine.process_and_store_pdf(
             pdf_path=file_path,
             doc_id=doc_id,
-            metadata={"user_id": user_id, "original_filename": file.filename}
+            metadata={"user_id": user_id, "original_filename": filename},
+            progress_callback=progress_callback
         )
         
         if not result["success"]:
             # Clean up file if processing failed
+            upload_index.release(user_id, file_hash)
             os.remove(file_path)
-            raise HTTPException(status_code=500, detail=result.get("message", "Failed to process PDF"))
+            return result
         
         # Save to PostgreSQL
         with postgres_db.get_session() as session:
             doc = Document(
                 id=doc_id,
-                filename=file.filename,
+                filename=filename,
                 file_path=file_path,
                 file_size=file_size,
                 num_pages=result["num_pages"],
+                user_id=user_id,
                 doc_hash=result.get("doc_hash"),
+                file_hash=file_hash,
                 full_text="",  # We could store this if needed
                 num_chunks=result["num_chunks"],
                 doc_metadata={"user_id": user_id}
             )
             session.add(doc)
             session.commit()
+        upload_index.mark_stored(doc_id)
         
-        return DocumentUploadResponse(
+        return result
+    
+    except Exception:
+        # e.g. the insert failed: don't leave orphaned vectors behind
+        rag_engine.vector_store.delete_document(doc_id)
+        upload_index.release(user_id, file_hash)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+@router.post("/upload/batch", response_model=BatchUploadResponse)
+async def upload_documents_batch(
+    files: List[UploadFile] = File(...),
+    user_id: str = Form(default="default_user")
+):
+    """
+    Upload many PDF documents at once
+    
+    New files are ingested by a single background job that groups
+    vector-store writes and PostgreSQL inserts across documents.
+    
+    Args:
+        files: PDF files to upload
+        user_id: User identifier
+        
+    Returns:
+        Per-file upload status and the shared ingestion job ID
+    """
+    responses = []
+    new_items = []
+    job_id = None
+    try:
+        for file in files:
+            if not file.filename.endswith('.pdf'):
+                responses.append(DocumentUploadResponse(
+                    success=False,
+                    doc_id="",
+                    filename=file.filename,
+                    message="Only PDF files are supported"
+                ))
+                continue
+            
+            doc_id = str(uuid.uuid4())
+            file_path = os.path.join(UPLOAD_DIR, f"{doc_id}_{file.filename}")
+            file_size, file_hash = await run_in_threadpool(save_with_hash, file.file, file_path)
+            
+            try:
+                existing = await run_in_threadpool(upload_index.claim, user_id, file_hash, doc_id)
+            except Exception:
+                os.remove(file_path)
+                raise
+            if existing is not None:
+                os.remove(file_path)
+                responses.append(await run_in_threadpool(_duplicate_response, existing, file.filename))
+                continue
+            
+            new_items.append({
+                "doc_id": doc_id,
+                "filename": file.filename,
+                "file_path": file_path,
+                "file_size": file_size,
+                "file_hash": file_hash
+            })
+            responses.append(DocumentUploadResponse(
+                success=True,
+                doc_id=doc_id,
+                filename=file.filename,
+                status=JOB_QUEUED,
+                message="Document queued for processing"
+            ))
+        
+        if not new_items:
+            return BatchUploadResponse(
+                success=True,
+                documents=responses,
+                message="No new documents to process"
+            )
+        
+        job_id = job_queue.submit(
+            lambda progress: _ingest_batch(new_items, user_id, progress),
+            doc_id=None,
+            filename=f"{len(new_items)} files"
+        )
+        
+        if job_id is None:
+            _discard_uploads(new_items, user_id)
+            raise HTTPException(status_code=503, detail="Ingestion queue is full, please retry later")
+        
+        for item in new_items:
+            upload_index.set_job(user_id, item["file_hash"], job_id)
+        for response in responses:
+            if response.status == JOB_QUEUED:
+                response.job_id = job_id
+        
+        return BatchUploadResponse(
             success=True,
-            doc_id=doc_id,
-            filename=file.filename,
-            num_pages=result["num_pages"],
-            num_chunks=result["num_chunks"],
-            message=result["message"]
+            job_id=job_id,
+            documents=responses,
+            message=f"{len(new_items)} documents queued for processing"
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error uploading document: {str(e)}")
+        # Not handed to a job: nothing will ingest or clean up these uploads
+        if job_id is None:
+            _discard_uploads(new_items, user_id)
+        raise HTTPException(status_code=500, detail=f"Error uploading documents: {str(e)}")
+
+def _discard_uploads(items: List[Dict], user_id: str):
+    """Release the hash claims of uploads that won't be stored and delete their files"""
+    for item in items:
+        upload_index.release(user_id, item["file_hash"])
+        if os.path.exists(item["file_path"]):
+            os.remove(item["file_path"])
+
+def _save_document_rows(rows: List[Dict]):
+    """Insert document rows in one PostgreSQL transaction"""
+    postgres_db.add_all([Document(**row) for row in rows])
+
+def _ingest_batch(items: List[Dict], user_id: str, progress_callback: Callable) -> Dict:
+    """
+    Process several uploaded PDFs with grouped writes
+    
+    Runs on an ingestion worker thread.
+    """
+    ingestor = BulkIngestor(rag_engine.vector_store, _save_document_rows)
+    items_by_id = {item["doc_id"]: item for item in items}
+    failed = []
+    
+    try:
+        for number, item in enumerate(items, start=1):
+            progress_callback("extracting", message=f"Processing file {number} of {len(items)}")
+            try:
+                extraction = stream_document(
+                    item["file_path"],
+                    chunk_size=settings.CHUNK_SIZE,
+                    overlap=settings.CHUNK_OVERLAP,
+                    unit=settings.CHUNK_UNIT
+                )
+            except Exception as e:
+                print(f"Error opening {item['filename']}: {e}")
+                failed.append(item["doc_id"])
+                continue
+            
+            progress_callback("embedding", num_pages=ingestor.pages, num_chunks=ingestor.chunks)
+            ingestor.add(
+                item["doc_id"],
+                extraction,
+                metadata={"user_id": user_id, "original_filename": item["filename"]},
+                row={
+                    "id": item["doc_id"],
+                    "filename": item["filename"],
+                    "file_path": item["file_path"],
+                    "file_size": item["file_size"],
+                    "num_pages": extraction["num_pages"],
+                    "user_id": user_id,
+                    "file_hash": item["file_hash"],
+                    "full_text": "",
+                    "doc_metadata": {"user_id": user_id}
+                }
+            )
+        ingestor.flush()
+    except Exception:
+        # Don't leave vectors, files or claims behind for documents without a row
+        for doc_id in ingestor.saved_ids:
+            upload_index.mark_stored(doc_id)
+        saved = set(ingestor.saved_ids)
+        unsaved = [item for item in items if item["doc_id"] not in saved]
+        for item in unsaved:
+            rag_engine.vector_store.delete_document(item["doc_id"])
+        _discard_uploads(unsaved, user_id)
+        raise
+    
+    for doc_id in ingestor.saved_ids:
+        upload_index.mark_stored(doc_id)
+    # Failed files can be uploaded again
+    failed.extend(failure["doc_id"] for failure in ingestor.failed)
+    _discard_uploads([items_by_id[doc_id] for doc_id in failed], user_id)
+    
+    summary = ingestor.summary()
+    return {
+        "success": summary["documents"] > 0,
+        "num_pages": summary["pages"],
+        "num_chunks": summary["chunks"],
+        "message": (
+            f"Ingested {summary['documents']} of {len(items)} documents "
+            f"({summary['docs_per_second']} docs/s, {summary['pages_per_second']} pages/s)"
+        )
+    }
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """
+    Get the status of an ingestion job
+    
+    Args:
+        job_id: Job identifier returned by /upload
+        
+    Returns:
+        Job status, page and chunk counts
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse(**job)
+
+def _query_record(request: QueryRequest, result: Dict) -> Dict:
+    """Query log entry for MongoDB"""
+    return {
+        "user_id": request.user_id,
+        "question": request.question,
+        "answer": result["answer"],
+        "doc_id": request.doc_id,
+        "doc_ids": request.doc_ids,
+        # References only; the text stays in the chunk store
+        "retrieved_chunks": [
+            ChunkReference.from_chunk(chunk).model_dump(exclude_none=True)
+            for chunk in result.get("retrieved_chunks", [])
+        ],
+        "model_used": result.get("model"),
+        "tokens_used": result.get("tokens_used"),
+        "retrieval_ms": result.get("retrieval_ms"),
+        "cached": result.get("cached", False),
+        "context_report": result.get("context_report"),
+        "ttft_ms": result.get("ttft_ms")
+    }
 
 @router.post("/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
@@ -120,11 +436,12 @@ async def query_documents(request: QueryRequest):
         Answer and relevant information
     """
     try:
-        # Query using RAG engine
-        result = rag_engine.query(
+        # Query using RAG engine; the LLM wait does not hold the event loop
+        result = await rag_engine.aquery(
             question=request.question,
             doc_id=request.doc_id,
-            n_results=3
+            doc_ids=request.doc_ids,
+            user_id=request.user_id
         )
         
         if not result["success"]:
@@ -136,31 +453,109 @@ async def query_documents(request: QueryRequest):
             )
         
         # Save query to MongoDB
-        query_data = {
-            "user_id": request.user_id,
-            "question": request.question,
-            "answer": result["answer"],
-            "doc_id": request.doc_id,
-            "retrieved_chunks": result.get("retrieved_chunks", []),
-            "model_used": result.get("model"),
-            "tokens_used": result.get("tokens_used")
-        }
-        mongodb.save_query(query_data)
+        query_data = _query_record(request, result)
+        await run_in_threadpool(mongodb.save_query, query_data)
         
         return QueryResponse(
             success=True,
             answer=result["answer"],
             question=request.question,
-            retrieved_chunks=result.get("retrieved_chunks"),
+            retrieved_chunks=[
+                ChunkReference.from_chunk(chunk, include_text=request.include_text)
+                for chunk in result.get("retrieved_chunks", [])
+            ],
             num_chunks_used=result.get("num_chunks_used"),
             model=result.get("model"),
             tokens_used=result.get("tokens_used"),
+            retrieval_ms=result.get("retrieval_ms"),
+            cached=result.get("cached", False),
+            context_report=result.get("context_report"),
             doc_id=request.doc_id
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+def _sse(event: str, data: Dict) -> str:
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/query/stream")
+async def query_documents_stream(request: QueryRequest):
+    """
+    Ask a question and stream the answer as Server-Sent Events
+    
+    Events, in order: "retrieval" (the chunks used, retrieval timings and
+    context report), "token" for each piece of the answer, then "done"
+    (model, token usage, time to first token) or "error". The query is
+    saved to MongoDB once the answer is complete.
+    
+    Args:
+        request: Query request with question and optional doc_id
+        
+    Returns:
+        text/event-stream response
+    """
+    async def events():
+        async for event in rag_engine.astream_query(
+            question=request.question,
+            doc_id=request.doc_id,
+            doc_ids=request.doc_ids,
+            user_id=request.user_id
+        ):
+            if event["type"] == "retrieval":
+                yield _sse("retrieval", {
+                    "retrieved_chunks": [
+                        ChunkReference.from_chunk(chunk, include_text=request.include_text).model_dump(exclude_none=True)
+                        for chunk in event["retrieved_chunks"]
+                    ],
+                    "retrieval_ms": event["retrieval_ms"],
+                    "context_report": event["context_report"]
+                })
+            elif event["type"] == "token":
+                yield _sse("token", {"text": event["text"]})
+            elif event["type"] == "done":
+                try:
+                    await run_in_threadpool(mongodb.save_query, _query_record(request, event))
+                except Exception as e:
+                    # The answer is already on the client; a failed log write only loses history
+                    print(f"Error saving streamed query: {e}")
+                yield _sse("done", {
+                    "model": event.get("model"),
+                    "tokens_used": event.get("tokens_used"),
+                    "num_chunks_used": event.get("num_chunks_used"),
+                    "cached": event.get("cached", False),
+                    "ttft_ms": event.get("ttft_ms")
+                })
+            else:
+                yield _sse("error", {
+                    "answer": event.get("answer") or event.get("message", "Failed to generate answer"),
+                    "error": event.get("error")
+                })
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop proxies (e.g. nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/chunks/{chunk_id}", response_model=ChunkTextResponse)
+async def get_chunk(chunk_id: str):
+    """
+    Get the text of a retrieved chunk
+    
+    Args:
+        chunk_id: Chunk identifier from a query response
+        
+    Returns:
+        Chunk text
+    """
+    text = rag_engine.vector_store.get_chunk_text(chunk_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Chunk not found")
+    return ChunkTextResponse(chunk_id=chunk_id, text=text)
+
 @router.get("/documents", response_model=List[DocumentInfo])
 async def list_documents(user_id: str = "default_user"):
     """
@@ -190,6 +585,122 @@ async def list_documents(user_id: str = "default_user"):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing documents: {str(e)}")
 
+@router.get("/stats")
+async def get_stats():
+    """
+    Get runtime performance counters
+    
+    Returns:
+        Embedding throughput, vector store startup and shards, keyword index,
+        query and answer cache statistics, per-model LLM wins and latency,
+        and LLM request coalescing and rate limiting
+    """
+    return {
+        "embeddings": rag_engine.vector_store.embedding_provider.get_stats(),
+        "vector_startup": rag_engine.vector_store.startup,
+        "vector_shards": rag_engine.vector_store.get_shard_stats(),
+        "lexical_index": rag_engine.vector_store.lexical_index.get_stats(),
+        "query_cache": rag_engine.vector_store.get_cache_stats(),
+        "answer_cache": rag_engine.answer_cache.get_stats() if rag_engine.answer_cache else None,
+        "llm_models": rag_engine.llm_client.stats.get_stats(),
+        "llm_requests": {
+            "coalescing": rag_engine.llm_client.single_flight.get_stats(),
+            "rate_limits": rag_engine.llm_client.rate_limiter.get_stats()
+        }
+    }
+
+@router.get("/models/health")
+async def get_model_health():
+    """
+    Health scoreboard for the OpenRouter models
+    
+    Returns:
+        The order models are tried in right now, and per model the request
+        counters, recent error rate, latency percentiles and circuit state
+    """
+    llm_client = rag_engine.llm_client
+    return {
+        "primary_model": llm_client.model,
+        "models_to_try": llm_client.models_to_try(),
+        "fallback_mode": llm_client.fallback_mode,
+        "circuit_failures": llm_client.stats.failure_threshold,
+        "circuit_cooldown_seconds": llm_client.stats.cooldown,
+        **llm_client.stats.get_stats()
+    }
+
+@router.delete("/documents/{doc_id}", response_model=DocumentDeleteResponse)
+async def delete_document(doc_id: str):
+    """
+    Delete a document from every store
+    
+    Vectors and chunk text go first. Only once they are gone are the
+    PostgreSQL row, the uploaded file and the document's query history
+    removed concurrently, so a failed vector delete keeps the row and
+    can be retried.
+    
+    Args:
+        doc_id: Document identifier
+        
+    Returns:
+        What was deleted and how many bytes were freed
+    """
+    try:
+        doc = await run_in_threadpool(_find_document, doc_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        file_path, num_chunks = doc
+        
+        vector_result = await run_in_threadpool(rag_engine.vector_store.delete_document, doc_id)
+        if not vector_result["success"]:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error deleting vectors: {vector_result.get('error')}"
+            )
+        
+        _, file_bytes, queries_deleted = await asyncio.gather(
+            run_in_threadpool(_delete_document_row, doc_id),
+            run_in_threadpool(_delete_file, file_path),
+            run_in_threadpool(mongodb.delete_document_queries, doc_id)
+        )
+        upload_index.release_document(doc_id)
+        
+        bytes_freed = file_bytes + vector_result["bytes_freed"]
+        return DocumentDeleteResponse(
+            success=True,
+            doc_id=doc_id,
+            chunks_deleted=num_chunks,
+            queries_deleted=queries_deleted,
+            bytes_freed=bytes_freed,
+            message=f"Deleted {num_chunks} chunks, {queries_deleted} queries and {bytes_freed} bytes"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
+
+def _find_document(doc_id: str):
+    """A document's file path and chunk count, or None if it does not exist"""
+    with postgres_db.get_session() as session:
+        doc = session.query(Document).filter_by(id=doc_id).first()
+        if doc is None:
+            return None
+        return doc.file_path, doc.num_chunks or 0
+
+def _delete_document_row(doc_id: str):
+    """Remove a document's PostgreSQL row"""
+    with postgres_db.get_session() as session:
+        session.query(Document).filter_by(id=doc_id).delete()
+
+def _delete_file(file_path: str) -> int:
+    """Remove a file, returning its size (0 if it was already gone)"""
+    try:
+        size = os.path.getsize(file_path)
+        os.remove(file_path)
+        return size
+    except FileNotFoundError:
+        return 0
+
 @router.get("/history/{user_id}")
 async def get_query_history(user_id: str, limit: int = 10):
     """
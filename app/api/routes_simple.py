@@ -1,14 +1,22 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi.concurrency import run_in_threadpool
 from app.api.schemas import (
     DocumentUploadResponse,
     QueryRequest,
     QueryResponse,
-    HealthResponse
+    HealthResponse,
+    JobStatusResponse,
+    ChunkReference,
+    ChunkTextResponse,
+    DocumentDeleteResponse
 )
 from app.core.rag_engine import RAGEngine
+from app.core.job_queue import job_queue, JOB_QUEUED
+from app.core.upload_index import UploadHashIndex
+from app.utils.file_utils import save_with_hash
+import asyncio
 import os
 import uuid
-import shutil
 
 router = APIRouter()
 rag_engine = RAGEngine()
@@ -20,6 +28,12 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 # In-memory document storage
 documents_store = {}
 
+# SHA-256 of uploaded bytes -> document, for deduplication
+upload_index = UploadHashIndex()
+
+# doc_id -> uploaded file path
+upload_paths = {}
+
 @router.get("/", response_model=HealthResponse)
 async def root():
     """Health check endpoint"""
@@ -36,7 +50,7 @@ async def upload_document(
     file: UploadFile = File(...),
     user_id: str = Form(default="default_user")
 ):
-    """Upload a PDF document"""
+    """Upload a PDF document and queue it for background processing"""
     try:
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are supported")
@@ -44,38 +58,46 @@ async def upload_document(
         doc_id = str(uuid.uuid4())
         file_path = os.path.join(UPLOAD_DIR, f"{doc_id}_{file.filename}")
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        file_size, file_hash = await run_in_threadpool(save_with_hash, file.file, file_path)
         
-        file_size = os.path.getsize(file_path)
+        # Same bytes uploaded before: reuse that document
+        existing = await run_in_threadpool(upload_index.claim, user_id, file_hash, doc_id)
+        if existing is not None:
+            os.remove(file_path)
+            job = job_queue.get(existing["job_id"]) or {}
+            return DocumentUploadResponse(
+                success=True,
+                doc_id=existing["doc_id"],
+                filename=file.filename,
+                num_pages=job.get("num_pages"),
+                num_chunks=job.get("num_chunks"),
+                job_id=existing["job_id"],
+                status=job.get("status"),
+                duplicate=True,
+                message="Document already uploaded"
+            )
         
-        result = rag_engine.process_and_store_pdf(
-            pdf_path=file_path,
+        job_id = job_queue.submit(
+            lambda progress: _ingest_document(
+                file_path, doc_id, file.filename, file_size, file_hash, user_id, progress
+            ),
             doc_id=doc_id,
-            metadata={"user_id": user_id, "original_filename": file.filename}
+            filename=file.filename
         )
         
-        if not result["success"]:
+        if job_id is None:
+            upload_index.release(user_id, file_hash)
             os.remove(file_path)
-            raise HTTPException(status_code=500, detail=result.get("message", "Failed to process PDF"))
-        
-        # Store in memory
-        documents_store[doc_id] = {
-            "id": doc_id,
-            "filename": file.filename,
-            "num_pages": result["num_pages"],
-            "num_chunks": result["num_chunks"],
-            "file_size": file_size,
-            "created_at": "2025-01-14"
-        }
+            raise HTTPException(status_code=503, detail="Ingestion queue is full, please retry later")
+        upload_index.set_job(user_id, file_hash, job_id)
         
         return DocumentUploadResponse(
             success=True,
             doc_id=doc_id,
             filename=file.filename,
-            num_pages=result["num_pages"],
-            num_chunks=result["num_chunks"],
-            message=result["message"]
+            job_id=job_id,
+            status=JOB_QUEUED,
+            message="Document queued for processing"
         )
         
     except HTTPException:
@@ -83,14 +105,51 @@ async def upload_document(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading document: {str(e)}")
 
+def _ingest_document(file_path, doc_id, filename, file_size, file_hash, user_id, progress_callback):
+    """Process an uploaded PDF on an ingestion worker"""
+    result = rag_engine.process_and_store_pdf(
+        pdf_path=file_path,
+        doc_id=doc_id,
+        metadata={"user_id": user_id, "original_filename": filename},
+        progress_callback=progress_callback
+    )
+    
+    if not result["success"]:
+        upload_index.release(user_id, file_hash)
+        os.remove(file_path)
+        return result
+    
+    # Store in memory
+    upload_paths[doc_id] = file_path
+    documents_store[doc_id] = {
+        "id": doc_id,
+        "filename": filename,
+        "num_pages": result["num_pages"],
+        "num_chunks": result["num_chunks"],
+        "file_size": file_size,
+        "created_at": "2025-01-14"
+    }
+    
+    return result
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """Get the status of an ingestion job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse(**job)
+
 @router.post("/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
     """Ask a question about uploaded documents"""
     try:
-        result = rag_engine.query(
+        # The LLM wait does not hold the event loop
+        result = await rag_engine.aquery(
             question=request.question,
             doc_id=request.doc_id,
-            n_results=3
+            doc_ids=request.doc_ids,
+            user_id=request.user_id
         )
         
         if not result["success"]:
@@ -105,17 +164,62 @@ async def query_documents(request: QueryRequest):
             success=True,
             answer=result["answer"],
             question=request.question,
-            retrieved_chunks=result.get("retrieved_chunks"),
+            retrieved_chunks=[
+                ChunkReference.from_chunk(chunk, include_text=request.include_text)
+                for chunk in result.get("retrieved_chunks", [])
+            ],
             num_chunks_used=result.get("num_chunks_used"),
             model=result.get("model"),
             tokens_used=result.get("tokens_used"),
+            retrieval_ms=result.get("retrieval_ms"),
+            cached=result.get("cached", False),
+            context_report=result.get("context_report"),
             doc_id=request.doc_id
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+@router.get("/chunks/{chunk_id}", response_model=ChunkTextResponse)
+async def get_chunk(chunk_id: str):
+    """Get the text of a retrieved chunk"""
+    text = rag_engine.vector_store.get_chunk_text(chunk_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Chunk not found")
+    return ChunkTextResponse(chunk_id=chunk_id, text=text)
+
 @router.get("/documents")
 async def list_documents(user_id: str = "default_user"):
     """Get list of uploaded documents"""
-    return list(documents_store.values())
\ No newline at end of file
+    return list(documents_store.values())
+
+@router.delete("/documents/{doc_id}", response_model=DocumentDeleteResponse)
+async def delete_document(doc_id: str):
+    """Delete a document's vectors, chunk text and uploaded file"""
+    doc = documents_store.pop(doc_id, None)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    vector_result, file_bytes = await asyncio.gather(
+        run_in_threadpool(rag_engine.vector_store.delete_document, doc_id),
+        run_in_threadpool(_delete_file, upload_paths.pop(doc_id, None))
+    )
+    upload_index.release_document(doc_id)
+    
+    bytes_freed = file_bytes + vector_result["bytes_freed"]
+    return DocumentDeleteResponse(
+        success=vector_result["success"],
+        doc_id=doc_id,
+        chunks_deleted=doc["num_chunks"],
+        bytes_freed=bytes_freed,
+        message=f"Deleted {doc['num_chunks']} chunks and {bytes_freed} bytes"
+    )
+
+def _delete_file(file_path) -> int:
+    """Remove a file, returning its size (0 if it was already gone)"""
+    try:
+        size = os.path.getsize(file_path)
+        os.remove(file_path)
+        return size
+    except (FileNotFoundError, TypeError):
+        return 0
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 class DocumentUploadResponse(BaseModel):
@@ -7,26 +7,81 @@ class DocumentUploadResponse(BaseModel):
     success: bool
     doc_id: str
     filename: str
-    num_pages: int
-    num_chunks: int
+    num_pages: Optional[int] = None
+    num_chunks: Optional[int] = None
+    message: str
+    job_id: Optional[str] = None
+    status: Optional[str] = None
+    duplicate: bool = False
+
+class BatchUploadResponse(BaseModel):
+    """Response for a multi-file upload"""
+    success: bool
+    job_id: Optional[str] = None
+    documents: List[DocumentUploadResponse]
     message: str
 
+class JobStatusResponse(BaseModel):
+    """Status of a background ingestion job"""
+    job_id: str
+    doc_id: Optional[str] = None
+    filename: str
+    status: str = Field(..., description="queued, extracting, embedding, done or failed")
+    num_pages: Optional[int] = None
+    num_chunks: Optional[int] = None
+    message: Optional[str] = None
+    created_at: str
+    updated_at: str
+
 class QueryRequest(BaseModel):
     """Request for querying documents"""
     question: str = Field(..., description="User's question")
     doc_id: Optional[str] = Field(None, description="Specific document to query")
+    doc_ids: Optional[List[str]] = Field(None, description="Documents to query")
     user_id: str = Field(default="default_user", description="User identifier")
+    include_text: bool = Field(default=False, description="Return the text of retrieved chunks")
+
+class ChunkReference(BaseModel):
+    """A retrieved chunk, identified by id and position"""
+    chunk_id: str
+    doc_id: Optional[str] = None
+    chunk_index: Optional[int] = None
+    page_number: Optional[int] = None
+    start_offset: Optional[int] = None
+    end_offset: Optional[int] = None
+    merged_chunk_ids: Optional[List[str]] = Field(None, description="Chunks merged into this passage, if several")
+    text: Optional[str] = Field(None, description="Only set when include_text is requested")
+    
+    @classmethod
+    def from_chunk(cls, chunk: dict, include_text: bool = False) -> "ChunkReference":
+        """Build a reference from a retrieved chunk, dropping its text unless asked"""
+        fields = dict(chunk)
+        if not include_text:
+            fields.pop("text", None)
+        return cls(**fields)
 
 class QueryResponse(BaseModel):
     """Response for query"""
     success: bool
     answer: str
     question: str
-    retrieved_chunks: Optional[List[str]] = None
+    retrieved_chunks: Optional[List[ChunkReference]] = None
     num_chunks_used: Optional[int] = None
     model: Optional[str] = None
     tokens_used: Optional[int] = None
     doc_id: Optional[str] = None
+    retrieval_ms: Optional[Dict[str, float]] = Field(None, description="Retrieval latency per stage")
+    cached: bool = Field(default=False, description="Answer was served from the answer cache")
+    context_report: Optional[Dict[str, int]] = Field(None, description="Chunk merging and token savings")
+
+class DocumentDeleteResponse(BaseModel):
+    """Response for document deletion"""
+    success: bool
+    doc_id: str
+    chunks_deleted: int = 0
+    queries_deleted: int = 0
+    bytes_freed: int = Field(0, description="Upload file plus stored chunk text")
+    message: str
 
 class DocumentInfo(BaseModel):
     """Document information"""
@@ -41,4 +96,9 @@ class HealthResponse(BaseModel):
     """Health check response"""
     status: str
     message: str
-    databases: dict
\ No newline at end of file
+    databases: dict
+
+class ChunkTextResponse(BaseModel):
+    """Text of a single chunk"""
+    chunk_id: str
+    text: str
\ No newline at end of file
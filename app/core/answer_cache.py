@@ -0,0 +1,234 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from app.core.config import settings
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class AnswerCache(ABC):
+    """
+    Caches generated answers so repeated questions skip the LLM
+
+    Entries are keyed by the normalized question, the queried doc_id, a
+    hash of the retrieved chunk ids and the model, and expire after a TTL.
+    Each entry lists the documents its answer drew on, so a changed or
+    deleted document drops the answers built from it. Subclasses provide
+    the storage.
+    """
+
+    backend = "base"
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(question: str, doc_id: Optional[str], chunk_ids: List[str], model: str) -> str:
+        """Cache key for an answer to a question over given chunks"""
+        normalized = " ".join(question.lower().split()).rstrip("?.! ")
+        chunks_hash = hashlib.sha256("\0".join(chunk_ids).encode()).hexdigest()
+        return hashlib.sha256(f"{model}\0{doc_id or ''}\0{chunks_hash}\0{normalized}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up an unexpired answer
+
+        Returns:
+            The stored answer fields, or None
+        """
+        try:
+            entry = self._get(key)
+        except Exception as e:
+            print(f"Error reading answer cache: {e}")
+            entry = None
+        with self._counter_lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: Dict, doc_ids: Iterable[str]):
+        """
+        Store an answer
+
+        Args:
+            key: From make_key
+            entry: Answer fields (answer, model, tokens_used, ...)
+            doc_ids: Documents the answer was built from
+        """
+        try:
+            self._put(key, entry, sorted(set(doc_id for doc_id in doc_ids if doc_id)))
+        except Exception as e:
+            print(f"Error writing answer cache: {e}")
+
+    def invalidate_document(self, doc_id: str) -> int:
+        """
+        Drop answers built from a document
+
+        Returns:
+            Number of answers dropped
+        """
+        try:
+            return self._invalidate(doc_id)
+        except Exception as e:
+            print(f"Error invalidating answer cache: {e}")
+            return 0
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters"""
+        with self._counter_lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None
+            }
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[Dict]:
+        """Stored answer fields for an unexpired key, or None"""
+
+    @abstractmethod
+    def _put(self, key: str, entry: Dict, doc_ids: List[str]):
+        """Store answer fields under a key with the documents they used"""
+
+    @abstractmethod
+    def _invalidate(self, doc_id: str) -> int:
+        """Delete the answers that used a document; returns how many"""
+
+
+class LocalAnswerCache(AnswerCache):
+    """Answer cache in a local SQLite file"""
+
+    backend = "local"
+
+    def __init__(self, path: str, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, entry TEXT NOT NULL, expires_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_answers_expires_at ON answers (expires_at);"
+            "CREATE TABLE IF NOT EXISTS answer_documents ("
+            "doc_id TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (doc_id, key)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS idx_answer_documents_key ON answer_documents (key);"
+        )
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entry FROM answers WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _put(self, key: str, entry: Dict, doc_ids: List[str]):
+        now = time.time()
+        with self._lock:
+            # Expired entries are purged on write, so reads stay a single lookup
+            self._conn.execute(
+                "DELETE FROM answer_documents WHERE key IN (SELECT key FROM answers WHERE expires_at <= ?)",
+                (now,)
+            )
+            self._conn.execute("DELETE FROM answers WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, entry, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(entry), now + self.ttl_seconds)
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO answer_documents (doc_id, key) VALUES (?, ?)",
+                [(doc_id, key) for doc_id in doc_ids]
+            )
+            self._conn.commit()
+
+    def _invalidate(self, doc_id: str) -> int:
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute(
+                "SELECT key FROM answer_documents WHERE doc_id = ?", (doc_id,)
+            )]
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(f"DELETE FROM answers WHERE key IN ({placeholders})", batch)
+                self._conn.execute(f"DELETE FROM answer_documents WHERE key IN ({placeholders})", batch)
+            self._conn.commit()
+            return len(keys)
+
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class MongoAnswerCache(AnswerCache):
+    """
+    Answer cache in a MongoDB collection
+
+    A TTL index removes expired entries; reads also check the expiry
+    because MongoDB only purges about once a minute.
+    """
+
+    backend = "mongodb"
+
+    def __init__(self, collection, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        self.collection = collection
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+        self.collection.create_index("doc_ids")
+
+    def _get(self, key: str) -> Optional[Dict]:
+        document = self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        return document["entry"] if document else None
+
+    def _put(self, key: str, entry: Dict, doc_ids: List[str]):
+        self.collection.replace_one(
+            {"_id": key},
+            {
+                "_id": key,
+                "entry": entry,
+                "doc_ids": doc_ids,
+                "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+            },
+            upsert=True
+        )
+
+    def _invalidate(self, doc_id: str) -> int:
+        return self.collection.delete_many({"doc_ids": doc_id}).deleted_count
+
+
+def create_answer_cache(backend: str = None) -> Optional[AnswerCache]:
+    """
+    Build the answer cache selected in settings
+
+    Args:
+        backend: "local", "mongodb" or "none" (defaults to ANSWER_CACHE_BACKEND)
+
+    Returns:
+        An AnswerCache, or None when caching is disabled
+    """
+    backend = backend or settings.ANSWER_CACHE_BACKEND
+    if backend == "none":
+        return None
+    if backend == "local":
+        return LocalAnswerCache(settings.ANSWER_CACHE_PATH, settings.ANSWER_CACHE_TTL_SECONDS)
+    if backend == "mongodb":
+        # Imported here: connecting to MongoDB is only needed for this backend
+        from app.database.mongodb import mongodb
+        return MongoAnswerCache(mongodb.db.get_collection("answer_cache"), settings.ANSWER_CACHE_TTL_SECONDS)
+    raise ValueError(f"Unknown answer cache backend: {backend}")
@@ -0,0 +1,270 @@
+from typing import Callable, Dict, List
+from app.core.config import settings
+from app.utils.pdf_processor import PDFProcessor
+from app.utils.chunker import TextChunker
+import hashlib
+import os
+import time
+
+
+def stream_document(
+    pdf_path: str,
+    chunk_size: int = 1000,
+    overlap: int = 200,
+    unit: str = "chars"
+) -> Dict:
+    """
+    Open one PDF for chunking without extracting it up front
+
+    Pages are read and chunked as the chunks are consumed, so
+    BulkIngestor.add only holds one vector batch in memory.
+
+    Args:
+        pdf_path: Path to the PDF file
+        chunk_size: Chunk size, in `unit`
+        overlap: Chunk overlap, in `unit`
+        unit: "chars" or "tokens"
+
+    Returns:
+        Dictionary with num_pages, the chunk iterator and the MD5 hasher
+        that holds the doc_hash once the chunks are consumed
+    """
+    hasher = hashlib.md5()
+    chunker = TextChunker(chunk_size=chunk_size, overlap=overlap, unit=unit)
+    return {
+        "pdf_path": pdf_path,
+        "num_pages": PDFProcessor.get_num_pages(pdf_path),
+        "chunks": chunker.iter_chunks(
+            PDFProcessor.hash_pages(PDFProcessor.iter_pages(pdf_path), hasher)
+        ),
+        "hasher": hasher
+    }
+
+
+def extract_document(
+    pdf_path: str,
+    chunk_size: int = 1000,
+    overlap: int = 200,
+    unit: str = "chars"
+) -> Dict:
+    """
+    Extract and chunk one PDF in full
+
+    Module-level so it can run in a worker process. The chunks have to be
+    sent back to the parent process, so they are collected into a list;
+    in-process callers should use stream_document instead.
+
+    Args:
+        pdf_path: Path to the PDF file
+        chunk_size: Chunk size, in `unit`
+        overlap: Chunk overlap, in `unit`
+        unit: "chars" or "tokens"
+
+    Returns:
+        Dictionary with num_pages, doc_hash and the chunk dicts
+    """
+    try:
+        stream = stream_document(pdf_path, chunk_size, overlap, unit)
+        chunks = list(stream["chunks"])
+
+        if not chunks:
+            return {
+                "success": False,
+                "pdf_path": pdf_path,
+                "message": "No text could be extracted from the PDF"
+            }
+
+        return {
+            "success": True,
+            "pdf_path": pdf_path,
+            "num_pages": stream["num_pages"],
+            "doc_hash": stream["hasher"].hexdigest(),
+            "chunks": chunks
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "pdf_path": pdf_path,
+            "error": str(e),
+            "message": f"Error processing PDF: {str(e)}"
+        }
+
+
+class BulkIngestor:
+    """
+    Groups writes for many documents
+
+    Chunks of several documents are embedded and written to the vector
+    store together, and document rows are saved in large transactions.
+    A document's row is only saved after its vectors are written.
+    Chunks are consumed as they are produced, so a long document is
+    written over several vector batches instead of being held whole.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        save_documents: Callable[[List[Dict]], None],
+        vector_batch_size: int = None,
+        db_batch_size: int = None
+    ):
+        """
+        Args:
+            vector_store: Store with add_document_batches and delete_document
+            save_documents: Persists a list of document rows in one transaction
+            vector_batch_size: Chunks per vector store write
+            db_batch_size: Documents per database transaction
+        """
+        self.vector_store = vector_store
+        self.save_documents = save_documents
+        self.vector_batch_size = vector_batch_size or settings.BULK_VECTOR_BATCH_SIZE
+        self.db_batch_size = db_batch_size or settings.BULK_DB_BATCH_SIZE
+
+        self._pending_batches = []
+        self._pending_chunks = 0
+        self._pending_rows = []
+
+        self.documents = 0
+        self.pages = 0
+        self.chunks = 0
+        self.failed = []
+        self.saved_ids = []
+        self._failed_ids = set()
+        self._started = time.perf_counter()
+
+    def add(self, doc_id: str, extraction: Dict, metadata: Dict, row: Dict):
+        """
+        Write a document's chunks in vector batches and queue its row
+
+        Args:
+            doc_id: Document identifier
+            extraction: Result of stream_document or extract_document
+            metadata: Metadata stored with every chunk
+            row: Document row for save_documents; num_chunks and doc_hash
+                 are filled in once the chunks are consumed
+        """
+        metadata = dict(metadata or {})
+        metadata.update({
+            "num_pages": extraction["num_pages"],
+            "filename": os.path.basename(extraction["pdf_path"])
+        })
+
+        batch = None
+        num_chunks = 0
+        try:
+            for chunk in extraction["chunks"]:
+                if batch is None:
+                    batch = {
+                        "doc_id": doc_id,
+                        "chunks": [],
+                        "metadata": metadata,
+                        "start_index": num_chunks,
+                        "chunk_metadatas": []
+                    }
+                    self._pending_batches.append(batch)
+                batch["chunks"].append(chunk["text"])
+                batch["chunk_metadatas"].append({
+                    "page_number": chunk["page_number"],
+                    "start_offset": chunk["start"],
+                    "end_offset": chunk["end"]
+                })
+                num_chunks += 1
+                self._pending_chunks += 1
+
+                if self._pending_chunks >= self.vector_batch_size:
+                    self._flush_vectors()
+                    batch = None
+                    if doc_id in self._failed_ids:
+                        break
+        except Exception as e:
+            self._discard(doc_id)
+            self._fail([row], f"Error processing PDF: {str(e)}")
+            return
+
+        if doc_id in self._failed_ids:
+            self._fail([row], "Failed to store document in vector database")
+            return
+        if num_chunks == 0:
+            self._fail([row], "No text could be extracted from the PDF")
+            return
+
+        row = dict(row, num_chunks=num_chunks)
+        if "hasher" in extraction:
+            row["doc_hash"] = extraction["hasher"].hexdigest()
+        else:
+            row["doc_hash"] = extraction["doc_hash"]
+        self._pending_rows.append(row)
+
+        if len(self._pending_rows) >= self.db_batch_size:
+            self.flush()
+
+    def _discard(self, doc_id: str):
+        """Drop a document's pending chunks and the vectors already written"""
+        pending = [batch for batch in self._pending_batches if batch["doc_id"] == doc_id]
+        self._pending_batches = [batch for batch in self._pending_batches if batch["doc_id"] != doc_id]
+        self._pending_chunks -= sum(len(batch["chunks"]) for batch in pending)
+        self.vector_store.delete_document(doc_id)
+
+    def _flush_vectors(self):
+        """Write all pending chunks in one vector store call"""
+        if not self._pending_batches:
+            return
+        batches = self._pending_batches
+        self._pending_batches = []
+        self._pending_chunks = 0
+
+        if not self.vector_store.add_document_batches(batches):
+            # Leave nothing half-written and don't save rows for these documents
+            failed_ids = {batch["doc_id"] for batch in batches}
+            self._failed_ids |= failed_ids
+            for doc_id in failed_ids:
+                self.vector_store.delete_document(doc_id)
+            self._fail([row for row in self._pending_rows if row["id"] in failed_ids],
+                       "Failed to store document in vector database")
+            self._pending_rows = [row for row in self._pending_rows if row["id"] not in failed_ids]
+
+    def flush(self):
+        """Write pending vectors, then save pending rows in one transaction"""
+        self._flush_vectors()
+        if not self._pending_rows:
+            return
+        rows = self._pending_rows
+        self._pending_rows = []
+
+        try:
+            self.save_documents(rows)
+            self._count(rows)
+        except Exception as e:
+            # One bad row (e.g. a duplicate doc_hash) must not sink the batch
+            print(f"Bulk insert failed ({e}), retrying rows one by one")
+            for row in rows:
+                try:
+                    self.save_documents([row])
+                    self._count([row])
+                except Exception as row_error:
+                    self.vector_store.delete_document(row["id"])
+                    self._fail([row], str(row_error))
+
+    def _count(self, rows: List[Dict]):
+        self.saved_ids.extend(row["id"] for row in rows)
+        self.documents += len(rows)
+        self.pages += sum(row.get("num_pages") or 0 for row in rows)
+        self.chunks += sum(row.get("num_chunks") or 0 for row in rows)
+
+    def _fail(self, rows: List[Dict], message: str):
+        for row in rows:
+            self.failed.append({"doc_id": row["id"], "filename": row.get("filename"), "message": message})
+
+    def summary(self) -> Dict:
+        """Totals and throughput since the ingestor was created"""
+        elapsed = time.perf_counter() - self._started
+        return {
+            "documents": self.documents,
+            "pages": self.pages,
+            "chunks": self.chunks,
+            "failed": len(self.failed),
+            "seconds": round(elapsed, 2),
+            "docs_per_second": round(self.documents / elapsed, 2) if elapsed else None,
+            "pages_per_second": round(self.pages / elapsed, 2) if elapsed else None
+        }
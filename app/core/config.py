@@ -1,10 +1,27 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # OpenRouter API
     OPENROUTER_API_KEY: str
     OPENROUTER_MODEL: str = "meta-llama/llama-3.1-8b-instruct:free"
+    OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
+    LLM_MAX_CONNECTIONS: int = 100  # Open connections to OpenRouter; further requests wait for one
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20  # Idle connections kept for reuse
+    LLM_KEEPALIVE_EXPIRY: float = 30.0  # Seconds an idle connection is kept
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_READ_TIMEOUT: float = 60.0  # Longest wait for a response
+    LLM_POOL_TIMEOUT: float = 10.0  # Longest wait for a free connection
+    LLM_FALLBACK_MODE: str = "serial"  # "serial" (next model after a failure) or "hedged" (also race it after a delay)
+    LLM_HEDGE_DELAY_MS: int = 2000  # Wait for a model before racing the next one; tune from /stats p95_ms
+    LLM_HEDGE_MAX_PARALLEL: int = 3  # Most models in flight at once per question
+    LLM_STATS_WINDOW: int = 200  # Recent latencies and outcomes kept per model
+    LLM_CIRCUIT_FAILURES: int = 3  # Rate limits/timeouts in a row that take a model out of rotation
+    LLM_CIRCUIT_COOLDOWN_SECONDS: float = 30.0  # Time out of rotation before a probe request
+    LLM_RATE_LIMIT_PER_MINUTE: float = 20  # Requests per model per minute before they queue (OpenRouter free tier; 0 = no limit)
+    LLM_RATE_LIMIT_BURST: int = 5  # Requests a model takes at once before the per-minute rate applies
+    LLM_RATE_LIMIT_MAX_WAIT_SECONDS: float = 10.0  # Longest queue wait; past it the next model is tried
+    LLM_RATE_LIMITS: Dict[str, float] = {}  # Per-model overrides, e.g. '{"model-id": 200}' in .env
     
     # Database
     POSTGRES_URL: str
@@ -14,8 +31,73 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     
+    # Vector store
+    VECTOR_BACKEND: str = "chroma"  # "chroma" or "pgvector" (document_chunks table in POSTGRES_URL)
+    PGVECTOR_DIMENSIONS: int = 384  # Embedding size; must match the embedding model
+    PGVECTOR_INDEX: str = "hnsw"  # "hnsw" (uses the HNSW_* settings) or "ivfflat"
+    PGVECTOR_IVFFLAT_LISTS: int = 100  # Clusters; build the index after loading data
+    PGVECTOR_IVFFLAT_PROBES: int = 10  # Clusters searched per query
+    PGVECTOR_ITERATIVE_SCAN: str = "relaxed_order"  # Filtered HNSW/IVF scans keep going until full (pgvector 0.8+); "off" for older
+    
     # ChromaDB
     CHROMA_PERSIST_DIR: str = "./chroma_db"
+    CHROMA_CLIENT: str = "persistent"  # "persistent" (on disk in CHROMA_PERSIST_DIR) or "memory" (lost on restart)
+    CHROMA_WARMUP: bool = True  # Load the index at startup instead of on the first query
+    CHROMA_MEMORY_LIMIT_BYTES: int = 2 * 1024 ** 3  # Loaded segments beyond this are unloaded, least recently used first (0 = no limit)
+    VECTOR_SNAPSHOT_PATH: str = ""  # Snapshot restored at startup when CHROMA_PERSIST_DIR has no index yet
+    CHUNK_STORE_DIR: str = "./chunk_store"  # Memory-mapped chunk text, one file pair per document
+    HNSW_SPACE: str = "l2"  # "l2", "cosine" or "ip"; fixed when a collection is created
+    HNSW_M: int = 16  # Graph links per node; fixed at creation
+    HNSW_CONSTRUCTION_EF: int = 100  # Build-time candidate list; fixed at creation
+    HNSW_SEARCH_EF: int = 100  # Query-time candidate list (higher: better recall, slower); applied on startup
+    VECTOR_SHARDING: str = "none"  # "none" (one collection), "user" (one per user_id) or "hash" (buckets of user_id)
+    VECTOR_SHARD_BUCKETS: int = 16  # Collections in "hash" mode
+    VECTOR_SHARD_IDLE_SECONDS: int = 600  # Shard handles unused this long are released
+    VECTOR_SHARD_MAX_OPEN: int = 256  # Most shard handles kept open at once
+
+    # Retrieval
+    HYBRID_SEARCH_ENABLED: bool = True  # Fuse BM25 keyword results with vector results
+    HYBRID_CANDIDATES: int = 20  # Candidates taken from each retriever before fusion
+    RRF_K: int = 60  # Reciprocal-rank fusion damping constant
+    LEXICAL_MIN_IDF: float = 0.5  # BM25 skips query terms in more than ~60% of chunks (0 keeps all)
+    LEXICAL_MAX_POSTINGS: int = 5000  # Postings read per query term, highest tf first (0 reads all)
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1024  # Query embeddings kept in memory (0 disables)
+    SEARCH_RESULT_CACHE_SIZE: int = 1024  # Cached ranked chunk ids per question and filters (0 disables)
+    RERANK_ENABLED: bool = True  # Merge overlapping chunks and pick a diverse set with MMR
+    RERANK_CANDIDATES: int = 12  # Chunks retrieved before merging and MMR selection
+    MMR_LAMBDA: float = 0.7  # 1.0 ranks by relevance only, 0.0 by diversity only
+    
+    # Prompt context
+    QUERY_MAX_CHUNKS: int = 6  # Most passages considered for the context
+    CONTEXT_TOKEN_BUDGET: int = 500  # Context tokens per question (at most what the old top-3 join cost)
+    CONTEXT_TOKEN_BUDGETS: Dict[str, int] = {}  # Larger per-model budgets, e.g. '{"model-id": 1500}' in .env
+    
+    # Answer cache
+    ANSWER_CACHE_BACKEND: str = "local"  # "local" (SQLite), "mongodb" or "none"
+    ANSWER_CACHE_PATH: str = "./answer_cache/answers.sqlite3"
+    ANSWER_CACHE_TTL_SECONDS: int = 86400
+    
+    # Embeddings
+    EMBEDDING_BACKEND: str = "onnx"  # "onnx" (MiniLM on CPU) or "hashing" (deterministic, for tests)
+    EMBEDDING_BATCH_SIZE: int = 64  # Texts per model call
+    EMBEDDING_WORKERS: int = 1  # Threads embedding batches in parallel
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200000  # LRU-evicted beyond this
+    
+    # Ingestion
+    INGEST_MAX_WORKERS: int = 2  # Concurrent ingestion jobs
+    INGEST_QUEUE_SIZE: int = 100  # Max queued + running jobs before uploads are rejected
+    INGEST_JOB_TTL_SECONDS: int = 3600  # Finished jobs stay visible at GET /jobs/{id} this long
+    INGEST_JOB_HISTORY: int = 10000  # Most finished jobs kept in memory
+    PDF_EXTRACT_WORKERS: int = 4  # Processes for page extraction (1 = serial)
+    PDF_PARALLEL_PAGE_THRESHOLD: int = 50  # Page count at which extraction goes parallel
+    INGEST_BATCH_SIZE: int = 64  # Chunks embedded and written per vector store call
+    CHUNK_SIZE: int = 1000  # In CHUNK_UNIT
+    CHUNK_OVERLAP: int = 200  # In CHUNK_UNIT
+    CHUNK_UNIT: str = "chars"  # "chars" or "tokens"
+    BULK_VECTOR_BATCH_SIZE: int = 512  # Chunks per vector store write during bulk ingestion
+    BULK_DB_BATCH_SIZE: int = 200  # Documents per PostgreSQL transaction during bulk ingestion
     
     # App Settings
     APP_NAME: str = "DocuChat"
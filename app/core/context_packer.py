@@ -0,0 +1,110 @@
+from typing import Dict, List
+from app.utils.chunker import SENTENCE_BREAK
+from app.utils.tokenizer import Tokenizer
+
+# Passages are separated like this in the prompt
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+
+class ContextPacker:
+    """
+    Builds the prompt context within a token budget
+
+    Passages are added in relevance order. One that does not fit is cut
+    at the last sentence end that does, or at a token boundary when no
+    sentence end fits (e.g. newline-separated lists), and packing goes on
+    with the later, possibly smaller passages. The context never exceeds
+    the budget.
+    """
+
+    def __init__(self, tokenizer: Tokenizer = None, min_trimmed_tokens: int = 20):
+        """
+        Args:
+            tokenizer: Tokenizer used for counting (created if needed)
+            min_trimmed_tokens: Smallest remainder worth filling with a trimmed passage
+        """
+        self.tokenizer = tokenizer or Tokenizer()
+        self.min_trimmed_tokens = min_trimmed_tokens
+        self.separator_tokens = self.tokenizer.count(CONTEXT_SEPARATOR)
+
+    def pack(self, passages: List[Dict], budget: int) -> Dict:
+        """
+        Fill a token budget with passages
+
+        Args:
+            passages: Chunk references with text, most relevant first
+            budget: Maximum context tokens
+
+        Returns:
+            Dictionary with the context string, the passages used (some
+            possibly trimmed), its token count and whether a passage was
+            trimmed
+        """
+        used = []
+        tokens = 0
+        trimmed = False
+
+        for passage in passages:
+            cost = self.tokenizer.count(passage["text"])
+            separator = self.separator_tokens if used else 0
+            remaining = budget - tokens - separator
+
+            if cost <= remaining:
+                used.append(passage)
+                tokens += separator + cost
+                continue
+
+            if remaining < self.min_trimmed_tokens:
+                continue
+            text, cost = self._trim(passage["text"], remaining)
+            if text:
+                passage = dict(passage)
+                passage["text"] = text
+                if passage.get("start_offset") is not None:
+                    passage["end_offset"] = passage["start_offset"] + len(text)
+                used.append(passage)
+                tokens += separator + cost
+                trimmed = True
+
+        return {
+            "context": CONTEXT_SEPARATOR.join(passage["text"] for passage in used),
+            "passages": used,
+            "tokens": tokens,
+            "trimmed": trimmed
+        }
+
+    def _trim(self, text: str, max_tokens: int):
+        """
+        Longest prefix within max_tokens, with its token count
+
+        Ends at a sentence end if one fits, otherwise at a token boundary.
+        """
+        ends = [match.start() + 1 for match in SENTENCE_BREAK.finditer(text)]
+        best = ("", 0)
+        low, high = 0, len(ends) - 1
+        # Token counts grow with the prefix, so binary search the sentence ends
+        while low <= high:
+            middle = (low + high) // 2
+            prefix = text[:ends[middle]]
+            count = self.tokenizer.count(prefix)
+            if count <= max_tokens:
+                best = (prefix, count)
+                low = middle + 1
+            else:
+                high = middle - 1
+        if best[0]:
+            return best
+        return self._cut_tokens(text, max_tokens)
+
+    def _cut_tokens(self, text: str, max_tokens: int):
+        """Prefix of at most max_tokens tokens, ending at a token boundary"""
+        offsets = self.tokenizer.offsets(text)
+        end = min(len(offsets), max_tokens)
+        while end > 0:
+            prefix = text[:offsets[end]].rstrip() if end < len(offsets) else text
+            count = self.tokenizer.count(prefix)
+            if count <= max_tokens:
+                return prefix, count
+            # Re-encoding a prefix can split its last word differently
+            end -= 1
+        return "", 0
@@ -0,0 +1,185 @@
+from array import array
+from typing import Dict, List, Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, on-disk embedding cache
+
+    Vectors are keyed by a hash of the model id and the text and kept in
+    SQLite. When the cache grows past `max_entries`, the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200000):
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> str:
+        """Cache key for a text embedded by a given model"""
+        return hashlib.sha256(f"{model_id}\0{text}".encode()).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up several keys at once
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of the keys that were found to their vectors
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(unique_keys), 500):
+                batch = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Look up a single key"""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """
+        Store vectors, evicting least recently used entries over the cap
+
+        Args:
+            items: Mapping of cache key to vector
+        """
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+            )
+            self._size += self._conn.total_changes - before
+
+            if self._size > self.max_entries:
+                # Evict down to 90% of the cap so we don't evict on every insert
+                excess = self._size - int(self.max_entries * 0.9)
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self._size -= excess
+                self.evictions += excess
+            self._conn.commit()
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions
+            }
+
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddingProvider:
+    """
+    Puts an EmbeddingCache in front of an EmbeddingProvider
+
+    Only texts missing from the cache reach the model; repeated texts
+    within one call are embedded once.
+    """
+
+    def __init__(self, provider, cache: EmbeddingCache):
+        self.provider = provider
+        self.cache = cache
+
+    @property
+    def model_id(self) -> str:
+        return self.provider.model_id
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, serving what we can from the cache"""
+        if not texts:
+            return []
+
+        keys = [EmbeddingCache.make_key(self.model_id, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing[key] = text
+
+        if missing:
+            # Round to float32 like stored vectors, so hits and misses agree exactly
+            computed = {
+                key: array("f", vector).tolist()
+                for key, vector in zip(missing.keys(), self.provider.embed(list(missing.values())))
+            }
+            self.cache.put_many(computed)
+            vectors.update(computed)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single search query"""
+        return self.embed([text])[0]
+
+    def get_stats(self) -> Dict:
+        """Provider throughput plus cache counters"""
+        stats = self.provider.get_stats()
+        stats["cache"] = self.cache.get_stats()
+        return stats
@@ -0,0 +1,159 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from app.core.config import settings
+import hashlib
+import math
+import re
+import threading
+import time
+
+
+class EmbeddingProvider(ABC):
+    """
+    Base class for embedding backends
+
+    Splits input into batches of `batch_size`, optionally embeds batches
+    on a thread pool, and keeps throughput counters.
+    Subclasses implement _embed_batch.
+    """
+
+    model_id = "base"
+
+    def __init__(self, batch_size: int = 64, max_workers: int = 1):
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self._executor = None
+        if self.max_workers > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="embed"
+            )
+        self._stats_lock = threading.Lock()
+        self._texts_embedded = 0
+        self._seconds = 0.0
+
+    @abstractmethod
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a single batch"""
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts in batches
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One vector per text, in input order
+        """
+        if not texts:
+            return []
+
+        started = time.perf_counter()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+        if self._executor is not None and len(batches) > 1:
+            batch_results = list(self._executor.map(self._embed_batch, batches))
+        else:
+            batch_results = [self._embed_batch(batch) for batch in batches]
+
+        embeddings = [vector for batch in batch_results for vector in batch]
+
+        with self._stats_lock:
+            self._texts_embedded += len(texts)
+            self._seconds += time.perf_counter() - started
+
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single search query"""
+        return self.embed([text])[0]
+
+    def get_stats(self) -> Dict:
+        """Throughput counters since start-up"""
+        with self._stats_lock:
+            return {
+                "model_id": self.model_id,
+                "batch_size": self.batch_size,
+                "max_workers": self.max_workers,
+                "texts_embedded": self._texts_embedded,
+                "seconds": round(self._seconds, 3),
+                "chunks_per_second": round(self._texts_embedded / self._seconds, 1) if self._seconds else None
+            }
+
+
+class OnnxEmbeddingProvider(EmbeddingProvider):
+    """all-MiniLM-L6-v2 on ONNX Runtime CPU (Chroma's bundled default model)"""
+
+    model_id = "all-MiniLM-L6-v2-onnx"
+
+    def __init__(self, batch_size: int = 64, max_workers: int = 1):
+        super().__init__(batch_size=batch_size, max_workers=max_workers)
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+        self._model = ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+        # The model is downloaded and loaded on first use; do that once
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if not self._loaded:
+            with self._load_lock:
+                embeddings = self._model(texts)
+                self._loaded = True
+        else:
+            embeddings = self._model(texts)
+        return [[float(x) for x in vector] for vector in embeddings]
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic stand-in for tests and benchmarks
+
+    Hashes word tokens into a fixed number of signed buckets and
+    L2-normalises the result. No model download, no randomness.
+    """
+
+    def __init__(self, dimensions: int = 384, batch_size: int = 64, max_workers: int = 1):
+        super().__init__(batch_size=batch_size, max_workers=max_workers)
+        self.dimensions = dimensions
+        self.model_id = f"hashing-{dimensions}"
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed_text(text) for text in texts]
+
+    def _embed_text(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(token.encode()).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = math.sqrt(sum(x * x for x in vector))
+        if norm:
+            vector = [x / norm for x in vector]
+        return vector
+
+
+def create_embedding_provider(backend: str = None) -> EmbeddingProvider:
+    """
+    Build the embedding provider selected in settings
+
+    Args:
+        backend: "onnx" or "hashing" (defaults to EMBEDDING_BACKEND)
+
+    Returns:
+        Configured EmbeddingProvider
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend == "onnx":
+        return OnnxEmbeddingProvider(
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            max_workers=settings.EMBEDDING_WORKERS
+        )
+    if backend == "hashing":
+        return HashingEmbeddingProvider(
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            max_workers=settings.EMBEDDING_WORKERS
+        )
+    raise ValueError(f"Unknown embedding backend: {backend}")
@@ -0,0 +1,150 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from app.core.config import settings
+import threading
+import time
+import uuid
+
+# Job lifecycle states
+JOB_QUEUED = "queued"
+JOB_EXTRACTING = "extracting"
+JOB_EMBEDDING = "embedding"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED)
+
+
+class IngestionJobQueue:
+    """
+    Runs document ingestion on a bounded pool of worker threads
+    so uploads never block the API event loop
+
+    Finished jobs stay queryable for job_ttl seconds, and at most
+    max_finished of them are kept; older ones are dropped.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        max_pending: int = None,
+        job_ttl: float = None,
+        max_finished: int = None
+    ):
+        self.max_workers = max_workers or settings.INGEST_MAX_WORKERS
+        self.max_pending = max_pending or settings.INGEST_QUEUE_SIZE
+        self.job_ttl = settings.INGEST_JOB_TTL_SECONDS if job_ttl is None else job_ttl
+        self.max_finished = settings.INGEST_JOB_HISTORY if max_finished is None else max_finished
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="ingest"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._jobs: Dict[str, Dict] = {}
+        # job_id -> monotonic finish time, oldest first
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, task: Callable, doc_id: str, filename: str) -> Optional[str]:
+        """
+        Queue an ingestion task
+
+        Args:
+            task: Callable taking a progress callback and returning a result dict
+                  with "success", "num_pages" and "num_chunks"
+            doc_id: Document being ingested
+            filename: Original filename
+
+        Returns:
+            Job ID, or None if the queue is full
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+
+        job_id = str(uuid.uuid4())
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self._expire()
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "doc_id": doc_id,
+                "filename": filename,
+                "status": JOB_QUEUED,
+                "num_pages": None,
+                "num_chunks": None,
+                "message": "Queued for ingestion",
+                "created_at": now,
+                "updated_at": now
+            }
+
+        self._executor.submit(self._run, job_id, task)
+        return job_id
+
+    def _run(self, job_id: str, task: Callable):
+        """Execute a task and record its outcome on the job"""
+        try:
+            result = task(lambda status, **fields: self.update(job_id, status=status, **fields))
+            if result.get("success"):
+                self.update(
+                    job_id,
+                    status=JOB_DONE,
+                    num_pages=result.get("num_pages"),
+                    num_chunks=result.get("num_chunks"),
+                    message=result.get("message", "Done")
+                )
+            else:
+                self.update(
+                    job_id,
+                    status=JOB_FAILED,
+                    message=result.get("message", "Failed to process document")
+                )
+        except Exception as e:
+            print(f"Ingestion job {job_id} failed: {e}")
+            self.update(job_id, status=JOB_FAILED, message=f"Error processing document: {str(e)}")
+        finally:
+            self._slots.release()
+
+    def update(self, job_id: str, **fields):
+        """Update fields of a job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            job["updated_at"] = datetime.utcnow().isoformat()
+            if job["status"] in FINISHED_STATES and job_id not in self._finished:
+                self._finished[job_id] = time.monotonic()
+                self._expire()
+
+    def _expire(self):
+        """Drop finished jobs past the TTL or over the history cap; caller holds the lock"""
+        cutoff = time.monotonic() - self.job_ttl
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > cutoff and len(self._finished) <= self.max_finished:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Get a snapshot of a job
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Job information or None if unknown
+        """
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and optionally wait for running jobs"""
+        self._executor.shutdown(wait=wait)
+
+# Global instance
+job_queue = IngestionJobQueue()
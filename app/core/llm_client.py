@@ -1,8 +1,15 @@
+import asyncio
+import hashlib
+import json
 import os
 import time
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 from app.core.config import settings
-from typing import List, Dict
+from app.core.model_stats import ModelStats, is_transient, model_stats
+from app.core.rate_limiter import LocalRateLimitError, ModelRateLimiter, llm_rate_limiter
+from app.core.single_flight import SingleFlight
+from typing import AsyncIterator, List, Dict
 
 # Free models to try in order of preference
 FREE_MODELS = [
@@ -13,26 +20,136 @@ FREE_MODELS = [
     "qwen/qwen-2-7b-instruct:free",
 ]
 
+def pool_limits() -> httpx.Limits:
+    """Connection pool size for OpenRouter requests"""
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY
+    )
+
+def pool_timeout() -> httpx.Timeout:
+    """Timeouts for OpenRouter requests"""
+    return httpx.Timeout(
+        settings.LLM_READ_TIMEOUT,
+        connect=settings.LLM_CONNECT_TIMEOUT,
+        pool=settings.LLM_POOL_TIMEOUT
+    )
+
 class OpenRouterClient:
-    """Handles interactions with OpenRouter API"""
+    """
+    Handles interactions with OpenRouter API
+
+    Sync and async calls each go through one keep-alive connection pool,
+    so repeated questions skip the TCP and TLS handshakes.
+    """
 
     def __init__(self):
         # Initialize OpenAI client pointing to OpenRouter
         self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
+            base_url=settings.OPENROUTER_BASE_URL,
             api_key=settings.OPENROUTER_API_KEY,
+            http_client=httpx.Client(limits=pool_limits(), timeout=pool_timeout()),
         )
         self.model = settings.OPENROUTER_MODEL
         self.fallback_models = [m for m in FREE_MODELS if m != self.model]
+        self._async_client = None
+        self._async_loop = None
+        self.fallback_mode = settings.LLM_FALLBACK_MODE
+        self.hedge_delay = settings.LLM_HEDGE_DELAY_MS / 1000
+        self.hedge_max_parallel = settings.LLM_HEDGE_MAX_PARALLEL
+        self.stats: ModelStats = model_stats
+        self.rate_limiter: ModelRateLimiter = llm_rate_limiter
+        self.single_flight = SingleFlight()
+    
+    def async_client(self) -> AsyncOpenAI:
+        """
+        Async client for the running event loop
+
+        Pooled connections belong to the loop that opened them, so a new
+        loop (e.g. a second asyncio.run) gets its own client.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = AsyncOpenAI(
+                base_url=settings.OPENROUTER_BASE_URL,
+                api_key=settings.OPENROUTER_API_KEY,
+                http_client=httpx.AsyncClient(limits=pool_limits(), timeout=pool_timeout()),
+            )
+            self._async_loop = loop
+        return self._async_client
+    
+    async def aclose(self):
+        """Close pooled async connections (call on shutdown)"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+            self._async_loop = None
     
     def _call_model(self, model: str, messages: List[Dict]) -> Dict:
         """Make API call to a specific model"""
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=0.7,
-            max_tokens=500,
+        self.rate_limiter.acquire(model)
+        started = time.perf_counter()
+        self.stats.record_start(model)
+        try:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=500,
+            )
+        except Exception as e:
+            self.stats.record_failure(model, e)
+            raise
+        self.stats.record_win(model, (time.perf_counter() - started) * 1000)
+        return self._result(model, response)
+    
+    async def _acall_model(self, model: str, messages: List[Dict], hedge: bool = False) -> Dict:
+        """
+        Make API call to a specific model without blocking the event loop
+
+        Identical requests already in flight (same model and messages, e.g.
+        many users asking the same question about a shared document) wait
+        for that call instead of sending their own.
+
+        Args:
+            model: Model to ask
+            messages: Chat messages
+            hedge: The call races a slower model (for the stats)
+        """
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+        result = await self.single_flight.run(
+            (model, digest),
+            lambda: self._arequest_model(model, messages, hedge)
         )
+        return dict(result)
+    
+    async def _arequest_model(self, model: str, messages: List[Dict], hedge: bool) -> Dict:
+        """One upstream request, after waiting for the model's rate limit"""
+        await self.rate_limiter.aacquire(model)
+        started = time.perf_counter()
+        self.stats.record_start(model, hedge=hedge)
+        try:
+            response = await self.async_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=500,
+            )
+        except asyncio.CancelledError:
+            self.stats.record_cancelled(model)
+            raise
+        except Exception as e:
+            self.stats.record_failure(model, e)
+            raise
+        self.stats.record_win(model, (time.perf_counter() - started) * 1000, hedge=hedge)
+        return self._result(model, response)
+    
+    def models_to_try(self) -> List[str]:
+        """Primary and fallbacks, healthiest and fastest first, without open circuits"""
+        return self.stats.order([self.model] + self.fallback_models)
+    
+    def _result(self, model: str, response) -> Dict:
         answer = response.choices[0].message.content
         return {
             "success": True,
@@ -41,14 +158,14 @@ class OpenRouterClient:
             "tokens_used": response.usage.total_tokens if response.usage else None
         }
 
-    def generate_response(
+    def build_messages(
         self,
         query: str,
         context: str,
         conversation_history: List[Dict] = None
-    ) -> Dict:
+    ) -> List[Dict]:
         """
-        Generate response using OpenRouter with fallback models
+        Build the chat messages for a question
 
         Args:
             query: User's question
@@ -56,7 +173,7 @@ class OpenRouterClient:
             conversation_history: Previous messages (optional)
 
         Returns:
-            Dictionary with response and metadata
+            Messages for the chat completions API
         """
         # Build the system prompt
         system_prompt = """You are a helpful AI assistant that answers questions based on provided documents.
@@ -86,12 +203,31 @@ Please answer the question based only on the context above."""
 
         # Add current query
         messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def generate_response(
+        self,
+        query: str,
+        context: str,
+        conversation_history: List[Dict] = None
+    ) -> Dict:
+        """
+        Generate response using OpenRouter with fallback models
 
-        # Try primary model first, then fallbacks
-        models_to_try = [self.model] + self.fallback_models
+        Args:
+            query: User's question
+            context: Relevant document chunks
+            conversation_history: Previous messages (optional)
+
+        Returns:
+            Dictionary with response and metadata
+        """
+        messages = self.build_messages(query, context, conversation_history)
+
+        # Try the healthiest model first, then the others
         last_error = None
 
-        for model in models_to_try:
+        for model in self.models_to_try():
             try:
                 print(f"Trying model: {model}")
                 result = self._call_model(model, messages)
@@ -101,17 +237,191 @@ Please answer the question based only on the context above."""
                 error_str = str(e)
                 print(f"Model {model} failed: {error_str}")
                 last_error = error_str
-                # If rate limited (429), try next model
-                if "429" in error_str or "rate" in error_str.lower():
+                # If rate limited (429) or timed out, try next model
+                if is_transient(e):
                     time.sleep(0.5)  # Brief pause before trying next
                     continue
                 # For other errors, also try next model
                 continue
 
         # All models failed
+        return self._all_failed(last_error)
+
+    async def agenerate_response(
+        self,
+        query: str,
+        context: str,
+        conversation_history: List[Dict] = None
+    ) -> Dict:
+        """
+        Async generate_response: waits on OpenRouter without holding the event loop
+
+        Args:
+            query: User's question
+            context: Relevant document chunks
+            conversation_history: Previous messages (optional)
+
+        Returns:
+            Dictionary with response and metadata
+        """
+        messages = self.build_messages(query, context, conversation_history)
+        if self.fallback_mode == "hedged":
+            return await self._ahedged(messages)
+        last_error = None
+
+        for model in self.models_to_try():
+            try:
+                print(f"Trying model: {model}")
+                result = await self._acall_model(model, messages)
+                print(f"Success with model: {model}")
+                return result
+            except Exception as e:
+                error_str = str(e)
+                print(f"Model {model} failed: {error_str}")
+                last_error = error_str
+                # If rate limited (429) or timed out, pause before trying the next model
+                if is_transient(e):
+                    await asyncio.sleep(0.5)
+
+        return self._all_failed(last_error)
+
+    async def _ahedged(self, messages: List[Dict]) -> Dict:
+        """
+        Race models instead of waiting on each in turn
+
+        The primary gets hedge_delay to answer. After that, or as soon as a
+        request fails, the next model is started alongside the ones still
+        running (at most hedge_max_parallel). The first success is
+        returned and the other requests are cancelled.
+        """
+        waiting = self.models_to_try()
+        running = {}
+        last_error = None
+        if not waiting:
+            return self._all_failed(last_error)
+
+        def start_next():
+            model = waiting.pop(0)
+            hedge = bool(running)
+            print(f"{'Hedging with' if hedge else 'Trying'} model: {model}")
+            running[asyncio.ensure_future(self._acall_model(model, messages, hedge=hedge))] = model
+
+        start_next()
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running, timeout=self.hedge_delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                failed = 0
+                for task in done:
+                    model = running.pop(task)
+                    if task.exception() is None:
+                        print(f"Success with model: {model}")
+                        return task.result()
+                    last_error = str(task.exception())
+                    print(f"Model {model} failed: {last_error}")
+                    failed += 1
+                # Replace each failed request at once
+                for _ in range(failed):
+                    if waiting:
+                        start_next()
+                # Nothing finished within the delay: race the next model if there is room
+                if not done and waiting and len(running) < self.hedge_max_parallel:
+                    start_next()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return self._all_failed(last_error)
+
+    async def astream_response(
+        self,
+        query: str,
+        context: str,
+        conversation_history: List[Dict] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream the answer token by token
+
+        Fallback models are only tried until the first token arrives;
+        after that a failure ends the stream with an error event.
+
+        Args:
+            query: User's question
+            context: Relevant document chunks
+            conversation_history: Previous messages (optional)
+
+        Yields:
+            {"type": "token", "text": ...} for each piece of the answer, then
+            {"type": "done", "answer", "model", "tokens_used"} or
+            {"type": "error", "error", "answer"}
+        """
+        messages = self.build_messages(query, context, conversation_history)
+        last_error = None
+
+        for model in self.models_to_try():
+            try:
+                await self.rate_limiter.aacquire(model)
+            except LocalRateLimitError as e:
+                print(f"Model {model} skipped: {e}")
+                last_error = str(e)
+                continue
+            pieces = []
+            tokens_used = None
+            started = time.perf_counter()
+            self.stats.record_start(model)
+            try:
+                print(f"Streaming model: {model}")
+                stream = await self.async_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=500,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                # Closing the stream returns its connection to the pool,
+                # also when the client disconnects or the stream fails
+                async with stream:
+                    async for chunk in stream:
+                        if chunk.usage:
+                            tokens_used = chunk.usage.total_tokens
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            pieces.append(chunk.choices[0].delta.content)
+                            yield {"type": "token", "text": chunk.choices[0].delta.content}
+                self.stats.record_win(model, (time.perf_counter() - started) * 1000)
+                yield {
+                    "type": "done",
+                    "success": True,
+                    "answer": "".join(pieces),
+                    "model": model,
+                    "tokens_used": tokens_used
+                }
+                return
+            except (asyncio.CancelledError, GeneratorExit):
+                # The client went away mid-stream
+                self.stats.record_cancelled(model)
+                raise
+            except Exception as e:
+                self.stats.record_failure(model, e)
+                error_str = str(e)
+                print(f"Model {model} failed: {error_str}")
+                last_error = error_str
+                if pieces:
+                    # Part of the answer is already out; another model would start over
+                    yield {"type": "error", "success": False, "error": error_str, "answer": "".join(pieces)}
+                    return
+                if is_transient(e):
+                    await asyncio.sleep(0.5)
+
+        yield {"type": "error", **self._all_failed(last_error)}
+
+    def _all_failed(self, last_error: str) -> Dict:
         return {
             "success": False,
-            "error": last_error,
+            "error": last_error or "Every model is out of rotation after repeated rate limits",
             "answer": f"All models are currently rate-limited. Please try again in a few minutes."
         }
     
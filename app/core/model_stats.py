@@ -0,0 +1,218 @@
+import asyncio
+from collections import deque
+from app.core.config import settings
+from typing import Deque, Dict, List
+import threading
+import time
+import httpx
+import openai
+
+# Circuit states
+CIRCUIT_CLOSED = "closed"  # Model is used normally
+CIRCUIT_OPEN = "open"  # Model is skipped until the cooldown ends
+CIRCUIT_HALF_OPEN = "half_open"  # One probe request decides whether to close or reopen
+
+
+def _percentile(sorted_values, fraction: float):
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)], 1)
+
+
+def is_transient(error: BaseException) -> bool:
+    """Rate limits and timeouts: the model may work again shortly"""
+    return (
+        isinstance(error, (
+            openai.RateLimitError,
+            openai.APITimeoutError,
+            httpx.TimeoutException,
+            asyncio.TimeoutError,
+            TimeoutError
+        ))
+        or getattr(error, "status_code", None) == 429
+    )
+
+
+class ModelStats:
+    """
+    Thread-safe per-model health: counters, recent latencies and a circuit breaker
+
+    A request ends in one of three ways: it answered first (a win), it
+    failed, or it was cancelled because another model answered first.
+    Latencies are kept for successful requests only, over the last
+    `window` of them, which is what the hedge delay should be tuned on.
+
+    After `failure_threshold` rate limits or timeouts in a row a model's
+    circuit opens and order() leaves it out. Once `cooldown` seconds
+    have passed the circuit goes half-open: the next request tries the
+    model first, and its outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, window: int = 200, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._outcomes: Dict[str, Deque[bool]] = {}
+        self._circuits: Dict[str, Dict] = {}
+        self.hedges_started = 0
+        self.hedge_wins = 0
+
+    def _model(self, model: str) -> Dict:
+        """Counters for a model; caller holds the lock"""
+        if model not in self._models:
+            self._models[model] = {"requests": 0, "wins": 0, "failures": 0, "cancelled": 0, "hedged": 0}
+            self._latencies[model] = deque(maxlen=self.window)
+            self._outcomes[model] = deque(maxlen=self.window)
+            self._circuits[model] = {
+                "state": CIRCUIT_CLOSED,
+                "consecutive_failures": 0,
+                "opened_at": None,
+                "probe_started": None,
+                "times_opened": 0
+            }
+        return self._models[model]
+
+    def _state(self, model: str, now: float) -> str:
+        """Current circuit state, moving open to half-open after the cooldown; caller holds the lock"""
+        circuit = self._circuits[model]
+        if circuit["state"] == CIRCUIT_OPEN and now - circuit["opened_at"] >= self.cooldown:
+            circuit["state"] = CIRCUIT_HALF_OPEN
+            circuit["probe_started"] = None
+        if circuit["state"] == CIRCUIT_HALF_OPEN and circuit["probe_started"] is not None:
+            # A probe that never reported back (e.g. its task was dropped) is given up on
+            if now - circuit["probe_started"] >= self.cooldown:
+                circuit["probe_started"] = None
+        return circuit["state"]
+
+    def _open(self, model: str, now: float):
+        """Open a model's circuit; caller holds the lock"""
+        circuit = self._circuits[model]
+        circuit["state"] = CIRCUIT_OPEN
+        circuit["opened_at"] = now
+        circuit["probe_started"] = None
+        circuit["times_opened"] += 1
+        print(f"⚠️ Circuit opened for model {model} for {self.cooldown:.0f}s")
+
+    def order(self, models: List[str]) -> List[str]:
+        """
+        Models to try, best first
+
+        One half-open model (due a probe) goes first. Closed models follow,
+        by recent error rate, then median latency, then the given order;
+        models without latency data yet come after measured ones with the
+        same error rate. Open models are left out.
+
+        Args:
+            models: Candidate models in preference order
+
+        Returns:
+            The models to try, possibly empty when every circuit is open
+        """
+        now = time.monotonic()
+        with self._lock:
+            probe, closed = [], []
+            for index, model in enumerate(models):
+                self._model(model)
+                state = self._state(model, now)
+                if state == CIRCUIT_CLOSED:
+                    outcomes = self._outcomes[model]
+                    error_rate = outcomes.count(False) / len(outcomes) if outcomes else 0.0
+                    latencies = sorted(self._latencies[model])
+                    median = latencies[len(latencies) // 2] if latencies else float("inf")
+                    closed.append((round(error_rate, 2), median, index, model))
+                elif state == CIRCUIT_HALF_OPEN and self._circuits[model]["probe_started"] is None:
+                    probe.append(model)
+            return probe[:1] + [entry[-1] for entry in sorted(closed)]
+
+    def record_start(self, model: str, hedge: bool = False):
+        """A request to the model was sent; hedge marks one raced against a slower model"""
+        now = time.monotonic()
+        with self._lock:
+            counters = self._model(model)
+            counters["requests"] += 1
+            if hedge:
+                counters["hedged"] += 1
+                self.hedges_started += 1
+            if self._state(model, now) == CIRCUIT_HALF_OPEN:
+                self._circuits[model]["probe_started"] = now
+
+    def record_win(self, model: str, latency_ms: float, hedge: bool = False):
+        """The model's answer was the one used"""
+        with self._lock:
+            self._model(model)["wins"] += 1
+            self._latencies[model].append(latency_ms)
+            self._outcomes[model].append(True)
+            if hedge:
+                self.hedge_wins += 1
+            circuit = self._circuits[model]
+            if circuit["state"] != CIRCUIT_CLOSED:
+                print(f"✅ Circuit closed for model {model}")
+            circuit.update(state=CIRCUIT_CLOSED, consecutive_failures=0, opened_at=None, probe_started=None)
+
+    def record_failure(self, model: str, error: BaseException = None):
+        """
+        The request failed
+
+        Rate limits and timeouts count towards opening the circuit; other
+        errors only count as failures. A failed probe reopens the circuit.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._model(model)["failures"] += 1
+            self._outcomes[model].append(False)
+            circuit = self._circuits[model]
+            if error is not None and not is_transient(error):
+                circuit["probe_started"] = None
+                return
+            circuit["consecutive_failures"] += 1
+            if circuit["state"] == CIRCUIT_HALF_OPEN or (
+                circuit["state"] == CIRCUIT_CLOSED and circuit["consecutive_failures"] >= self.failure_threshold
+            ):
+                self._open(model, now)
+
+    def record_cancelled(self, model: str):
+        """The request was abandoned because another model answered first"""
+        with self._lock:
+            self._model(model)["cancelled"] += 1
+            # An unfinished probe proved nothing; let the next request probe again
+            self._circuits[model]["probe_started"] = None
+
+    def get_stats(self) -> Dict:
+        """Counters, win rate, latency percentiles and circuit state per model"""
+        now = time.monotonic()
+        with self._lock:
+            models = {}
+            for model, counters in self._models.items():
+                latencies = sorted(self._latencies[model])
+                outcomes = self._outcomes[model]
+                circuit = self._circuits[model]
+                state = self._state(model, now)
+                models[model] = {
+                    **counters,
+                    "win_rate": round(counters["wins"] / counters["requests"], 3) if counters["requests"] else None,
+                    "recent_error_rate": round(outcomes.count(False) / len(outcomes), 3) if outcomes else None,
+                    "p50_ms": _percentile(latencies, 0.5),
+                    "p95_ms": _percentile(latencies, 0.95),
+                    "circuit": state,
+                    "consecutive_failures": circuit["consecutive_failures"],
+                    "times_opened": circuit["times_opened"],
+                    "retry_in_seconds": (
+                        round(self.cooldown - (now - circuit["opened_at"]), 1) if state == CIRCUIT_OPEN else None
+                    )
+                }
+            return {
+                "hedges_started": self.hedges_started,
+                "hedge_wins": self.hedge_wins,
+                "models": models
+            }
+
+
+# Global instance, shared by every OpenRouterClient in the process
+model_stats = ModelStats(
+    window=settings.LLM_STATS_WINDOW,
+    failure_threshold=settings.LLM_CIRCUIT_FAILURES,
+    cooldown=settings.LLM_CIRCUIT_COOLDOWN_SECONDS
+)
@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+import threading
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe least-recently-used cache with hit counters
+
+    A max_entries of 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value, or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry over the cap"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any):
+        """Insert and evict; caller holds the lock"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions
+            }
+
+
+class SearchResultCache(LRUCache):
+    """
+    Maps (normalized question, filters, n_results) to ranked chunk ids
+
+    Each entry remembers which documents it was scoped to (None for the
+    whole collection or a user's documents). Adding or deleting a document
+    drops the entries that document could change; every invalidation also
+    bumps a generation so a search that was running meanwhile cannot
+    store a stale result.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        super().__init__(max_entries)
+        self.generation = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(
+        question: str,
+        n_results: int,
+        doc_id: str = None,
+        doc_ids: List[str] = None,
+        user_id: str = None,
+        variant: Hashable = None
+    ) -> Tuple:
+        """
+        Cache key for a search
+
+        Questions differing only in case, spacing or trailing punctuation
+        share an entry. `variant` separates retrieval modes (e.g. hybrid).
+        """
+        normalized = " ".join(question.lower().split()).rstrip("?.! ")
+        return (normalized, n_results, doc_id, tuple(sorted(doc_ids)) if doc_ids else None, user_id, variant)
+
+    @staticmethod
+    def scope_of(doc_id: str = None, doc_ids: List[str] = None) -> Optional[FrozenSet[str]]:
+        """Documents a search can return, None meaning any document"""
+        if doc_ids:
+            return frozenset(doc_ids)
+        if doc_id:
+            return frozenset([doc_id])
+        return None
+
+    def put(self, key: Hashable, value: List[str], scope: Optional[FrozenSet[str]] = None, generation: int = None):
+        """
+        Store ranked chunk ids
+
+        Args:
+            key: From make_key
+            value: Ranked chunk ids
+            scope: From scope_of
+            generation: The generation read before searching; the result
+                        is discarded if an invalidation happened since
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._store(key, (scope, list(value)))
+
+    def get(self, key: Hashable) -> Optional[List[str]]:
+        """Cached ranked chunk ids, or None"""
+        entry = super().get(key)
+        return list(entry[1]) if entry is not None else None
+
+    def invalidate_document(self, doc_id: str) -> int:
+        """
+        Drop entries a document's addition or removal could change
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            self.generation += 1
+            stale = [
+                key for key, (scope, _) in self._entries.items()
+                if scope is None or doc_id in scope
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats["invalidations"] = self.invalidations
+        return stats
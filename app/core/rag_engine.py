@@ -1,8 +1,26 @@
-from app.database.vector_store import ChromaVectorStore
+from app.database.vector_store import create_vector_store
 from app.core.llm_client import OpenRouterClient
 from app.utils.pdf_processor import PDFProcessor
-from typing import Dict, List
+from app.utils.chunker import TextChunker
+from app.database.lexical_index import reciprocal_rank_fusion
+from app.core.answer_cache import create_answer_cache
+from app.core.reranker import ContextReranker
+from app.core.context_packer import ContextPacker, CONTEXT_SEPARATOR
+from app.core.config import settings
+from typing import AsyncIterator, Callable, Dict, List
+import asyncio
+import hashlib
 import os
+import time
+
+# Chunks the query path joined as the context before it was packed to a
+# budget; token savings are reported against this
+BASELINE_CHUNKS = 3
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
 
 class RAGEngine:
     """
@@ -11,130 +29,593 @@ class RAGEngine:
     """
     
     def __init__(self):
-        self.vector_store = ChromaVectorStore()
+        self.vector_store = create_vector_store()
         self.llm_client = OpenRouterClient()
         self.pdf_processor = PDFProcessor()
+        self.chunker = TextChunker(
+            chunk_size=settings.CHUNK_SIZE,
+            overlap=settings.CHUNK_OVERLAP,
+            unit=settings.CHUNK_UNIT
+        )
+        
+        self.reranker = ContextReranker(self.vector_store, lambda_mult=settings.MMR_LAMBDA)
+        self.context_packer = ContextPacker()
+        
+        # Answers are reused until they expire or a document they used changes
+        self.answer_cache = create_answer_cache()
+        if self.answer_cache is not None:
+            self.vector_store.change_listeners.append(self.answer_cache.invalidate_document)
     
-    def process_and_store_pdf(self, pdf_path: str, doc_id: str, metadata: Dict = None) -> Dict:
+    def process_and_store_pdf(
+        self,
+        pdf_path: str,
+        doc_id: str,
+        metadata: Dict = None,
+        progress_callback: Callable = None
+    ) -> Dict:
         """
         Process PDF and store in vector database
         
+        Pages are streamed into the chunker and chunks are embedded and
+        written in batches of INGEST_BATCH_SIZE, so memory stays bounded
+        by the batch size rather than the document size.
+        
         Args:
             pdf_path: Path to PDF file
             doc_id: Unique document identifier
             metadata: Additional metadata
+            progress_callback: Called with a stage name and progress fields (optional)
             
         Returns:
             Dictionary with processing results
         """
+        if progress_callback is None:
+            progress_callback = lambda status, **fields: None
+        
+        num_chunks = 0
         try:
-            # Extract text from PDF
-            extraction_result = self.pdf_processor.extract_text_from_pdf(pdf_path)
-            
-            if not extraction_result["success"]:
-                return extraction_result
+            progress_callback("extracting")
+            num_pages = self.pdf_processor.get_num_pages(pdf_path)
             
-            # Chunk the text
-            chunks = self.pdf_processor.chunk_text(
-                extraction_result["full_text"],
-                chunk_size=1000,
-                overlap=200
-            )
-            
-            # Add metadata
+            # Add metadata (doc_hash is only known once the stream ends)
             if metadata is None:
                 metadata = {}
             
             metadata.update({
-                "num_pages": extraction_result["num_pages"],
-                "doc_hash": extraction_result["doc_hash"],
+                "num_pages": num_pages,
                 "filename": os.path.basename(pdf_path)
             })
             
-            # Store in vector database
-            success = self.vector_store.add_documents(
-                chunks=chunks,
-                doc_id=doc_id,
-                metadata=metadata
+            # Stream pages -> chunks, hashing the text as it goes by
+            hasher = hashlib.md5()
+            pages = self.pdf_processor.iter_pages(
+                pdf_path,
+                max_workers=settings.PDF_EXTRACT_WORKERS,
+                parallel_threshold=settings.PDF_PARALLEL_PAGE_THRESHOLD
             )
+            chunks = self.chunker.iter_chunks(self.pdf_processor.hash_pages(pages, hasher))
             
-            if success:
-                return {
-                    "success": True,
-                    "doc_id": doc_id,
-                    "num_chunks": len(chunks),
-                    "num_pages": extraction_result["num_pages"],
-                    "message": f"Successfully processed and stored {len(chunks)} chunks"
-                }
-            else:
+            # Embed and store in bounded batches
+            batch = []
+            for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) >= settings.INGEST_BATCH_SIZE:
+                    self._store_batch(batch, doc_id, metadata, num_chunks)
+                    num_chunks += len(batch)
+                    batch = []
+                    progress_callback("embedding", num_pages=num_pages, num_chunks=num_chunks)
+            
+            if batch:
+                progress_callback("embedding", num_pages=num_pages, num_chunks=num_chunks)
+                self._store_batch(batch, doc_id, metadata, num_chunks)
+                num_chunks += len(batch)
+            
+            if num_chunks == 0:
                 return {
                     "success": False,
-                    "message": "Failed to store document in vector database"
+                    "message": "No text could be extracted from the PDF"
                 }
+            
+            return {
+                "success": True,
+                "doc_id": doc_id,
+                "num_chunks": num_chunks,
+                "num_pages": num_pages,
+                "doc_hash": hasher.hexdigest(),
+                "message": f"Successfully processed and stored {num_chunks} chunks"
+            }
                 
         except Exception as e:
+            # Don't leave a partially indexed document behind
+            if num_chunks:
+                self.vector_store.delete_document(doc_id)
             return {
                 "success": False,
                 "error": str(e),
                 "message": f"Error processing PDF: {str(e)}"
             }
     
-    def query(self, question: str, doc_id: str = None, n_results: int = 3) -> Dict:
+    def _store_batch(self, batch: List[Dict], doc_id: str, metadata: Dict, start_index: int):
+        """Write one batch of chunks, raising if the vector store rejects it"""
+        success = self.vector_store.add_documents(
+            chunks=[chunk["text"] for chunk in batch],
+            doc_id=doc_id,
+            metadata=metadata,
+            start_index=start_index,
+            chunk_metadatas=[
+                {
+                    "page_number": chunk["page_number"],
+                    "start_offset": chunk["start"],
+                    "end_offset": chunk["end"]
+                }
+                for chunk in batch
+            ]
+        )
+        if not success:
+            raise RuntimeError("Failed to store document in vector database")
+    
+    def query(
+        self,
+        question: str,
+        doc_id: str = None,
+        n_results: int = None,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> Dict:
         """
         Answer a question using RAG
         
         Args:
             question: User's question
             doc_id: Specific document to search (optional)
-            n_results: Number of chunks to retrieve
+            n_results: Most passages to put in the context (default QUERY_MAX_CHUNKS);
+                       the model's token budget decides how many fit
+            doc_ids: Documents to search (optional)
+            user_id: Only search this user's documents (optional)
             
         Returns:
             Dictionary with answer and metadata
         """
         try:
-            # Step 1: Retrieve relevant chunks from vector store
-            search_results = self.vector_store.search(question, n_results=n_results)
+            # Steps 1-2: Retrieve relevant chunks and pack them into the context
+            prepared = self._prepare_query(question, doc_id, n_results, doc_ids, user_id)
+            if "response" in prepared:
+                return prepared["response"]
             
-            if not search_results["success"]:
-                return {
-                    "success": False,
-                    "message": "Failed to search vector database"
-                }
+            # Step 3: Generate answer using LLM
+            llm_response = self.llm_client.generate_response(
+                query=question,
+                context=prepared["built"]["context"]
+            )
+            return self._finish_query(prepared, doc_id, llm_response)
+                
+        except Exception as e:
+            return self._query_error(e)
+    
+    async def aquery(
+        self,
+        question: str,
+        doc_id: str = None,
+        n_results: int = None,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> Dict:
+        """
+        Answer a question using RAG without blocking the event loop
+        
+        Retrieval and the answer cache run in a worker thread; the LLM
+        call is awaited on the shared async connection pool, so one
+        worker can have many questions waiting on OpenRouter at once.
+        
+        Args:
+            question: User's question
+            doc_id: Specific document to search (optional)
+            n_results: Most passages to put in the context (default QUERY_MAX_CHUNKS)
+            doc_ids: Documents to search (optional)
+            user_id: Only search this user's documents (optional)
             
-            # Extract the retrieved documents
-            retrieved_docs = search_results["results"]["documents"][0]
+        Returns:
+            Dictionary with answer and metadata, as query
+        """
+        try:
+            prepared = await asyncio.to_thread(
+                self._prepare_query, question, doc_id, n_results, doc_ids, user_id
+            )
+            if "response" in prepared:
+                return prepared["response"]
             
-            if not retrieved_docs:
-                return {
-                    "success": False,
-                    "answer": "No relevant information found in the documents.",
-                    "retrieved_chunks": []
+            llm_response = await self.llm_client.agenerate_response(
+                query=question,
+                context=prepared["built"]["context"]
+            )
+            return await asyncio.to_thread(self._finish_query, prepared, doc_id, llm_response)
+        
+        except Exception as e:
+            return self._query_error(e)
+    
+    async def astream_query(
+        self,
+        question: str,
+        doc_id: str = None,
+        n_results: int = None,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Answer a question, yielding retrieval results first and then answer tokens
+        
+        Args:
+            question: User's question
+            doc_id: Specific document to search (optional)
+            n_results: Most passages to put in the context (default QUERY_MAX_CHUNKS)
+            doc_ids: Documents to search (optional)
+            user_id: Only search this user's documents (optional)
+            
+        Yields:
+            {"type": "retrieval", "retrieved_chunks", "retrieval_ms", "context_report"},
+            then {"type": "token", "text"} events, then a final "done" event
+            carrying the same fields as query plus ttft_ms (request start to
+            first token), or an "error" event
+        """
+        started = time.perf_counter()
+        try:
+            prepared = await asyncio.to_thread(
+                self._prepare_query, question, doc_id, n_results, doc_ids, user_id
+            )
+            response = prepared.get("response")
+            if response is not None and not response.get("cached"):
+                yield {"type": "error", **response}
+                return
+            
+            if response is not None:
+                # Cached: the whole answer is the first token
+                yield {
+                    "type": "retrieval",
+                    "retrieved_chunks": response["retrieved_chunks"],
+                    "retrieval_ms": response["retrieval_ms"],
+                    "context_report": response["context_report"]
                 }
+                yield {"type": "token", "text": response["answer"]}
+                yield {"type": "done", **response, "ttft_ms": _elapsed_ms(started)}
+                return
             
-            # Step 2: Combine retrieved chunks into context
-            context = "\n\n---\n\n".join(retrieved_docs)
+            built = prepared["built"]
+            yield {
+                "type": "retrieval",
+                "retrieved_chunks": built["chunks"],
+                "retrieval_ms": built["timings"],
+                "context_report": built["report"]
+            }
             
-            # Step 3: Generate answer using LLM
-            llm_response = self.llm_client.generate_response(
-                query=question,
-                context=context
+            ttft_ms = None
+            async for event in self.llm_client.astream_response(question, built["context"]):
+                if event["type"] == "token":
+                    if ttft_ms is None:
+                        ttft_ms = _elapsed_ms(started)
+                    yield event
+                elif event["type"] == "done":
+                    result = await asyncio.to_thread(self._finish_query, prepared, doc_id, event)
+                    yield {"type": "done", **result, "ttft_ms": ttft_ms}
+                else:
+                    yield event
+        
+        except Exception as e:
+            yield {"type": "error", **self._query_error(e)}
+    
+    def _prepare_query(
+        self,
+        question: str,
+        doc_id: str,
+        n_results: int,
+        doc_ids: List[str],
+        user_id: str
+    ) -> Dict:
+        """
+        Everything before the LLM call: retrieval, packing and the answer cache
+        
+        Returns:
+            {"response": ...} when the question is answered without the LLM,
+            otherwise the built context and the answer cache key
+        """
+        built = self.build_context(
+            question,
+            n_results=n_results,
+            doc_id=doc_id,
+            doc_ids=doc_ids,
+            user_id=user_id
+        )
+        
+        if not built["success"]:
+            return {"response": {
+                "success": False,
+                "message": "Failed to search vector database"
+            }}
+        
+        retrieved_chunks = built["chunks"]
+        
+        if not retrieved_chunks:
+            return {"response": {
+                "success": False,
+                "answer": "No relevant information found in the documents.",
+                "retrieved_chunks": [],
+                "retrieval_ms": built["timings"]
+            }}
+        
+        # Same question over the same chunks: reuse the earlier answer
+        cache_key = None
+        if self.answer_cache is not None:
+            cache_key = self.answer_cache.make_key(
+                question,
+                doc_id,
+                [
+                    chunk_id
+                    for chunk in retrieved_chunks
+                    for chunk_id in chunk.get("merged_chunk_ids") or [chunk["chunk_id"]]
+                ],
+                self.llm_client.model
             )
-            
-            if llm_response["success"]:
-                return {
+            cached = self.answer_cache.get(cache_key)
+            if cached is not None:
+                return {"response": {
                     "success": True,
+                    "answer": cached["answer"],
+                    "retrieved_chunks": retrieved_chunks,
+                    "num_chunks_used": len(retrieved_chunks),
+                    "model": cached.get("model"),
+                    "tokens_used": cached.get("tokens_used"),
+                    "retrieval_ms": built["timings"],
+                    "context_report": built["report"],
+                    "cached": True
+                }}
+        
+        return {"built": built, "cache_key": cache_key}
+    
+    def _finish_query(self, prepared: Dict, doc_id: str, llm_response: Dict) -> Dict:
+        """Cache a generated answer and build the query result"""
+        if not llm_response["success"]:
+            return llm_response
+        
+        built = prepared["built"]
+        retrieved_chunks = built["chunks"]
+        if prepared["cache_key"] is not None:
+            self.answer_cache.put(
+                prepared["cache_key"],
+                {
                     "answer": llm_response["answer"],
-                    "retrieved_chunks": retrieved_docs,
-                    "num_chunks_used": len(retrieved_docs),
                     "model": llm_response["model"],
                     "tokens_used": llm_response.get("tokens_used")
+                },
+                doc_ids=[doc_id] + [chunk["doc_id"] for chunk in retrieved_chunks]
+            )
+        return {
+            "success": True,
+            "answer": llm_response["answer"],
+            "retrieved_chunks": retrieved_chunks,
+            "num_chunks_used": len(retrieved_chunks),
+            "model": llm_response["model"],
+            "tokens_used": llm_response.get("tokens_used"),
+            "retrieval_ms": built["timings"],
+            "context_report": built["report"],
+            "cached": False
+        }
+    
+    def _query_error(self, e: Exception) -> Dict:
+        return {
+            "success": False,
+            "error": str(e),
+            "answer": f"Error processing query: {str(e)}"
+        }
+    
+    def build_context(
+        self,
+        question: str,
+        n_results: int = None,
+        doc_id: str = None,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> Dict:
+        """
+        Retrieve chunks for a question and pack them into the context
+        
+        Args:
+            question: User's question
+            n_results: Most passages to consider (default QUERY_MAX_CHUNKS)
+            doc_id: Specific document to search (optional)
+            doc_ids: Documents to search (optional)
+            user_id: Only search this user's documents (optional)
+            
+        Returns:
+            Dictionary with the context string, the passages in it,
+            per-stage timings and a token report
+        """
+        n_results = n_results or settings.QUERY_MAX_CHUNKS
+        
+        # Step 1: Retrieve relevant chunks (vector + keyword search)
+        rerank = settings.RERANK_ENABLED
+        retrieval = self.retrieve(
+            question,
+            n_results=max(n_results, settings.RERANK_CANDIDATES) if rerank else n_results,
+            doc_id=doc_id,
+            doc_ids=doc_ids,
+            user_id=user_id
+        )
+        if not retrieval["success"]:
+            return retrieval
+        
+        # Merge overlapping chunks and drop near-duplicates
+        chunks = retrieval["chunks"]
+        report = {
+            # What the old fixed join of the top chunks would have cost
+            "baseline_tokens": self.context_packer.tokenizer.count(
+                CONTEXT_SEPARATOR.join(chunk["text"] for chunk in chunks[:BASELINE_CHUNKS])
+            )
+        }
+        if rerank and chunks:
+            started = time.perf_counter()
+            reranked = self.reranker.rerank(question, chunks, n_results)
+            chunks = reranked["passages"]
+            report.update(reranked["report"])
+            retrieval["timings"]["rerank"] = _elapsed_ms(started)
+        
+        # Step 2: Fill the context budget in relevance order; any model
+        # that may be tried has to fit it, not just the primary
+        started = time.perf_counter()
+        budget = self.context_budget(self.llm_client.models_to_try())
+        packed = self.context_packer.pack(chunks[:n_results], budget)
+        retrieval["timings"]["pack"] = _elapsed_ms(started)
+        report.update({
+            "budget": budget,
+            "context_tokens": packed["tokens"],
+            "tokens_saved": report["baseline_tokens"] - packed["tokens"],
+            "trimmed": int(packed["trimmed"])
+        })
+        
+        return {
+            "success": True,
+            "context": packed["context"],
+            "chunks": packed["passages"],
+            "timings": retrieval["timings"],
+            "report": report
+        }
+    
+    @staticmethod
+    def context_budget(models: List[str]) -> int:
+        """Context tokens allowed for the smallest budget among the models"""
+        return min(
+            (settings.CONTEXT_TOKEN_BUDGETS.get(model, settings.CONTEXT_TOKEN_BUDGET) for model in models),
+            default=settings.CONTEXT_TOKEN_BUDGET
+        )
+    
+    def retrieve(
+        self,
+        question: str,
+        n_results: int = 3,
+        doc_id: str = None,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> Dict:
+        """
+        Find the chunks most relevant to a question
+        
+        Vector and BM25 keyword candidates are merged with reciprocal-rank
+        fusion, so exact terms (clause numbers, part codes, names) are found
+        without asking the vector search for many more results.
+        
+        Args:
+            question: User's question
+            n_results: Number of chunks to return
+            doc_id: Specific document to search (optional)
+            doc_ids: Documents to search (optional)
+            user_id: Only search this user's documents (optional)
+            
+        Returns:
+            Dictionary with chunk references, per-stage timings in ms and
+            whether the ranking came from the search result cache
+        """
+        timings = {}
+        scope = {"doc_id": doc_id, "doc_ids": doc_ids, "user_id": user_id}
+        hybrid = settings.HYBRID_SEARCH_ENABLED
+        
+        # Repeated questions reuse the ranking; only the chunks are fetched again
+        cache = self.vector_store.result_cache
+        cache_key = cache.make_key(question, n_results, variant=hybrid, **scope)
+        started = time.perf_counter()
+        cached_ids = cache.get(cache_key)
+        if cached_ids is not None:
+            fetched = self.vector_store.get_chunks(cached_ids)
+            if fetched["success"]:
+                timings["cache"] = _elapsed_ms(started)
+                return {
+                    "success": True,
+                    "chunks": self._chunk_references(fetched["results"]),
+                    "timings": timings,
+                    "cached": True
                 }
-            else:
-                return llm_response
-                
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "answer": f"Error processing query: {str(e)}"
-            }
\ No newline at end of file
+        
+        generation = cache.generation
+        retrieval = self._search(question, n_results, scope, hybrid, timings)
+        if retrieval["success"]:
+            cache.put(
+                cache_key,
+                [chunk["chunk_id"] for chunk in retrieval["chunks"]],
+                scope=cache.scope_of(doc_id, doc_ids),
+                generation=generation
+            )
+        retrieval["cached"] = False
+        return retrieval
+    
+    def _search(self, question: str, n_results: int, scope: Dict, hybrid: bool, timings: Dict) -> Dict:
+        """Run vector (and keyword) search and fuse the rankings, recording timings"""
+        num_candidates = max(n_results, settings.HYBRID_CANDIDATES) if hybrid else n_results
+        
+        started = time.perf_counter()
+        vector_results = self.vector_store.search(question, n_results=num_candidates, **scope)
+        timings["vector"] = _elapsed_ms(started)
+        if not vector_results["success"]:
+            return {"success": False, "error": vector_results.get("error"), "timings": timings}
+        
+        vector_chunks = self._chunk_references(vector_results["results"])
+        if not hybrid:
+            return {"success": True, "chunks": vector_chunks[:n_results], "timings": timings}
+        
+        started = time.perf_counter()
+        lexical_results = self.vector_store.lexical_search(question, n_results=num_candidates, **scope)
+        timings["lexical"] = _elapsed_ms(started)
+        if not lexical_results["success"]:
+            # Keyword search is an enhancement; fall back to vector results
+            print(f"Lexical search failed: {lexical_results.get('error')}")
+            return {"success": True, "chunks": vector_chunks[:n_results], "timings": timings}
+        
+        started = time.perf_counter()
+        fused = reciprocal_rank_fusion(
+            [
+                [chunk["chunk_id"] for chunk in vector_chunks],
+                [chunk_id for chunk_id, _ in lexical_results["results"]]
+            ],
+            k=settings.RRF_K
+        )
+        top_ids = [chunk_id for chunk_id, _ in fused[:n_results]]
+        timings["fusion"] = _elapsed_ms(started)
+        
+        # Keyword-only hits still need their metadata and text
+        started = time.perf_counter()
+        chunks_by_id = {chunk["chunk_id"]: chunk for chunk in vector_chunks}
+        missing = [chunk_id for chunk_id in top_ids if chunk_id not in chunks_by_id]
+        if missing:
+            fetched = self.vector_store.get_chunks(missing)
+            if fetched["success"]:
+                for chunk in self._chunk_references(fetched["results"]):
+                    chunks_by_id[chunk["chunk_id"]] = chunk
+        timings["fetch"] = _elapsed_ms(started)
+        
+        return {
+            "success": True,
+            "chunks": [chunks_by_id[chunk_id] for chunk_id in top_ids if chunk_id in chunks_by_id],
+            "timings": timings
+        }
+    
+    @staticmethod
+    def _chunk_references(results: Dict) -> List[Dict]:
+        """
+        Turn vector search results into chunk references
+        
+        Each reference identifies the chunk (id, document, index, page and
+        character offsets) and carries its text for building the prompt.
+        """
+        references = []
+        for chunk_id, chunk_metadata, text in zip(
+            results["ids"][0],
+            results["metadatas"][0],
+            results["documents"][0]
+        ):
+            chunk_metadata = chunk_metadata or {}
+            references.append({
+                "chunk_id": chunk_id,
+                "doc_id": chunk_metadata.get("doc_id"),
+                "chunk_index": chunk_metadata.get("chunk_index"),
+                "page_number": chunk_metadata.get("page_number"),
+                "start_offset": chunk_metadata.get("start_offset"),
+                "end_offset": chunk_metadata.get("end_offset"),
+                "text": text or ""
+            })
+        return references
\ No newline at end of file
@@ -0,0 +1,138 @@
+from app.core.config import settings
+from typing import Dict, Optional
+import asyncio
+import math
+import threading
+import time
+
+
+class LocalRateLimitError(Exception):
+    """A model's request budget would not free up within the allowed wait"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that hands out waiting times instead of refusals
+
+    Each request reserves a token up front, even one not available yet,
+    so waiters queue in arrival order and the bucket can go negative.
+    The reservation is refused only when its wait would exceed max_wait.
+    """
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Reserve one token
+
+        Returns:
+            Seconds to wait before sending, or None when that would exceed max_wait
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def refund(self):
+        """Give back a reservation whose request was never sent"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def queued(self) -> int:
+        """Reservations still waiting for their token"""
+        with self._lock:
+            tokens = self._tokens + (time.monotonic() - self._updated) * self.rate
+            return math.ceil(max(0.0, -tokens))
+
+
+class ModelRateLimiter:
+    """
+    Client-side request budget per model
+
+    Requests wait their turn in the model's bucket, which spreads bursts
+    out before OpenRouter starts answering 429. A request that would wait
+    longer than max_wait raises LocalRateLimitError instead, so the caller
+    can move on to another model right away.
+    """
+
+    def __init__(self, per_minute: float, burst: int, max_wait: float, overrides: Dict[str, float] = None):
+        self.per_minute = per_minute
+        self.burst = burst
+        self.max_wait = max_wait
+        self.overrides = overrides or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.waited = 0
+        self.rejected = 0
+
+    def _bucket(self, model: str) -> Optional[TokenBucket]:
+        """The model's bucket, or None when it has no limit"""
+        per_minute = self.overrides.get(model, self.per_minute)
+        if per_minute <= 0:
+            return None
+        with self._lock:
+            if model not in self._buckets:
+                self._buckets[model] = TokenBucket(per_minute, self.burst)
+            return self._buckets[model]
+
+    def _reserve(self, model: str) -> float:
+        bucket = self._bucket(model)
+        if bucket is None:
+            return 0.0
+        wait = bucket.reserve(self.max_wait)
+        with self._lock:
+            if wait is None:
+                self.rejected += 1
+            elif wait > 0:
+                self.waited += 1
+        if wait is None:
+            raise LocalRateLimitError(f"Model {model} is over its local request budget")
+        return wait
+
+    def acquire(self, model: str):
+        """Block until the model may be called (sync callers)"""
+        wait = self._reserve(model)
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self, model: str):
+        """Wait until the model may be called, without blocking the event loop"""
+        wait = self._reserve(model)
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._bucket(model).refund()
+                raise
+
+    def get_stats(self) -> Dict:
+        """Limits, requests delayed or turned away, and current queue per model"""
+        with self._lock:
+            buckets = dict(self._buckets)
+            counters = {"waited": self.waited, "rejected": self.rejected}
+        return {
+            "per_minute": self.per_minute,
+            "burst": self.burst,
+            "max_wait_seconds": self.max_wait,
+            **counters,
+            "queued": {model: bucket.queued() for model, bucket in buckets.items()}
+        }
+
+
+# Global instance, shared by every OpenRouterClient in the process
+llm_rate_limiter = ModelRateLimiter(
+    per_minute=settings.LLM_RATE_LIMIT_PER_MINUTE,
+    burst=settings.LLM_RATE_LIMIT_BURST,
+    max_wait=settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS,
+    overrides=settings.LLM_RATE_LIMITS
+)
@@ -0,0 +1,201 @@
+from typing import Dict, List, Optional
+from app.utils.tokenizer import Tokenizer
+import numpy as np
+
+
+def merge_adjacent_chunks(chunks: List[Dict], max_chars: int = 4000) -> List[Dict]:
+    """
+    Merge retrieved chunks that overlap or touch within the same document
+
+    Chunk offsets point into the document's full text, so overlapping
+    chunks are joined without repeating the shared text. Chunks without
+    offsets (indexed before they were stored) are kept as they are.
+
+    Args:
+        chunks: Chunk references, best first
+        max_chars: Longest passage a merge may produce
+
+    Returns:
+        Passages in the order of their best chunk. Each passage is a chunk
+        reference spanning its chunks, with `merged_chunk_ids` set when it
+        covers more than one chunk.
+    """
+    by_document: Dict[str, List[int]] = {}
+    for position, chunk in enumerate(chunks):
+        if chunk.get("start_offset") is None or chunk.get("end_offset") is None:
+            continue
+        by_document.setdefault(chunk.get("doc_id"), []).append(position)
+
+    merged_into = {}
+    passages = {}
+    for positions in by_document.values():
+        positions.sort(key=lambda position: chunks[position]["start_offset"])
+        current = None
+        for position in positions:
+            chunk = chunks[position]
+            touches = (
+                current is not None
+                and (chunk["start_offset"] <= current["end_offset"]
+                     or chunk.get("chunk_index") == current["_last_index"] + 1)
+                and max(chunk["end_offset"], current["end_offset"]) - current["start_offset"] <= max_chars
+            )
+            if touches:
+                if chunk["end_offset"] > current["end_offset"]:
+                    # Append only the part past the current end (a gap is whitespace)
+                    skip = current["end_offset"] - chunk["start_offset"]
+                    tail = chunk["text"][skip:] if skip >= 0 else " " + chunk["text"]
+                    current["text"] += tail
+                    current["end_offset"] = chunk["end_offset"]
+                current["merged_chunk_ids"].append(chunk["chunk_id"])
+                current["_last_index"] = chunk.get("chunk_index")
+                current["_best"] = min(current["_best"], position)
+                merged_into[position] = current["_first"]
+            else:
+                current = dict(chunk)
+                current["merged_chunk_ids"] = [chunk["chunk_id"]]
+                current["_first"] = position
+                current["_last_index"] = chunk.get("chunk_index")
+                current["_best"] = position
+                passages[position] = current
+
+    result = []
+    for position, chunk in enumerate(chunks):
+        if position in merged_into:
+            continue
+        passage = passages.get(position)
+        if passage is None:
+            result.append((position, dict(chunk)))
+            continue
+        best = passage.pop("_best")
+        passage.pop("_first")
+        passage.pop("_last_index")
+        if len(passage["merged_chunk_ids"]) == 1:
+            passage.pop("merged_chunk_ids")
+        result.append((best, passage))
+
+    result.sort(key=lambda item: item[0])
+    return [passage for _, passage in result]
+
+
+def mmr_select(
+    query_vector: List[float],
+    passage_vectors: List[List[float]],
+    k: int,
+    lambda_mult: float = 0.7
+) -> List[int]:
+    """
+    Pick k passages by maximal marginal relevance
+
+    Each step takes the passage maximising
+    lambda * sim(query, passage) - (1 - lambda) * max sim(passage, picked),
+    so near-duplicates of what is already picked lose to fresh content.
+
+    Args:
+        query_vector: Query embedding
+        passage_vectors: One embedding per passage
+        k: Number of passages to pick
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+
+    Returns:
+        Indices of the picked passages, in pick order
+    """
+    if not passage_vectors:
+        return []
+    vectors = _normalize(np.asarray(passage_vectors, dtype=np.float32))
+    query = _normalize(np.asarray(query_vector, dtype=np.float32)[None, :])[0]
+    relevance = vectors @ query
+
+    picked = [int(np.argmax(relevance))]
+    redundancy = vectors @ vectors[picked[0]]
+    while len(picked) < min(k, len(vectors)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[picked] = -np.inf
+        choice = int(np.argmax(scores))
+        picked.append(choice)
+        redundancy = np.maximum(redundancy, vectors @ vectors[choice])
+    return picked
+
+
+def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class ContextReranker:
+    """
+    Post-retrieval stage: merge overlapping chunks, then diversify with MMR
+
+    Reports how many duplicate tokens merging removed; the context
+    packer then fits the passages into the model's token budget.
+    """
+
+    def __init__(self, vector_store, lambda_mult: float = 0.7, tokenizer: Tokenizer = None):
+        """
+        Args:
+            vector_store: Store providing embed_query and get_embeddings
+            lambda_mult: MMR relevance/diversity trade-off
+            tokenizer: Tokenizer for the duplicate token count (created if needed)
+        """
+        self.vector_store = vector_store
+        self.lambda_mult = lambda_mult
+        self.tokenizer = tokenizer or Tokenizer()
+
+    def rerank(self, question: str, candidates: List[Dict], n_results: int) -> Dict:
+        """
+        Order the candidate passages for the context
+
+        Args:
+            question: User's question
+            candidates: Retrieved chunk references, best first
+            n_results: Maximum number of passages to keep
+
+        Returns:
+            Dictionary with the passages, in MMR order, and a report
+        """
+        longest = max(len(chunk["text"]) for chunk in candidates) if candidates else 0
+        passages = merge_adjacent_chunks(candidates, max_chars=2 * longest)
+
+        vectors = self._passage_vectors(passages)
+        if vectors is None:
+            order = range(min(n_results, len(passages)))
+        else:
+            order = mmr_select(self.vector_store.embed_query(question), vectors, n_results, self.lambda_mult)
+        selected = [passages[i] for i in order]
+
+        return {
+            "passages": selected,
+            "report": {
+                "candidates": len(candidates),
+                "passages": len(passages),
+                "selected": len(selected),
+                "chunks_covered": sum(len(p.get("merged_chunk_ids") or [p["chunk_id"]]) for p in selected),
+                "duplicate_tokens_removed": self._duplicate_tokens(candidates, selected)
+            }
+        }
+
+    def _passage_vectors(self, passages: List[Dict]) -> Optional[List[List[float]]]:
+        """Mean embedding of each passage's chunks, or None if any are missing"""
+        chunk_ids = [
+            chunk_id
+            for passage in passages
+            for chunk_id in passage.get("merged_chunk_ids") or [passage["chunk_id"]]
+        ]
+        embeddings = self.vector_store.get_embeddings(chunk_ids)
+        vectors = []
+        for passage in passages:
+            members = [embeddings.get(chunk_id) for chunk_id in passage.get("merged_chunk_ids") or [passage["chunk_id"]]]
+            if any(member is None for member in members):
+                return None
+            vectors.append(np.mean(np.asarray(members, dtype=np.float32), axis=0))
+        return vectors
+
+    def _duplicate_tokens(self, candidates: List[Dict], selected: List[Dict]) -> int:
+        """Tokens the selected passages would repeat if their chunks were sent separately"""
+        by_id = {chunk["chunk_id"]: chunk for chunk in candidates}
+        removed = 0
+        for passage in selected:
+            members = passage.get("merged_chunk_ids")
+            if members:
+                separate = sum(self.tokenizer.count(by_id[chunk_id]["text"]) for chunk_id in members)
+                removed += separate - self.tokenizer.count(passage["text"])
+        return max(removed, 0)
@@ -0,0 +1,63 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+
+
+class SingleFlight:
+    """
+    Share one in-flight call between identical concurrent requests
+
+    The first caller for a key starts the call as its own task; callers
+    that arrive while it runs wait on that task instead of starting
+    another. The call is cancelled only when every caller waiting on it
+    has been cancelled. Finished calls are forgotten, so this is not a
+    cache: a request after the call ends starts a new one.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Dict] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, start: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Result of the in-flight call for key, starting it if there is none
+
+        Args:
+            key: Identifies identical requests
+            start: Starts the call (only used by the first caller)
+
+        Returns:
+            The call's result; its exception is raised to every caller
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = {"task": asyncio.ensure_future(start()), "waiters": 0}
+            self._calls[key] = call
+            call["task"].add_done_callback(lambda _: self._forget(key, call))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        call["waiters"] += 1
+        try:
+            # Shielded: one caller being cancelled must not cancel the others' call
+            return await asyncio.shield(call["task"])
+        finally:
+            call["waiters"] -= 1
+            if call["waiters"] == 0 and not call["task"].done():
+                self._forget(key, call)
+                call["task"].cancel()
+
+    def _forget(self, key: Hashable, call: Dict):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def get_stats(self) -> Dict:
+        """Upstream calls started, requests that joined one, and calls running now"""
+        requests = self.calls + self.coalesced
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / requests, 3) if requests else None,
+            "in_flight": len(self._calls)
+        }
@@ -0,0 +1,105 @@
+from typing import Callable, Dict, Optional, Tuple
+import threading
+
+
+class UploadHashIndex:
+    """
+    Maps a user's uploaded bytes (SHA-256) to the document created from them
+    
+    Entries are per user: queries are scoped by user_id, so another
+    user's copy of the same file is of no use to the uploader. Uploads
+    still being ingested are held here; stored ones are found through
+    the optional lookup, so a re-upload can be answered before any
+    parsing or embedding happens. Without a lookup, entries are kept
+    until released.
+    """
+
+    def __init__(self, lookup: Callable[[str, str], Optional[str]] = None):
+        """
+        Args:
+            lookup: Returns the doc_id stored for (user_id, file_hash), or None
+        """
+        self._entries: Dict[Tuple[str, str], Dict] = {}
+        self._keys_by_doc: Dict[str, Tuple[str, str]] = {}
+        self._stored = 0  # Entries handed over to the lookup so far
+        self._lock = threading.Lock()
+        self._lookup = lookup
+
+    def claim(self, user_id: str, file_hash: str, doc_id: str) -> Optional[Dict]:
+        """
+        Register a new upload unless the user already uploaded its content
+        
+        The lookup may query the database, so call this off the event loop.
+        It runs without the lock, so uploads don't wait on each other's
+        queries; the entries are checked again before registering.
+        
+        Args:
+            user_id: User uploading the file
+            file_hash: SHA-256 of the uploaded bytes
+            doc_id: ID the new document would get
+            
+        Returns:
+            The existing entry ({"doc_id", "job_id"}) for a duplicate,
+            or None if the upload was registered as new
+        """
+        key = (user_id, file_hash)
+        while True:
+            with self._lock:
+                existing = self._entries.get(key)
+                if existing is not None:
+                    return dict(existing)
+                if self._lookup is None:
+                    self._register(key, doc_id)
+                    return None
+                stored_before = self._stored
+            
+            stored_doc_id = self._lookup(user_id, file_hash)
+            if stored_doc_id:
+                return {"doc_id": stored_doc_id, "job_id": None}
+            
+            with self._lock:
+                existing = self._entries.get(key)
+                if existing is not None:
+                    return dict(existing)
+                # An upload stored during the lookup may be this content; look again
+                if self._stored == stored_before:
+                    self._register(key, doc_id)
+                    return None
+
+    def _register(self, key: Tuple[str, str], doc_id: str):
+        """Add an entry for a new upload (lock held)"""
+        self._entries[key] = {"doc_id": doc_id, "job_id": None}
+        self._keys_by_doc[doc_id] = key
+
+    def set_job(self, user_id: str, file_hash: str, job_id: str):
+        """Attach the ingestion job to a registered upload"""
+        with self._lock:
+            if (user_id, file_hash) in self._entries:
+                self._entries[(user_id, file_hash)]["job_id"] = job_id
+
+    def mark_stored(self, doc_id: str):
+        """
+        The document's row is committed: the lookup answers for it now,
+        so its entry is dropped (kept when there is no lookup)
+        """
+        if self._lookup is None:
+            return
+        with self._lock:
+            key = self._keys_by_doc.pop(doc_id, None)
+            if key is not None:
+                del self._entries[key]
+                self._stored += 1
+
+    def release(self, user_id: str, file_hash: str):
+        """Forget an upload, e.g. after its ingestion failed"""
+        with self._lock:
+            entry = self._entries.pop((user_id, file_hash), None)
+            if entry is not None:
+                self._keys_by_doc.pop(entry["doc_id"], None)
+
+    def release_document(self, doc_id: str):
+        """Forget the upload behind a document, e.g. after it was deleted"""
+        with self._lock:
+            key = self._keys_by_doc.pop(doc_id, None)
+            if key is not None:
+                del self._entries[key]
@@ -0,0 +1,171 @@
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import mmap
+import os
+import threading
+
+
+class ChunkTextStore:
+    """
+    Keeps chunk text once, on disk, one file pair per document
+
+    {doc_id}.txt holds the UTF-8 chunk texts back to back and {doc_id}.idx
+    holds a (byte offset, byte length) pair per chunk index. Reads go
+    through memory maps, so other stores only need to keep chunk ids.
+    """
+
+    def __init__(self, root_dir: str, max_open: int = 64):
+        self.root_dir = root_dir
+        self.max_open = max_open
+        os.makedirs(root_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # doc_id -> (file, mmap, index), least recently used first
+        self._open: "OrderedDict[str, Tuple]" = OrderedDict()
+
+    def _paths(self, doc_id: str) -> Tuple[str, str]:
+        # doc_id can come from a URL; never let it leave root_dir
+        if not doc_id or doc_id in (".", "..") or os.path.basename(doc_id) != doc_id:
+            raise ValueError(f"Invalid document id: {doc_id!r}")
+        base = os.path.join(self.root_dir, doc_id)
+        return base + ".txt", base + ".idx"
+
+    def append(self, doc_id: str, start_index: int, texts: List[str]):
+        """
+        Append a batch of chunks to a document
+
+        Args:
+            doc_id: Document identifier
+            start_index: Chunk index of the first text; 0 starts the document
+                         over, anything else must follow the stored chunks
+            texts: Chunk texts
+        """
+        text_path, index_path = self._paths(doc_id)
+        with self._lock:
+            self._close(doc_id)
+
+            if start_index == 0:
+                for path in (text_path, index_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+            stored = os.path.getsize(index_path) // 16 if os.path.exists(index_path) else 0
+            if start_index != stored:
+                raise ValueError(f"Chunk {start_index} of {doc_id} does not follow the {stored} stored chunks")
+
+            offset = os.path.getsize(text_path) if os.path.exists(text_path) else 0
+            index = array("Q")
+            with open(text_path, "ab") as text_file:
+                for text in texts:
+                    data = text.encode("utf-8")
+                    text_file.write(data)
+                    index.extend((offset, len(data)))
+                    offset += len(data)
+            with open(index_path, "ab") as index_file:
+                index.tofile(index_file)
+
+    def _get_open(self, doc_id: str) -> Optional[Tuple]:
+        """Open (or reuse) the memory map and index of a document; caller holds the lock"""
+        if doc_id in self._open:
+            self._open.move_to_end(doc_id)
+            return self._open[doc_id]
+
+        try:
+            text_path, index_path = self._paths(doc_id)
+        except ValueError:
+            return None
+        if not os.path.exists(index_path):
+            return None
+
+        index = array("Q")
+        with open(index_path, "rb") as index_file:
+            index.frombytes(index_file.read())
+
+        text_file = open(text_path, "rb")
+        if os.path.getsize(text_path):
+            text_map = mmap.mmap(text_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            text_map = b""
+
+        self._open[doc_id] = (text_file, text_map, index)
+        while len(self._open) > self.max_open:
+            self._close(next(iter(self._open)))
+        return self._open[doc_id]
+
+    def _close(self, doc_id: str):
+        """Release a document's memory map; caller holds the lock"""
+        entry = self._open.pop(doc_id, None)
+        if entry is not None:
+            text_file, text_map, _ = entry
+            if isinstance(text_map, mmap.mmap):
+                text_map.close()
+            text_file.close()
+
+    def get_many(self, refs: List[Tuple[str, int]]) -> List[Optional[str]]:
+        """
+        Read several chunks
+
+        Args:
+            refs: (doc_id, chunk_index) pairs
+
+        Returns:
+            Texts in the same order, None for unknown chunks
+        """
+        texts = []
+        with self._lock:
+            for doc_id, chunk_index in refs:
+                entry = self._get_open(doc_id)
+                if entry is None or not 0 <= chunk_index < len(entry[2]) // 2:
+                    texts.append(None)
+                    continue
+                _, text_map, index = entry
+                offset, length = index[2 * chunk_index], index[2 * chunk_index + 1]
+                texts.append(bytes(text_map[offset:offset + length]).decode("utf-8"))
+        return texts
+
+    def get(self, doc_id: str, chunk_index: int) -> Optional[str]:
+        """Read one chunk"""
+        return self.get_many([(doc_id, chunk_index)])[0]
+
+    def count(self, doc_id: str) -> int:
+        """Number of chunks stored for a document"""
+        try:
+            _, index_path = self._paths(doc_id)
+        except ValueError:
+            return 0
+        with self._lock:
+            if not os.path.exists(index_path):
+                return 0
+            return os.path.getsize(index_path) // 16
+
+    def delete(self, doc_id: str) -> int:
+        """
+        Remove a document's chunk text
+
+        Returns:
+            Number of bytes freed on disk
+        """
+        freed = 0
+        with self._lock:
+            self._close(doc_id)
+            for path in self._paths(doc_id):
+                if os.path.exists(path):
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+        return freed
+
+    def get_stats(self) -> Dict:
+        """Number of documents and bytes on disk"""
+        with self._lock:
+            files = [name for name in os.listdir(self.root_dir) if name.endswith(".idx")]
+            size = sum(
+                os.path.getsize(os.path.join(self.root_dir, name))
+                for name in os.listdir(self.root_dir)
+            )
+            return {"documents": len(files), "bytes": size, "open_maps": len(self._open)}
+
+
+def split_chunk_id(chunk_id: str) -> Tuple[str, int]:
+    """Split "{doc_id}_chunk_{index}" into (doc_id, index)"""
+    doc_id, _, index = chunk_id.rpartition("_chunk_")
+    return doc_id, int(index)
@@ -0,0 +1,268 @@
+from collections import Counter
+from typing import Dict, List, Tuple
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+
+# Words, keeping codes like "4.2.1", "AB-1234" or "EN/ISO" as single terms
+TERM_PATTERN = re.compile(r"\w+(?:[.\-/]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased index terms of a text"""
+    return [term.lower() for term in TERM_PATTERN.findall(text)]
+
+
+class BM25Index:
+    """
+    Incremental BM25 inverted index kept in SQLite
+
+    Postings (term, chunk, term frequency), per-chunk lengths and document
+    frequencies are updated as chunks are added or documents deleted, so
+    the index never needs a rebuild. Each chunk also records its doc_id
+    and user_id so searches can be scoped the same way as vector search.
+
+    Searches skip query terms that occur in most chunks (idf below
+    min_idf) and read at most max_postings postings per term, highest
+    term frequency first, so common words don't scan the whole index.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        k1: float = 1.5,
+        b: float = 0.75,
+        min_idf: float = 0.5,
+        max_postings: int = 5000
+    ):
+        """
+        Args:
+            path: SQLite file
+            k1: Term frequency saturation
+            b: Length normalisation
+            min_idf: Query terms with a lower idf are ignored, unless no
+                     query term reaches it (0 keeps every term)
+            max_postings: Postings read per query term (0 reads all)
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.min_idf = min_idf
+        self.max_postings = max_postings
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "chunk_id TEXT PRIMARY KEY, doc_id TEXT NOT NULL, user_id TEXT, length INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_chunks_doc_id ON chunks (doc_id);"
+            "CREATE INDEX IF NOT EXISTS idx_chunks_user_id ON chunks (user_id);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term TEXT NOT NULL, chunk_id TEXT NOT NULL, tf INTEGER NOT NULL, "
+            "PRIMARY KEY (term, chunk_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS idx_postings_chunk_id ON postings (chunk_id);"
+            "CREATE INDEX IF NOT EXISTS idx_postings_term_tf ON postings (term, tf DESC);"
+            "CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;"
+        )
+        self._conn.commit()
+        self._num_chunks, self._total_length = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks"
+        ).fetchone()
+
+    def add(self, chunk_ids: List[str], texts: List[str], doc_id: str, user_id: str = None):
+        """
+        Index chunks of one document
+
+        Chunks that are already indexed are replaced.
+
+        Args:
+            chunk_ids: Chunk identifiers
+            texts: Chunk texts, same order as chunk_ids
+            doc_id: Document the chunks belong to
+            user_id: Owner of the document (optional)
+        """
+        chunk_rows = []
+        postings = []
+        df = Counter()
+        for chunk_id, text in zip(chunk_ids, texts):
+            terms = Counter(tokenize(text))
+            chunk_rows.append((chunk_id, doc_id, user_id, sum(terms.values())))
+            postings.extend((term, chunk_id, tf) for term, tf in terms.items())
+            df.update(terms.keys())
+
+        with self._lock:
+            self._remove_chunks(list(chunk_ids))
+            self._conn.executemany(
+                "INSERT INTO chunks (chunk_id, doc_id, user_id, length) VALUES (?, ?, ?, ?)",
+                chunk_rows
+            )
+            self._conn.executemany("INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)", postings)
+            self._conn.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, ?) "
+                "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                df.items()
+            )
+            self._conn.commit()
+            self._num_chunks += len(chunk_rows)
+            self._total_length += sum(row[3] for row in chunk_rows)
+
+    def delete_document(self, doc_id: str) -> int:
+        """
+        Remove all chunks of a document
+
+        Returns:
+            Number of chunks removed
+        """
+        with self._lock:
+            chunk_ids = [row[0] for row in self._conn.execute(
+                "SELECT chunk_id FROM chunks WHERE doc_id = ?", (doc_id,)
+            )]
+            removed = self._remove_chunks(chunk_ids)
+            self._conn.commit()
+            return removed
+
+    def _remove_chunks(self, chunk_ids: List[str]) -> int:
+        """Drop chunks with their postings; caller holds the lock and commits"""
+        removed = 0
+        # Stay below SQLite's bound-parameter limit
+        for i in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            stats = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks WHERE chunk_id IN ({placeholders})",
+                batch
+            ).fetchone()
+            if not stats[0]:
+                continue
+
+            df = self._conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE chunk_id IN ({placeholders}) GROUP BY term",
+                batch
+            ).fetchall()
+            self._conn.executemany("UPDATE terms SET df = df - ? WHERE term = ?", [(n, t) for t, n in df])
+            self._conn.execute("DELETE FROM terms WHERE df <= 0")
+            self._conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({placeholders})", batch)
+            self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
+
+            removed += stats[0]
+            self._num_chunks -= stats[0]
+            self._total_length -= stats[1]
+        return removed
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 10,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank chunks by BM25 score
+
+        Args:
+            query: Search query
+            n_results: Number of results to return
+            doc_ids: Only search these documents (optional)
+            user_id: Only search this user's documents (optional)
+
+        Returns:
+            (chunk_id, score) pairs, best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        scope = ""
+        scope_params = []
+        if doc_ids:
+            scope += f" AND c.doc_id IN ({','.join('?' * len(doc_ids))})"
+            scope_params.extend(doc_ids)
+        if user_id:
+            scope += " AND c.user_id = ?"
+            scope_params.append(user_id)
+
+        scores = Counter()
+        with self._lock:
+            if not self._num_chunks:
+                return []
+            average_length = self._total_length / self._num_chunks
+            placeholders = ",".join("?" * len(terms))
+            dfs = self._conn.execute(
+                f"SELECT term, df FROM terms WHERE term IN ({placeholders})", terms
+            ).fetchall()
+
+            idfs = self._idfs(dfs)
+            limit = f" ORDER BY p.tf DESC LIMIT {int(self.max_postings)}" if self.max_postings else ""
+            for term, idf in idfs:
+                rows = self._conn.execute(
+                    "SELECT p.chunk_id, p.tf, c.length FROM postings p "
+                    "JOIN chunks c ON c.chunk_id = p.chunk_id "
+                    f"WHERE p.term = ?{scope}{limit}",
+                    [term] + scope_params
+                )
+                for chunk_id, tf, length in rows:
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+
+    def _idfs(self, dfs: List[Tuple[str, int]]) -> List[Tuple[str, float]]:
+        """
+        (term, idf) of the query terms worth scoring
+
+        Terms found in most chunks barely change the ranking but have the
+        longest posting lists. If every term is that common, the rarest
+        one is kept so the query still matches something.
+        """
+        idfs = [
+            (term, math.log(1 + (self._num_chunks - df + 0.5) / (df + 0.5)))
+            for term, df in dfs
+        ]
+        selective = [(term, idf) for term, idf in idfs if idf >= self.min_idf]
+        if selective or not idfs:
+            return selective
+        return [max(idfs, key=lambda item: item[1])]
+
+    def get_stats(self) -> Dict:
+        """Indexed chunks and vocabulary size"""
+        with self._lock:
+            vocabulary = self._conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+            return {
+                "chunks": self._num_chunks,
+                "terms": vocabulary,
+                "average_length": round(self._total_length / self._num_chunks, 1) if self._num_chunks else None
+            }
+
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Merge ranked lists of ids with reciprocal-rank fusion
+
+    Each id scores sum(1 / (k + rank)) over the lists it appears in, so
+    items ranked well by either retriever rise without comparing raw
+    scores across retrievers.
+
+    Args:
+        rankings: Lists of ids, best first
+        k: Damping constant; larger values flatten the rank weights
+
+    Returns:
+        (id, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -83,6 +83,28 @@ class MongoDB:
             print(f"Error getting document queries: {e}")
             return []
     
+    def delete_document_queries(self, doc_id: str) -> int:
+        """
+        Delete all queries related to a document
+        
+        Matches queries asked about this document alone (doc_id) and
+        queries over several documents that include it (doc_ids).
+        
+        Args:
+            doc_id: Document identifier
+            
+        Returns:
+            Number of deleted queries
+        """
+        try:
+            result = self.queries.delete_many(
+                {"$or": [{"doc_id": doc_id}, {"doc_ids": doc_id}]}
+            )
+            return result.deleted_count
+        except Exception as e:
+            print(f"Error deleting document queries: {e}")
+            return 0
+    
     def get_conversation_history(
         self, 
         user_id: str, 
@@ -0,0 +1,169 @@
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from typing import Dict, List
+from app.core.config import settings
+from app.core.embeddings import EmbeddingProvider
+from app.database.postgres import PostgresDB, postgres_db
+from app.database.vector_store import VectorStore
+from app.models.chunk import DocumentChunk
+import time
+
+# pgvector operator class for each HNSW_SPACE
+OPERATOR_CLASSES = {"l2": "vector_l2_ops", "cosine": "vector_cosine_ops", "ip": "vector_ip_ops"}
+
+class PgVectorStore(VectorStore):
+    """
+    Vector storage in PostgreSQL with pgvector
+
+    Chunk embeddings and metadata go in the document_chunks table next to
+    documents, with an HNSW or IVFFlat index on the embedding. A filtered
+    search is one SQL query: the doc_id/user_id conditions and the
+    distance ordering run together and the planner picks the btree or
+    vector index. Distances are reported on ChromaDB's scale, so results
+    from either store look the same.
+    """
+
+    backend = "pgvector"
+
+    def __init__(self, embedding_provider: EmbeddingProvider = None, db: PostgresDB = None):
+        started = time.perf_counter()
+        super().__init__(embedding_provider)
+        self.db = db or postgres_db
+        self.space = settings.HNSW_SPACE
+        self._create_schema()
+
+        self.startup = {
+            "client": "pgvector",
+            "restored_snapshot": False,
+            "open_ms": round((time.perf_counter() - started) * 1000, 2),
+            "warmup_ms": None,
+            "chunks": self.count()
+        }
+        print(f"✅ Vector store ready (pgvector): {self.startup['chunks']} chunks, "
+              f"opened in {self.startup['open_ms']} ms")
+
+    def _create_schema(self):
+        """Create the extension, the chunks table and its vector index if missing"""
+        with self.db.engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        DocumentChunk.__table__.create(bind=self.db.engine, checkfirst=True)
+
+        operator_class = OPERATOR_CLASSES[self.space]
+        # The index name carries the type and space, so changing either builds a new one
+        name = f"idx_document_chunks_{settings.PGVECTOR_INDEX}_{self.space}"
+        if settings.PGVECTOR_INDEX == "ivfflat":
+            options = f"lists = {int(settings.PGVECTOR_IVFFLAT_LISTS)}"
+        else:
+            options = f"m = {int(settings.HNSW_M)}, ef_construction = {int(settings.HNSW_CONSTRUCTION_EF)}"
+        with self.db.engine.begin() as connection:
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {DocumentChunk.__tablename__} "
+                f"USING {settings.PGVECTOR_INDEX} (embedding {operator_class}) WITH ({options})"
+            ))
+
+    def _tune(self, session):
+        """Per-transaction search settings for the vector index"""
+        if settings.PGVECTOR_INDEX == "ivfflat":
+            session.execute(text(f"SET LOCAL ivfflat.probes = {int(settings.PGVECTOR_IVFFLAT_PROBES)}"))
+        else:
+            session.execute(text(f"SET LOCAL hnsw.ef_search = {int(settings.HNSW_SEARCH_EF)}"))
+        if settings.PGVECTOR_ITERATIVE_SCAN in ("strict_order", "relaxed_order"):
+            # Without this a filtered query can return fewer rows than asked for
+            session.execute(text(
+                f"SET LOCAL {settings.PGVECTOR_INDEX}.iterative_scan = {settings.PGVECTOR_ITERATIVE_SCAN}"
+            ))
+
+    def _order_by(self, query_embedding: List[float]):
+        """Distance expression the vector index can serve"""
+        column = DocumentChunk.embedding
+        if self.space == "cosine":
+            return column.cosine_distance(query_embedding)
+        if self.space == "ip":
+            return column.max_inner_product(query_embedding)
+        return column.l2_distance(query_embedding)
+
+    def _reported_distance(self, distance: float) -> float:
+        """pgvector distance on ChromaDB's scale (squared L2, 1 - inner product)"""
+        if self.space == "ip":
+            return 1.0 + distance  # <#> is the negated inner product
+        if self.space == "l2":
+            return distance * distance
+        return distance
+
+    def _write_vectors(self, ids: List[str], embeddings: List[List[float]], metadatas: List[Dict]):
+        rows = [
+            {
+                "chunk_id": chunk_id,
+                "doc_id": metadata["doc_id"],
+                "user_id": metadata.get("user_id"),
+                "chunk_index": metadata["chunk_index"],
+                "embedding": embedding,
+                "chunk_metadata": metadata
+            }
+            for chunk_id, embedding, metadata in zip(ids, embeddings, metadatas)
+        ]
+        statement = insert(DocumentChunk)
+        # Re-ingesting a document overwrites its chunks, like a Chroma upsert
+        statement = statement.on_conflict_do_update(
+            index_elements=[DocumentChunk.chunk_id],
+            set_={column: statement.excluded[column]
+                  for column in ("doc_id", "user_id", "chunk_index", "embedding", "chunk_metadata")}
+        )
+        with self.db.get_session() as session:
+            session.execute(statement, rows)
+
+    def _query(
+        self,
+        query_embedding: List[float],
+        n_results: int,
+        doc_id: str = None,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> Dict:
+        distance = self._order_by(query_embedding)
+        statement = select(DocumentChunk.chunk_id, DocumentChunk.chunk_metadata, distance.label("distance"))
+        scope = self._scope(doc_id, doc_ids)
+        if scope is not None:
+            statement = statement.where(DocumentChunk.doc_id.in_(scope))
+        if user_id:
+            statement = statement.where(DocumentChunk.user_id == user_id)
+        statement = statement.order_by(distance).limit(n_results)
+
+        with self.db.get_session() as session:
+            self._tune(session)
+            rows = session.execute(statement).all()
+        # relaxed_order scans may return rows slightly out of order
+        rows.sort(key=lambda row: row.distance)
+
+        return {
+            "ids": [[row.chunk_id for row in rows]],
+            "metadatas": [[row.chunk_metadata for row in rows]],
+            "distances": [[self._reported_distance(row.distance) for row in rows]],
+            "documents": None
+        }
+
+    def _get_metadatas(self, chunk_ids: List[str]) -> Dict[str, Dict]:
+        with self.db.get_session() as session:
+            rows = session.execute(
+                select(DocumentChunk.chunk_id, DocumentChunk.chunk_metadata)
+                .where(DocumentChunk.chunk_id.in_(chunk_ids))
+            ).all()
+        return {row.chunk_id: row.chunk_metadata for row in rows}
+
+    def get_embeddings(self, chunk_ids: List[str]) -> Dict[str, List[float]]:
+        if not chunk_ids:
+            return {}
+        with self.db.get_session() as session:
+            rows = session.execute(
+                select(DocumentChunk.chunk_id, DocumentChunk.embedding)
+                .where(DocumentChunk.chunk_id.in_(list(dict.fromkeys(chunk_ids))))
+            ).all()
+        return {row.chunk_id: [float(value) for value in row.embedding] for row in rows}
+
+    def count(self) -> int:
+        with self.db.get_session() as session:
+            return session.execute(select(func.count()).select_from(DocumentChunk)).scalar_one()
+
+    def _delete_vectors(self, doc_id: str):
+        with self.db.get_session() as session:
+            session.execute(delete(DocumentChunk).where(DocumentChunk.doc_id == doc_id))
@@ -1,8 +1,9 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
-from app.models.document import Base
+from app.models.document import Base, Document
 from contextlib import contextmanager
+from typing import List, Optional
 
 class PostgresDB:
     """PostgreSQL database manager"""
@@ -29,5 +30,34 @@ class PostgresDB:
         finally:
             session.close()
 
+    def add_all(self, objects: List) -> None:
+        """
+        Insert many rows in a single transaction
+        
+        Args:
+            objects: Mapped objects to insert
+        """
+        with self.get_session() as session:
+            session.add_all(objects)
+    
+    def find_document_id_by_hash(self, user_id: str, file_hash: str) -> Optional[str]:
+        """
+        Look up the document a user created from a file
+        
+        Args:
+            user_id: User who uploaded the file
+            file_hash: SHA-256 of the uploaded bytes
+            
+        Returns:
+            Document ID, or None if unknown
+        """
+        with self.get_session() as session:
+            row = (
+                session.query(Document.id)
+                .filter(Document.user_id == user_id, Document.file_hash == file_hash)
+                .first()
+            )
+            return row[0] if row else None
+
 # Global instance
 postgres_db = PostgresDB()
\ No newline at end of file
@@ -0,0 +1,186 @@
+from typing import Callable, Dict, List, Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Collection every chunk lives in when sharding is off, and the home of
+# documents without a user_id (or indexed before sharding) when it is on
+DEFAULT_COLLECTION = "documents"
+
+SHARDING_MODES = ("none", "user", "hash")
+
+
+def shard_name(user_id: Optional[str], mode: str, num_buckets: int = 16) -> str:
+    """
+    Collection a user's chunks belong in
+
+    Args:
+        user_id: Document owner (None for unowned documents)
+        mode: "none", "user" (a collection per user) or "hash" (num_buckets collections)
+        num_buckets: Number of hash buckets
+
+    Returns:
+        Chroma collection name
+    """
+    if mode not in SHARDING_MODES:
+        raise ValueError(f"Unknown sharding mode: {mode}")
+    if mode == "none" or not user_id:
+        return DEFAULT_COLLECTION
+    # Hashed so any user_id gives a valid, fixed-length collection name
+    digest = hashlib.sha256(user_id.encode()).hexdigest()
+    if mode == "user":
+        return f"user_{digest[:24]}"
+    return f"shard_{int(digest[:8], 16) % num_buckets:04d}"
+
+
+class ShardMap:
+    """
+    Persistent doc_id -> collection map
+
+    Lookups by chunk id or doc_id (fetching text, deleting a document)
+    do not know the owner, so the shard each document was written to is
+    recorded here. Documents without an entry are in DEFAULT_COLLECTION.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents (doc_id TEXT PRIMARY KEY, shard TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def assign(self, assignments: Dict[str, str]):
+        """Record the shard of each doc_id"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (doc_id, shard) VALUES (?, ?)",
+                list(assignments.items())
+            )
+            self._conn.commit()
+
+    def lookup(self, doc_ids: List[str]) -> Dict[str, str]:
+        """Shard of each doc_id, DEFAULT_COLLECTION when unknown"""
+        found = {}
+        unique = list(dict.fromkeys(doc_ids))
+        with self._lock:
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT doc_id, shard FROM documents WHERE doc_id IN ({placeholders})", batch
+                ).fetchall())
+        return {doc_id: found.get(doc_id, DEFAULT_COLLECTION) for doc_id in unique}
+
+    def forget(self, doc_id: str):
+        """Drop a deleted document's entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            self._conn.commit()
+
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class ShardPool:
+    """
+    Lazily opened collection handles, dropped again when idle
+
+    A shard's collection is created on its first write and opened on
+    first use; handles not used for idle_seconds are released, and at
+    most max_open stay open (least recently used go first).
+    """
+
+    def __init__(
+        self,
+        open_collection: Callable[[str, bool], Optional[object]],
+        idle_seconds: float = 600,
+        max_open: int = 256
+    ):
+        """
+        Args:
+            open_collection: Called with (name, create); returns the
+                             collection, or None if it does not exist and
+                             create is False
+            idle_seconds: Release handles unused for this long
+            max_open: Most handles kept open at once
+        """
+        self.open_collection = open_collection
+        self.idle_seconds = idle_seconds
+        self.max_open = max_open
+        self._open: Dict[str, List] = {}  # name -> [collection, last_used]
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.opened = 0
+        self.evicted = 0
+
+    def get(self, name: str, create: bool = False):
+        """
+        Collection handle for a shard
+
+        Returns:
+            The collection, or None if it does not exist and create is False
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Idle handles are swept as a side effect of use, a few times per idle period
+            if now - self._last_sweep > self.idle_seconds / 4:
+                self._last_sweep = now
+                self._evict(now, keep=name)
+            entry = self._open.get(name)
+            if entry is not None:
+                entry[1] = now
+                return entry[0]
+
+        collection = self.open_collection(name, create)
+        if collection is None:
+            return None
+
+        with self._lock:
+            entry = self._open.setdefault(name, [collection, now])
+            entry[1] = now
+            self.opened += 1
+            self._evict(now, keep=name)
+            return entry[0]
+
+    def evict_idle(self) -> int:
+        """
+        Release handles idle for longer than idle_seconds
+
+        Returns:
+            Number of handles released
+        """
+        with self._lock:
+            return self._evict(time.monotonic())
+
+    def _evict(self, now: float, keep: str = None) -> int:
+        """Drop idle handles, then the least recently used over max_open; caller holds the lock"""
+        stale = [name for name, (_, last_used) in self._open.items()
+                 if name != keep and now - last_used > self.idle_seconds]
+        by_age = sorted((last_used, name) for name, (_, last_used) in self._open.items()
+                        if name != keep and name not in stale)
+        stale.extend(name for _, name in by_age[:max(len(self._open) - len(stale) - self.max_open, 0)])
+        for name in stale:
+            del self._open[name]
+        self.evicted += len(stale)
+        return len(stale)
+
+    def get_stats(self) -> Dict:
+        """Open handle counts"""
+        with self._lock:
+            return {
+                "open": len(self._open),
+                "max_open": self.max_open,
+                "idle_seconds": self.idle_seconds,
+                "opened": self.opened,
+                "evicted": self.evicted
+            }
@@ -0,0 +1,141 @@
+from datetime import datetime
+from typing import Dict
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+
+# Directories inside a snapshot archive
+CHROMA_MEMBER = "chroma"
+CHUNK_STORE_MEMBER = "chunk_store"
+MANIFEST_MEMBER = "manifest.json"
+
+
+def _add_directory(archive: tarfile.TarFile, directory: str, member: str) -> int:
+    """
+    Add a directory to the archive, copying SQLite files through the backup API
+
+    A plain copy of a live SQLite file can miss pages still in its WAL;
+    the backup API gives a consistent image.
+
+    Returns:
+        Bytes added
+    """
+    total = 0
+    with tempfile.TemporaryDirectory() as scratch:
+        for root, _, names in os.walk(directory):
+            for name in sorted(names):
+                if name.endswith(("-wal", "-shm", "-journal")):
+                    continue
+                path = os.path.join(root, name)
+                arcname = os.path.join(member, os.path.relpath(path, directory))
+                if name.endswith((".sqlite3", ".db")):
+                    copy = os.path.join(scratch, "copy.sqlite3")
+                    source = sqlite3.connect(path)
+                    target = sqlite3.connect(copy)
+                    with target:
+                        source.backup(target)
+                    source.close()
+                    target.close()
+                    path = copy
+                archive.add(path, arcname=arcname)
+                total += os.path.getsize(path)
+                if path.startswith(scratch):
+                    os.remove(path)
+    return total
+
+
+def create_snapshot(snapshot_path: str, chroma_dir: str, chunk_store_dir: str, manifest: Dict = None) -> Dict:
+    """
+    Write the vector index, keyword index, shard map and chunk text to one archive
+
+    Take snapshots while no ingestion is running; searches are fine.
+
+    Args:
+        snapshot_path: Archive to write (.tar.gz)
+        chroma_dir: CHROMA_PERSIST_DIR
+        chunk_store_dir: CHUNK_STORE_DIR
+        manifest: Extra fields recorded in the archive (e.g. chunk counts, settings)
+
+    Returns:
+        Dictionary with the archive path and sizes
+    """
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(directory, exist_ok=True)
+
+    # Written next to the target and renamed, so a failed run leaves no partial archive
+    partial = snapshot_path + ".partial"
+    with tarfile.open(partial, "w:gz") as archive:
+        data_bytes = _add_directory(archive, chroma_dir, CHROMA_MEMBER)
+        data_bytes += _add_directory(archive, chunk_store_dir, CHUNK_STORE_MEMBER)
+
+        details = dict(manifest or {})
+        details.update({
+            "created_at": datetime.utcnow().isoformat(),
+            "data_bytes": data_bytes
+        })
+        encoded = json.dumps(details, indent=2).encode()
+        info = tarfile.TarInfo(MANIFEST_MEMBER)
+        info.size = len(encoded)
+        archive.addfile(info, io.BytesIO(encoded))
+    os.replace(partial, snapshot_path)
+
+    return {
+        "path": snapshot_path,
+        "data_bytes": data_bytes,
+        "archive_bytes": os.path.getsize(snapshot_path),
+        "manifest": details
+    }
+
+
+def read_manifest(snapshot_path: str) -> Dict:
+    """Manifest stored in a snapshot archive"""
+    with tarfile.open(snapshot_path, "r:gz") as archive:
+        return json.load(archive.extractfile(MANIFEST_MEMBER))
+
+
+def restore_snapshot(snapshot_path: str, chroma_dir: str, chunk_store_dir: str, force: bool = False) -> Dict:
+    """
+    Unpack a snapshot into the data directories
+
+    The archive is extracted next to the targets before anything is
+    replaced, so an unreadable archive leaves the current data alone.
+
+    Args:
+        snapshot_path: Archive written by create_snapshot
+        chroma_dir: CHROMA_PERSIST_DIR to fill
+        chunk_store_dir: CHUNK_STORE_DIR to fill
+        force: Replace directories that already hold data
+
+    Returns:
+        The snapshot's manifest
+
+    Raises:
+        FileExistsError: If a target holds data and force is False
+    """
+    targets = {CHROMA_MEMBER: chroma_dir, CHUNK_STORE_MEMBER: chunk_store_dir}
+    for target in targets.values():
+        if not force and os.path.isdir(target) and os.listdir(target):
+            raise FileExistsError(f"{target} is not empty; restore with force to replace it")
+
+    parent = os.path.dirname(os.path.abspath(chroma_dir))
+    os.makedirs(parent, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=parent, prefix=".restore_") as staging:
+        with tarfile.open(snapshot_path, "r:gz") as archive:
+            # The "data" filter rejects absolute paths, links out of the tree and device files
+            archive.extractall(staging, filter="data")
+
+        for member, target in targets.items():
+            extracted = os.path.join(staging, member)
+            if not os.path.isdir(extracted):
+                os.makedirs(extracted)
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            shutil.move(extracted, target)
+
+        with open(os.path.join(staging, MANIFEST_MEMBER)) as manifest_file:
+            return json.load(manifest_file)
@@ -1,82 +1,329 @@
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-from typing import List, Dict
+from abc import ABC, abstractmethod
+from chromadb.api import ServerAPI
+from chromadb.api.client import Client as ChromaClient
+from chromadb.config import Settings as ChromaSettings, System
+from chromadb.errors import NotFoundError
+from typing import Callable, List, Dict, Optional
 from app.core.config import settings
+from app.core.embeddings import EmbeddingProvider, create_embedding_provider
+from app.core.embedding_cache import EmbeddingCache, CachedEmbeddingProvider
+from app.core.query_cache import LRUCache, SearchResultCache
+from app.database.chunk_store import ChunkTextStore, split_chunk_id
+from app.database.lexical_index import BM25Index
+from app.database.shards import DEFAULT_COLLECTION, ShardMap, ShardPool, shard_name
+from app.database.snapshot import create_snapshot, restore_snapshot
+import numpy as np
+import os
+import time
 import uuid
 
-class ChromaVectorStore:
-    """Handles ChromaDB operations for vector storage"""
+def hnsw_configuration(space: str = None, m: int = None, construction_ef: int = None, search_ef: int = None) -> Dict:
+    """
+    Chroma collection configuration for the HNSW index
     
-    def __init__(self):
-        # Initialize ChromaDB client with persistence
-        self.client = chromadb.Client(ChromaSettings(
-            persist_directory=settings.CHROMA_PERSIST_DIR,
-            anonymized_telemetry=False
-        ))
+    Arguments left out come from settings. Space, M and construction ef
+    are fixed when a collection is created; search ef can be changed later.
+    """
+    return {
+        "hnsw": {
+            "space": space or settings.HNSW_SPACE,
+            "max_neighbors": m or settings.HNSW_M,
+            "ef_construction": construction_ef or settings.HNSW_CONSTRUCTION_EF,
+            "ef_search": search_ef or settings.HNSW_SEARCH_EF
+        }
+    }
+
+# Chroma systems opened by this process, by persist directory
+_chroma_systems: Dict[str, System] = {}
+
+def create_chroma_client():
+    """
+    Chroma client with a bounded cache of loaded indexes
+    
+    Chroma keeps the indexes it has loaded in an LRU cache. The legacy
+    Python segment manager sizes it with chroma_segment_cache_policy and
+    chroma_memory_limit_bytes; the Rust core (the default since 1.0)
+    ignores those and sizes it from the open-file limit, which is
+    effectively unbounded. Its size can only be set before the system
+    starts, so the system is built here and capped at
+    VECTOR_SHARD_MAX_OPEN indexes: no more shard indexes stay in memory
+    than ShardPool keeps handles for.
+    """
+    options = {"anonymized_telemetry": False}
+    if settings.CHROMA_MEMORY_LIMIT_BYTES > 0:
+        options.update({
+            "chroma_segment_cache_policy": "LRU",
+            "chroma_memory_limit_bytes": settings.CHROMA_MEMORY_LIMIT_BYTES
+        })
+    chroma_settings = ChromaSettings(**options)
+    if settings.CHROMA_CLIENT == "persistent":
+        chroma_settings.persist_directory = settings.CHROMA_PERSIST_DIR
+        chroma_settings.is_persistent = True
+    
+    key = chroma_settings.persist_directory if chroma_settings.is_persistent else ""
+    system = _chroma_systems.get(key)
+    if system is None:
+        system = System(chroma_settings)
+        api = system.instance(ServerAPI)
+        if hasattr(api, "hnsw_cache_size"):
+            api.hnsw_cache_size = max(1, min(api.hnsw_cache_size, settings.VECTOR_SHARD_MAX_OPEN))
+        system.start()
+        _chroma_systems[key] = system
+    return ChromaClient.from_system(system)
+
+class VectorStore(ABC):
+    """
+    Shared parts of the vector stores
+    
+    Embedding, the chunk text store, the keyword index, caching and
+    change notification are the same for every backend; subclasses
+    store and search the vectors.
+    """
+    
+    backend = "base"
+    
+    def __init__(self, embedding_provider: EmbeddingProvider = None):
+        # Embeddings are computed explicitly so batching and the model are ours to control
+        if embedding_provider is None:
+            embedding_provider = create_embedding_provider()
+            if settings.EMBEDDING_CACHE_ENABLED:
+                embedding_provider = CachedEmbeddingProvider(
+                    embedding_provider,
+                    EmbeddingCache(
+                        settings.EMBEDDING_CACHE_PATH,
+                        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+                    )
+                )
+        self.embedding_provider = embedding_provider
         
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name="documents",
-            metadata={"description": "Document chunks with embeddings"}
+        # Repeated questions skip the embedding model and, at the RAG level, the search
+        self.query_embedding_cache = LRUCache(settings.QUERY_EMBEDDING_CACHE_SIZE)
+        self.result_cache = SearchResultCache(settings.SEARCH_RESULT_CACHE_SIZE)
+        # Called with a doc_id whenever a document's chunks are added or deleted
+        self.change_listeners: List[Callable[[str], None]] = []
+        
+        self._prepare_data_dirs()
+        
+        # Chunk text lives in the chunk store; the vector backend keeps vectors and metadata
+        self.chunk_store = ChunkTextStore(settings.CHUNK_STORE_DIR)
+        
+        # Keyword index over the same chunks, kept next to the Chroma data
+        self.lexical_index = BM25Index(
+            os.path.join(settings.CHROMA_PERSIST_DIR, "lexical_index.sqlite3"),
+            min_idf=settings.LEXICAL_MIN_IDF,
+            max_postings=settings.LEXICAL_MAX_POSTINGS
         )
     
-    def add_documents(self, chunks: List[str], doc_id: str, metadata: Dict = None) -> bool:
+    def _prepare_data_dirs(self):
+        """Hook run before the chunk store and keyword index are opened"""
+    
+    def add_documents(
+        self,
+        chunks: List[str],
+        doc_id: str,
+        metadata: Dict = None,
+        start_index: int = 0,
+        total_chunks: int = None,
+        chunk_metadatas: List[Dict] = None
+    ) -> bool:
         """
         Add document chunks to vector store
         
+        Can be called repeatedly with consecutive batches of one document.
+        
         Args:
             chunks: List of text chunks
             doc_id: Unique document identifier
             metadata: Additional metadata for the document
+            start_index: Index of the first chunk within the document
+            total_chunks: Total chunks in the document, if known
+            chunk_metadatas: Per-chunk metadata (e.g. page and offsets), same order as chunks
             
         Returns:
             Boolean indicating success
         """
-        try:
-            # Create unique IDs for each chunk
-            ids = [f"{doc_id}_chunk_{i}" for i in range(len(chunks))]
+        return self.add_document_batches([{
+            "chunks": chunks,
+            "doc_id": doc_id,
+            "metadata": metadata,
+            "start_index": start_index,
+            "total_chunks": total_chunks,
+            "chunk_metadatas": chunk_metadatas
+        }])
+    
+    def add_document_batches(self, batches: List[Dict]) -> bool:
+        """
+        Add chunks of several documents with one embedding pass and one write
+        
+        Args:
+            batches: Dicts with the add_documents arguments (chunks, doc_id,
+                     and optionally metadata, start_index, total_chunks,
+                     chunk_metadatas)
             
-            # Prepare metadata for each chunk
+        Returns:
+            Boolean indicating success
+        """
+        try:
+            ids = []
             metadatas = []
-            for i, chunk in enumerate(chunks):
-                chunk_metadata = {
-                    "doc_id": doc_id,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                }
-                if metadata:
-                    chunk_metadata.update(metadata)
-                metadatas.append(chunk_metadata)
+            texts = []
+            for batch in batches:
+                doc_id = batch["doc_id"]
+                start_index = batch.get("start_index", 0)
+                total_chunks = batch.get("total_chunks")
+                metadata = batch.get("metadata")
+                chunk_metadatas = batch.get("chunk_metadatas")
+                
+                # Create unique IDs for each chunk
+                ids.extend(f"{doc_id}_chunk_{start_index + i}" for i in range(len(batch["chunks"])))
+                
+                # Prepare metadata for each chunk
+                for i, chunk in enumerate(batch["chunks"]):
+                    chunk_metadata = {
+                        "doc_id": doc_id,
+                        "chunk_index": start_index + i
+                    }
+                    if total_chunks is not None:
+                        chunk_metadata["total_chunks"] = total_chunks
+                    if metadata:
+                        chunk_metadata.update(metadata)
+                    if chunk_metadatas:
+                        chunk_metadata.update(chunk_metadatas[i])
+                    metadatas.append(chunk_metadata)
+                texts.extend(batch["chunks"])
             
-            # Add to ChromaDB
-            self.collection.add(
-                documents=chunks,
-                ids=ids,
-                metadatas=metadatas
-            )
+            if not texts:
+                return True
+            
+            try:
+                # Text goes to the chunk store once, vectors to the backend
+                embeddings = self.embedding_provider.embed(texts)
+                for batch in batches:
+                    self.chunk_store.append(batch["doc_id"], batch.get("start_index", 0), batch["chunks"])
+                self._write_vectors(ids, embeddings, metadatas)
+                for batch in batches:
+                    start_index = batch.get("start_index", 0)
+                    self.lexical_index.add(
+                        [f"{batch['doc_id']}_chunk_{start_index + i}" for i in range(len(batch["chunks"]))],
+                        batch["chunks"],
+                        doc_id=batch["doc_id"],
+                        user_id=(batch.get("metadata") or {}).get("user_id")
+                    )
+            finally:
+                # Cached searches may now miss these chunks, even if the write failed halfway
+                for batch in batches:
+                    self._document_changed(batch["doc_id"])
             
             return True
             
         except Exception as e:
-            print(f"Error adding documents to ChromaDB: {e}")
+            print(f"Error adding documents to {self.backend}: {e}")
             return False
     
-    def search(self, query: str, n_results: int = 5) -> Dict:
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        doc_id: str = None,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> Dict:
         """
         Search for similar documents
         
+        How the scope is applied depends on the backend's _query: ChromaDB
+        fetches the vectors of document-scoped searches by id and ranks
+        them exactly here, and filters other searches inside ChromaDB;
+        pgvector filters in SQL.
+        
         Args:
             query: Search query
             n_results: Number of results to return
+            doc_id: Only search this document
+            doc_ids: Only search these documents
+            user_id: Only search documents uploaded by this user
             
         Returns:
             Dictionary with search results
         """
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
+            results = self._query(self.embed_query(query), n_results, doc_id, doc_ids, user_id)
+            self._fill_documents(results)
+            
+            return {
+                "success": True,
+                "results": results
+            }
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing the vector for repeated queries"""
+        embedding = self.query_embedding_cache.get(query)
+        if embedding is None:
+            embedding = self.embedding_provider.embed_query(query)
+            self.query_embedding_cache.put(query, embedding)
+        return embedding
+    
+    def lexical_search(
+        self,
+        query: str,
+        n_results: int = 5,
+        doc_id: str = None,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> Dict:
+        """
+        Keyword (BM25) search over the same chunks as search
+        
+        Args:
+            query: Search query
+            n_results: Number of results to return
+            doc_id: Only search this document
+            doc_ids: Only search these documents
+            user_id: Only search documents uploaded by this user
+            
+        Returns:
+            Dictionary with (chunk_id, score) results, best first
+        """
+        try:
+            scope = self._scope(doc_id, doc_ids)
+            if scope == []:
+                return {"success": True, "results": []}
+            return {
+                "success": True,
+                "results": self.lexical_index.search(query, n_results=n_results, doc_ids=scope, user_id=user_id)
+            }
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def get_chunks(self, chunk_ids: List[str]) -> Dict:
+        """
+        Fetch chunks by id, in the shape and order of search results
+        
+        Args:
+            chunk_ids: Chunk identifiers
+            
+        Returns:
+            Dictionary with results (ids, metadatas, documents); unknown ids are left out
+        """
+        try:
+            metadata_by_id = self._get_metadatas(chunk_ids) if chunk_ids else {}
+            ids = [chunk_id for chunk_id in chunk_ids if chunk_id in metadata_by_id]
+            results = {
+                "ids": [ids],
+                "metadatas": [[metadata_by_id[chunk_id] for chunk_id in ids]],
+                "documents": None
+            }
+            self._fill_documents(results)
             
             return {
                 "success": True,
@@ -89,7 +336,113 @@ class ChromaVectorStore:
                 "error": str(e)
             }
     
-    def delete_document(self, doc_id: str) -> bool:
+    @abstractmethod
+    def get_embeddings(self, chunk_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Fetch stored chunk embeddings
+        
+        Args:
+            chunk_ids: Chunk identifiers
+            
+        Returns:
+            Mapping of the known chunk ids to their embeddings
+        """
+    
+    @abstractmethod
+    def count(self) -> int:
+        """Chunks stored"""
+    
+    def get_shard_stats(self) -> Dict:
+        """Sharding mode and open shards (unsharded unless the backend says otherwise)"""
+        return {"mode": "none", "shards": 1}
+    
+    @abstractmethod
+    def _write_vectors(self, ids: List[str], embeddings: List[List[float]], metadatas: List[Dict]):
+        """Store embeddings and metadata, raising on failure"""
+    
+    @abstractmethod
+    def _query(
+        self,
+        query_embedding: List[float],
+        n_results: int,
+        doc_id: str = None,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> Dict:
+        """Nearest chunks as {"ids", "metadatas", "distances", "documents"}, one list per query"""
+    
+    @abstractmethod
+    def _get_metadatas(self, chunk_ids: List[str]) -> Dict[str, Dict]:
+        """Metadata of the known chunk ids"""
+    
+    @abstractmethod
+    def _delete_vectors(self, doc_id: str):
+        """Remove a document's vectors"""
+    
+    def _stored_text(self, doc_id: str, chunk_id: str) -> Optional[str]:
+        """Chunk text kept by the backend itself, for chunks missing from the chunk store"""
+        return None
+    
+    @staticmethod
+    def _scope(doc_id: str = None, doc_ids: List[str] = None) -> Optional[List[str]]:
+        """Documents a search is restricted to, or None for no restriction"""
+        if not doc_id and not doc_ids:
+            return None
+        scope = set(doc_ids) if doc_ids else {doc_id}
+        if doc_id and doc_ids:
+            scope &= {doc_id}
+        return sorted(scope)
+    
+    def _fill_documents(self, results: Dict):
+        """
+        Put chunk text from the chunk store into query results
+        
+        Chunks indexed before the chunk store existed keep their text in
+        the backend, so that is used when the store has none.
+        """
+        documents = results.get("documents") or [[None] * len(ids) for ids in results["ids"]]
+        filled = []
+        for ids, stored in zip(results["ids"], documents):
+            texts = self.chunk_store.get_many([split_chunk_id(chunk_id) for chunk_id in ids])
+            filled.append([text if text is not None else doc for text, doc in zip(texts, stored)])
+        results["documents"] = filled
+    
+    def get_chunk_text(self, chunk_id: str) -> Optional[str]:
+        """
+        Fetch the text of one chunk
+        
+        Args:
+            chunk_id: Chunk identifier ("{doc_id}_chunk_{index}")
+            
+        Returns:
+            Chunk text, or None if unknown
+        """
+        try:
+            doc_id, chunk_index = split_chunk_id(chunk_id)
+        except ValueError:
+            return None
+        text = self.chunk_store.get(doc_id, chunk_index)
+        if text is None:
+            text = self._stored_text(doc_id, chunk_id)
+        return text
+    
+    def _document_changed(self, doc_id: str):
+        """Invalidate everything derived from a document's chunks"""
+        self.result_cache.invalidate_document(doc_id)
+        for listener in self.change_listeners:
+            try:
+                listener(doc_id)
+            except Exception as e:
+                print(f"Error notifying document change: {e}")
+    
+    def get_cache_stats(self) -> Dict:
+        """Hit rates of the query embedding and search result caches"""
+        return {
+            "query_embeddings": self.query_embedding_cache.get_stats(),
+            "search_results": self.result_cache.get_stats()
+        }
+    
+    def delete_document(self, doc_id: str) -> Dict:
         """
         Delete all chunks of a document
         
@@ -97,19 +450,547 @@ class ChromaVectorStore:
             doc_id: Document identifier
             
         Returns:
-            Boolean indicating success
+            Dictionary with success flag and chunk-store bytes freed
         """
         try:
-            # Get all IDs for this document
-            results = self.collection.get(
-                where={"doc_id": doc_id}
-            )
+            self._delete_vectors(doc_id)
+            self.lexical_index.delete_document(doc_id)
+            bytes_freed = self.chunk_store.delete(doc_id)
+            self._document_changed(doc_id)
+            return {
+                "success": True,
+                "bytes_freed": bytes_freed
+            }
             
-            if results['ids']:
-                self.collection.delete(ids=results['ids'])
-                return True
+        except Exception as e:
+            print(f"Error deleting document: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "bytes_freed": 0
+            }
+
+class ChromaVectorStore(VectorStore):
+    """Handles ChromaDB operations for vector storage"""
+    
+    backend = "ChromaDB"
+    
+    def __init__(self, embedding_provider: EmbeddingProvider = None, sharding: str = None):
+        started = time.perf_counter()
+        super().__init__(embedding_provider)
+        
+        # Initialize ChromaDB client; only the persistent client survives a restart
+        self.client = create_chroma_client()
+        
+        # Get or create collection
+        self.collection = self._configure_index(self.client.get_or_create_collection(
+            name=DEFAULT_COLLECTION,
+            configuration=hnsw_configuration(),
+            metadata={"description": "Document chunks with embeddings"}
+        ))
+        
+        # Sharded: each user's chunks (or hash bucket of users) get their own
+        # collection, created on first write; the map routes lookups by doc_id
+        self.sharding = sharding or settings.VECTOR_SHARDING
+        self.shard_map = None
+        if self.sharding != "none":
+            self.shard_map = ShardMap(os.path.join(settings.CHROMA_PERSIST_DIR, "shard_map.sqlite3"))
+        self.shards = ShardPool(
+            self._open_collection,
+            idle_seconds=settings.VECTOR_SHARD_IDLE_SECONDS,
+            max_open=settings.VECTOR_SHARD_MAX_OPEN
+        )
+        
+        # How long a restart takes before queries are fast
+        self.startup = {
+            "client": settings.CHROMA_CLIENT,
+            "restored_snapshot": self.restored_snapshot,
+            "open_ms": round((time.perf_counter() - started) * 1000, 2),
+            "warmup_ms": self.warm_up() if settings.CHROMA_WARMUP else None,
+            # Default collection only: counting every shard would open them all
+            "chunks": self.collection.count()
+        }
+        where = " in the default collection" if self.shard_map is not None else ""
+        print(f"✅ Vector store ready: {self.startup['chunks']} chunks{where}, "
+              f"opened in {self.startup['open_ms']} ms, warm-up {self.startup['warmup_ms']} ms")
+    
+    def _prepare_data_dirs(self):
+        self.restored_snapshot = self._restore_initial_snapshot()
+    
+    def _restore_initial_snapshot(self) -> bool:
+        """
+        Boot a new instance from VECTOR_SNAPSHOT_PATH
+        
+        Only runs when there is no persisted index yet, so a restart
+        never overwrites live data.
+        
+        Returns:
+            True if a snapshot was restored
+        """
+        snapshot_path = settings.VECTOR_SNAPSHOT_PATH
+        if not snapshot_path or settings.CHROMA_CLIENT != "persistent":
+            return False
+        if os.path.exists(os.path.join(settings.CHROMA_PERSIST_DIR, "chroma.sqlite3")):
             return False
+        try:
+            manifest = restore_snapshot(snapshot_path, settings.CHROMA_PERSIST_DIR, settings.CHUNK_STORE_DIR)
+        except Exception as e:
+            print(f"Error restoring vector snapshot {snapshot_path}: {e}")
+            return False
+        if manifest.get("embedding_model") != self.embedding_provider.model_id:
+            print(f"Snapshot was embedded with {manifest.get('embedding_model')}, "
+                  f"queries use {self.embedding_provider.model_id}")
+        print(f"✅ Restored vector snapshot from {manifest.get('created_at')}: {manifest.get('chunks')} chunks")
+        return True
+    
+    def warm_up(self) -> float:
+        """
+        Load the default collection's index with one query
+        
+        Chroma reads the HNSW index from disk on first use; doing that at
+        startup keeps the load out of the first user's query.
+        
+        Returns:
+            Milliseconds taken
+        """
+        started = time.perf_counter()
+        try:
+            sample = self.collection.get(limit=1, include=["embeddings"])
+            if sample["ids"]:
+                self.collection.query(query_embeddings=[sample["embeddings"][0]], n_results=1, include=[])
+        except Exception as e:
+            print(f"Error warming up vector index: {e}")
+        return round((time.perf_counter() - started) * 1000, 2)
+    
+    def create_snapshot(self, snapshot_path: str) -> Dict:
+        """
+        Archive the index, keyword index, shard map and chunk text
+        
+        Args:
+            snapshot_path: Archive to write (.tar.gz)
             
+        Returns:
+            Dictionary with success flag, archive path and sizes
+        """
+        if settings.CHROMA_CLIENT != "persistent":
+            return {"success": False, "error": "Snapshots need CHROMA_CLIENT=persistent"}
+        try:
+            result = create_snapshot(
+                snapshot_path,
+                settings.CHROMA_PERSIST_DIR,
+                settings.CHUNK_STORE_DIR,
+                manifest={
+                    "chunks": self.count(),
+                    "embedding_model": self.embedding_provider.model_id,
+                    "sharding": self.sharding,
+                    "hnsw": self._index_settings(self.collection)
+                }
+            )
+            result["success"] = True
+            return result
         except Exception as e:
-            print(f"Error deleting document: {e}")
-            return False
\ No newline at end of file
+            print(f"Error creating vector snapshot: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def _write_vectors(self, ids: List[str], embeddings: List[List[float]], metadatas: List[Dict]):
+        shards = [self._shard_for_user(metadata.get("user_id")) for metadata in metadatas]
+        if self.shard_map is not None:
+            # Recorded first, so a half-written document can still be found and deleted
+            self.shard_map.assign({metadata["doc_id"]: shard for metadata, shard in zip(metadatas, shards)})
+        for shard, positions in self._group_positions(shards).items():
+            self.shards.get(shard, create=True).add(
+                embeddings=[embeddings[i] for i in positions],
+                ids=[ids[i] for i in positions],
+                metadatas=[metadatas[i] for i in positions]
+            )
+    
+    def _query(
+        self,
+        query_embedding: List[float],
+        n_results: int,
+        doc_id: str = None,
+        doc_ids: List[str] = None,
+        user_id: str = None
+    ) -> Dict:
+        """
+        Documents in the chunk store are ranked exactly from their vectors;
+        other filters run inside ChromaDB. With sharding on, a user's
+        search only touches that user's shard.
+        """
+        chunk_ids = self._scoped_chunk_ids(doc_id, doc_ids)
+        if chunk_ids is not None:
+            return self._search_chunks(query_embedding, chunk_ids, n_results, user_id)
+        return self._query_collections(
+            self._search_collections(doc_id, doc_ids, user_id),
+            query_embedding,
+            n_results,
+            self.build_filter(doc_id=doc_id, doc_ids=doc_ids, user_id=user_id)
+        )
+    
+    @staticmethod
+    def build_filter(doc_id: str = None, doc_ids: List[str] = None, user_id: str = None) -> Optional[Dict]:
+        """
+        Build a ChromaDB metadata filter
+        
+        Args:
+            doc_id: Single document identifier
+            doc_ids: List of document identifiers
+            user_id: User identifier
+            
+        Returns:
+            A where clause, or None when nothing is filtered
+        """
+        conditions = []
+        if doc_id:
+            conditions.append({"doc_id": doc_id})
+        if doc_ids:
+            conditions.append({"doc_id": {"$in": list(doc_ids)}})
+        if user_id:
+            conditions.append({"user_id": user_id})
+        
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+    
+    def _get_metadatas(self, chunk_ids: List[str]) -> Dict[str, Dict]:
+        metadata_by_id = {}
+        for collection, shard_ids in self._collections_for_chunks(chunk_ids):
+            stored = collection.get(ids=shard_ids, include=["metadatas"])
+            metadata_by_id.update(zip(stored["ids"], stored.get("metadatas") or []))
+        return metadata_by_id
+    
+    def get_embeddings(self, chunk_ids: List[str]) -> Dict[str, List[float]]:
+        embeddings = {}
+        for collection, shard_ids in self._collections_for_chunks(list(dict.fromkeys(chunk_ids))):
+            stored = collection.get(ids=shard_ids, include=["embeddings"])
+            embeddings.update(
+                (chunk_id, list(embedding)) for chunk_id, embedding in zip(stored["ids"], stored["embeddings"])
+            )
+        return embeddings
+    
+    def _scoped_chunk_ids(self, doc_id: str = None, doc_ids: List[str] = None) -> Optional[List[str]]:
+        """
+        Chunk ids of the documents a search is scoped to
+        
+        Returns None when the search is not scoped to documents, or when a
+        document is not in the chunk store (e.g. indexed before it existed),
+        in which case the caller falls back to a metadata filter.
+        """
+        scope = self._scope(doc_id, doc_ids)
+        if not scope:
+            return None
+        
+        chunk_ids = []
+        for scoped_doc_id in scope:
+            count = self.chunk_store.count(scoped_doc_id)
+            if count == 0:
+                return None
+            chunk_ids.extend(f"{scoped_doc_id}_chunk_{i}" for i in range(count))
+        return chunk_ids
+    
+    def _search_chunks(
+        self,
+        query_embedding: List[float],
+        chunk_ids: List[str],
+        n_results: int,
+        user_id: str = None
+    ) -> Dict:
+        """
+        Rank a known set of chunks exactly
+        
+        Fetching a document's vectors by id and scoring them here costs the
+        same however large the collection is, unlike a filtered ANN query.
+        Results have the same shape as collection.query.
+        """
+        ids, metadatas, embeddings = [], [], []
+        for collection, shard_ids in self._collections_for_chunks(chunk_ids):
+            stored = collection.get(ids=shard_ids, include=["embeddings", "metadatas"])
+            for chunk_id, chunk_metadata, embedding in zip(stored["ids"], stored["metadatas"], stored["embeddings"]):
+                if user_id and (chunk_metadata or {}).get("user_id") != user_id:
+                    continue
+                ids.append(chunk_id)
+                metadatas.append(chunk_metadata)
+                embeddings.append(embedding)
+        
+        if not ids:
+            return {"ids": [[]], "metadatas": [[]], "distances": [[]], "documents": None}
+        
+        distances = self._distances(np.asarray(query_embedding, dtype=np.float32),
+                                    np.asarray(embeddings, dtype=np.float32))
+        order = np.argsort(distances, kind="stable")[:n_results]
+        return {
+            "ids": [[ids[i] for i in order]],
+            "metadatas": [[metadatas[i] for i in order]],
+            "distances": [[float(distances[i]) for i in order]],
+            "documents": None
+        }
+    
+    def _distances(self, query: "np.ndarray", vectors: "np.ndarray") -> "np.ndarray":
+        """Distances in the collection's space, matching what ChromaDB reports"""
+        space = self._index_settings(self.collection).get("space", "l2")
+        if space == "cosine":
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+            return 1.0 - (vectors @ query) / np.maximum(norms, 1e-12)
+        if space == "ip":
+            return 1.0 - vectors @ query
+        difference = vectors - query
+        return np.einsum("ij,ij->i", difference, difference)
+    
+    def _open_collection(self, name: str, create: bool):
+        """Open a shard's collection, creating it if asked; None if it does not exist"""
+        if name == DEFAULT_COLLECTION:
+            return self.collection
+        if create:
+            # Shards share the default collection's index settings (distance space etc.)
+            return self._configure_index(self.client.get_or_create_collection(
+                name=name,
+                configuration={"hnsw": self._index_settings(self.collection)},
+                metadata=self.collection.metadata
+            ))
+        try:
+            return self._configure_index(self.client.get_collection(name=name))
+        except NotFoundError:
+            return None
+    
+    @staticmethod
+    def _index_settings(collection) -> Dict:
+        """HNSW space, M and ef values a collection was built with"""
+        hnsw = dict((collection.configuration or {}).get("hnsw") or {})
+        return {key: hnsw[key] for key in ("space", "max_neighbors", "ef_construction", "ef_search") if key in hnsw}
+    
+    def _configure_index(self, collection):
+        """
+        Apply HNSW_SEARCH_EF to an existing collection
+        
+        Search ef only affects queries, so it is updated in place; Chroma
+        reads it when it loads the index, which at startup has not happened
+        yet. Space, M and construction ef are baked into the index; a
+        mismatch with settings is reported and needs a re-index.
+        """
+        current = self._index_settings(collection)
+        wanted = hnsw_configuration()["hnsw"]
+        if current.get("ef_search") != wanted["ef_search"]:
+            try:
+                collection.modify(configuration={"hnsw": {"ef_search": wanted["ef_search"]}})
+            except Exception as e:
+                print(f"Error updating search ef of {collection.name}: {e}")
+        fixed = [key for key in ("space", "max_neighbors", "ef_construction") if current.get(key, wanted[key]) != wanted[key]]
+        if fixed and collection.name == DEFAULT_COLLECTION:
+            print(f"Collection {collection.name} keeps its HNSW {', '.join(fixed)}; re-index to apply the new settings")
+        return collection
+    
+    def _shard_for_user(self, user_id: Optional[str]) -> str:
+        return shard_name(user_id, self.sharding, settings.VECTOR_SHARD_BUCKETS)
+    
+    @staticmethod
+    def _group_positions(keys: List[str]) -> Dict[str, List[int]]:
+        """Positions of each distinct key, in first-seen order"""
+        groups: Dict[str, List[int]] = {}
+        for position, key in enumerate(keys):
+            groups.setdefault(key, []).append(position)
+        return groups
+    
+    def _collection_for_document(self, doc_id: str):
+        """Collection holding a document's chunks, or None if its shard is gone"""
+        if self.shard_map is None:
+            return self.collection
+        return self.shards.get(self.shard_map.lookup([doc_id])[doc_id])
+    
+    def _collections_for_chunks(self, chunk_ids: List[str]) -> List:
+        """(collection, chunk ids) pairs covering the given chunks"""
+        if not chunk_ids:
+            return []
+        if self.shard_map is None:
+            return [(self.collection, chunk_ids)]
+        
+        doc_ids = []
+        for chunk_id in chunk_ids:
+            try:
+                doc_ids.append(split_chunk_id(chunk_id)[0])
+            except ValueError:
+                doc_ids.append(None)
+        shard_of = self.shard_map.lookup([doc_id for doc_id in doc_ids if doc_id is not None])
+        shards = [shard_of[doc_id] if doc_id is not None else DEFAULT_COLLECTION for doc_id in doc_ids]
+        
+        pairs = []
+        for shard, positions in self._group_positions(shards).items():
+            collection = self.shards.get(shard)
+            if collection is not None:
+                pairs.append((collection, [chunk_ids[i] for i in positions]))
+        return pairs
+    
+    def _search_collections(self, doc_id: str = None, doc_ids: List[str] = None, user_id: str = None) -> List:
+        """
+        Collections a filtered search has to query
+
+        With sharding on, a search needs a user or documents: searching
+        every shard would load one index per customer and push out the
+        ones in use, so unscoped searches are rejected.
+        """
+        if self.shard_map is None:
+            return [self.collection]
+        scope = self._scope(doc_id, doc_ids)
+        if scope is not None:
+            names = set(self.shard_map.lookup(scope).values())
+        elif user_id:
+            # The default collection keeps this user's chunks until they are migrated
+            names = {self._shard_for_user(user_id), DEFAULT_COLLECTION}
+        else:
+            raise ValueError("Sharded searches need a user_id, doc_id or doc_ids")
+        collections = [self.shards.get(name) for name in sorted(names)]
+        return [collection for collection in collections if collection is not None]
+    
+    @staticmethod
+    def _query_collections(collections: List, query_embedding: List[float], n_results: int, where: Optional[Dict]) -> Dict:
+        """Query several collections and keep the n_results closest chunks overall"""
+        if len(collections) == 1:
+            return collections[0].query(query_embeddings=[query_embedding], n_results=n_results, where=where)
+        
+        merged = []
+        for collection in collections:
+            results = collection.query(query_embeddings=[query_embedding], n_results=n_results, where=where)
+            documents = (results.get("documents") or [[]])[0] or [None] * len(results["ids"][0])
+            merged.extend(zip(results["distances"][0], results["ids"][0], results["metadatas"][0], documents))
+        merged.sort(key=lambda item: item[0])
+        merged = merged[:n_results]
+        return {
+            "ids": [[item[1] for item in merged]],
+            "metadatas": [[item[2] for item in merged]],
+            "distances": [[item[0] for item in merged]],
+            "documents": [[item[3] for item in merged]]
+        }
+    
+    def shard_names(self) -> List[str]:
+        """Names of the collections holding chunks"""
+        if self.shard_map is None:
+            return [DEFAULT_COLLECTION]
+        return sorted(
+            collection.name for collection in self.client.list_collections()
+            if collection.name == DEFAULT_COLLECTION or collection.name.startswith(("user_", "shard_"))
+        )
+    
+    def count(self) -> int:
+        """Chunks stored across all shards"""
+        collections = [self.shards.get(name) for name in self.shard_names()]
+        return sum(collection.count() for collection in collections if collection is not None)
+    
+    def get_shard_stats(self) -> Dict:
+        """Sharding mode, number of shards and open handles"""
+        stats = self.shards.get_stats()
+        stats.update({
+            "mode": self.sharding,
+            "shards": len(self.shard_names())
+        })
+        return stats
+    
+    def migrate_to_shards(self, batch_size: int = 500, progress_callback: Callable = None) -> Dict:
+        """
+        Move chunks out of the default collection into their users' shards
+        
+        Chunks are copied with their embeddings (no re-embedding) and
+        removed from the default collection batch by batch, so the
+        migration can be interrupted and re-run. Chunks without a user_id
+        stay where they are.
+        
+        Args:
+            batch_size: Chunks read per batch
+            progress_callback: Called with (chunks moved, chunks kept) after each batch
+            
+        Returns:
+            Dictionary with chunks moved and kept, and documents moved
+        """
+        if self.shard_map is None:
+            return {"success": False, "error": "Sharding is off (VECTOR_SHARDING=none)"}
+        
+        moved = kept = 0
+        documents = set()
+        try:
+            while True:
+                # Kept chunks stay at the front, moved ones are deleted
+                page = self.collection.get(
+                    limit=batch_size,
+                    offset=kept,
+                    include=["embeddings", "metadatas", "documents"]
+                )
+                if not page["ids"]:
+                    break
+                
+                shards = [self._shard_for_user((metadata or {}).get("user_id")) for metadata in page["metadatas"]]
+                groups = self._group_positions(shards)
+                kept += len(groups.pop(DEFAULT_COLLECTION, []))
+                if not groups:
+                    if progress_callback:
+                        progress_callback(moved, kept)
+                    continue
+                
+                self.shard_map.assign({
+                    page["metadatas"][i]["doc_id"]: shard
+                    for shard, positions in groups.items() for i in positions
+                })
+                for shard, positions in groups.items():
+                    self.shards.get(shard, create=True).upsert(
+                        ids=[page["ids"][i] for i in positions],
+                        embeddings=[page["embeddings"][i] for i in positions],
+                        metadatas=[page["metadatas"][i] for i in positions],
+                        documents=[page["documents"][i] for i in positions]
+                    )
+                moved_ids = [page["ids"][i] for positions in groups.values() for i in positions]
+                self.collection.delete(ids=moved_ids)
+                moved += len(moved_ids)
+                documents.update(page["metadatas"][i]["doc_id"] for positions in groups.values() for i in positions)
+                if progress_callback:
+                    progress_callback(moved, kept)
+            
+            return {
+                "success": True,
+                "moved": moved,
+                "kept": kept,
+                "documents": len(documents)
+            }
+        
+        except Exception as e:
+            print(f"Error migrating to shards: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "moved": moved,
+                "kept": kept
+            }
+    
+    def _stored_text(self, doc_id: str, chunk_id: str) -> Optional[str]:
+        collection = self._collection_for_document(doc_id)
+        legacy = collection.get(ids=[chunk_id], include=["documents"]) if collection else {"documents": []}
+        return legacy["documents"][0] if legacy["documents"] else None
+    
+    def _delete_vectors(self, doc_id: str):
+        # One call by metadata filter, without fetching the ids first
+        collection = self._collection_for_document(doc_id)
+        if collection is not None:
+            collection.delete(where={"doc_id": doc_id})
+        if self.shard_map is not None:
+            self.shard_map.forget(doc_id)
+
+
+def create_vector_store(backend: str = None) -> VectorStore:
+    """
+    Build the vector store selected in settings
+
+    Args:
+        backend: "chroma" or "pgvector" (defaults to VECTOR_BACKEND)
+
+    Returns:
+        A VectorStore
+    """
+    backend = backend or settings.VECTOR_BACKEND
+    if backend == "chroma":
+        return ChromaVectorStore()
+    if backend == "pgvector":
+        # Imported here: pgvector and a PostgreSQL connection are only needed for this backend
+        from app.database.pg_vector_store import PgVectorStore
+        return PgVectorStore()
+    raise ValueError(f"Unknown vector store backend: {backend}")
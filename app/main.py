@@ -1,7 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import router
+from app.api.routes import router, rag_engine
 from app.core.config import settings
+from app.core.job_queue import job_queue
+from app.utils.pdf_processor import shutdown_extract_pools
 
 # Create FastAPI app
 app = FastAPI(
@@ -40,6 +42,9 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     print("\n👋 Shutting down DocuChat...")
+    job_queue.shutdown(wait=False)
+    shutdown_extract_pools()
+    await rag_engine.llm_client.aclose()
 
 if __name__ == "__main__":
     import uvicorn
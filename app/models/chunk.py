@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer
+from sqlalchemy.dialects.postgresql import JSONB
+from pgvector.sqlalchemy import Vector
+from app.core.config import settings
+from app.models.document import Base
+
+class DocumentChunk(Base):
+    """Chunk embedding and metadata for the pgvector store (text stays in the chunk store)"""
+    __tablename__ = "document_chunks"
+    
+    chunk_id = Column(String, primary_key=True)  # "{doc_id}_chunk_{index}"
+    doc_id = Column(String, nullable=False, index=True)  # No foreign key: vectors are written before the Document row
+    user_id = Column(String, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    embedding = Column(Vector(settings.PGVECTOR_DIMENSIONS), nullable=False)
+    chunk_metadata = Column(JSONB)  # Same fields Chroma keeps (page, offsets, filename, ...)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, JSON
+from sqlalchemy import Column, String, Integer, Text, DateTime, JSON, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -7,13 +7,16 @@ Base = declarative_base()
 class Document(Base):
     """Document metadata stored in PostgreSQL"""
     __tablename__ = "documents"
+    __table_args__ = (UniqueConstraint("user_id", "file_hash"),)
     
     id = Column(String, primary_key=True)  # doc_id
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     file_size = Column(Integer)  # in bytes
     num_pages = Column(Integer)
-    doc_hash = Column(String, unique=True)  # MD5 hash
+    user_id = Column(String, index=True)  # Uploader
+    doc_hash = Column(String, index=True)  # MD5 hash (same text may belong to several users)
+    file_hash = Column(String, index=True)  # SHA-256 of the uploaded bytes, unique per user
     full_text = Column(Text)  # Complete extracted text
     num_chunks = Column(Integer)
     doc_metadata = Column(JSON)  # Changed from 'metadata' to 'doc_metadata'
@@ -11,7 +11,7 @@ class Query:
         question: str,
         answer: str,
         doc_id: Optional[str] = None,
-        retrieved_chunks: Optional[List[str]] = None,
+        retrieved_chunks: Optional[List[Dict]] = None,  # Chunk references, no text
         model_used: Optional[str] = None,
         tokens_used: Optional[int] = None,
         timestamp: Optional[datetime] = None
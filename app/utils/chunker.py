@@ -0,0 +1,189 @@
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Dict, Iterable, Iterator, List
+from app.utils.tokenizer import Tokenizer
+import re
+
+# Sentence end followed by a space; the break goes right after the punctuation
+SENTENCE_BREAK = re.compile(r"[.?!] ")
+
+# Pages are joined with this separator in the document's full text
+PAGE_SEPARATOR = "\n\n"
+
+
+class TextChunker:
+    """
+    Splits text into overlapping chunks in a single forward pass
+
+    Chunks end at the last sentence break (or failing that, whitespace)
+    inside the window, but never inside the first `overlap` units of it,
+    so every chunk moves the start forward and chunking always ends.
+    Sizes are measured in characters or in tokens.
+
+    Each chunk is a dict with its index, text, character offsets into the
+    document's full text (pages joined by a blank line) and the number of
+    the page it starts on.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        overlap: int = 200,
+        unit: str = "chars",
+        tokenizer: Tokenizer = None
+    ):
+        """
+        Args:
+            chunk_size: Maximum chunk size, in `unit`
+            overlap: Units shared between consecutive chunks
+            unit: "chars" or "tokens"
+            tokenizer: Tokenizer for token sizing (created if needed)
+        """
+        if unit not in ("chars", "tokens"):
+            raise ValueError(f"Unknown chunk unit: {unit}")
+        if chunk_size <= 0 or overlap < 0 or overlap >= chunk_size:
+            raise ValueError("chunk_size must be positive and larger than overlap")
+
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.unit = unit
+        self.tokenizer = tokenizer or (Tokenizer() if unit == "tokens" else None)
+
+    def chunk_text(self, text: str) -> List[Dict]:
+        """
+        Chunk a single text
+
+        Args:
+            text: The text to chunk
+
+        Returns:
+            List of chunk dicts
+        """
+        return list(self.iter_chunks([{"page_number": 1, "text": text}]))
+
+    def iter_chunks(self, pages: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Chunk a stream of pages
+
+        Only about one window of text is buffered at a time, so memory does
+        not grow with the document.
+
+        Args:
+            pages: Dicts with page_number and text, in page order
+
+        Yields:
+            Chunk dicts
+        """
+        by_tokens = self.unit == "tokens"
+        pages = iter(pages)
+
+        buffer = ""          # Text from absolute offset `base` onwards
+        base = 0
+        total = 0            # Absolute length of the text seen so far
+        breaks = []          # Absolute sentence break positions, ascending
+        tokens = []          # Absolute token start offsets (token mode)
+        token_base = 0       # Absolute index of tokens[0]
+        page_starts = deque()  # (absolute offset, page number)
+        exhausted = False
+
+        start = 0            # Absolute offset of the current window
+        start_token = 0      # Absolute token index of the current window
+        index = 0
+
+        while True:
+            # Read ahead until we can tell whether text continues past the window
+            while not exhausted:
+                if by_tokens:
+                    if token_base + len(tokens) > start_token + self.chunk_size:
+                        break
+                elif total > start + self.chunk_size:
+                    break
+
+                page = next(pages, None)
+                if page is None:
+                    exhausted = True
+                    break
+
+                separator = PAGE_SEPARATOR if total else ""
+                offset = total + len(separator)
+                text = page["text"]
+                buffer += separator + text
+                total = offset + len(text)
+                page_starts.append((offset, page.get("page_number")))
+                breaks.extend(offset + m.start() + 1 for m in SENTENCE_BREAK.finditer(text))
+                if by_tokens:
+                    tokens.extend(offset + t for t in self.tokenizer.offsets(text))
+
+            if start >= total:
+                return
+
+            # Window limit and the earliest allowed break (past the overlap)
+            if by_tokens:
+                limit_token = start_token + self.chunk_size
+                num_tokens = token_base + len(tokens)
+                limit = tokens[limit_token - token_base] if limit_token < num_tokens else total
+                min_token = start_token + self.overlap
+                min_end = tokens[min_token - token_base] if min_token < num_tokens else total
+            else:
+                limit = min(start + self.chunk_size, total)
+                min_end = start + self.overlap
+
+            if limit >= total:
+                end = total
+            else:
+                end = self._find_break(buffer, base, breaks, min_end, limit)
+
+            # Record the stripped chunk with exact offsets
+            raw = buffer[start - base:end - base]
+            stripped = raw.strip()
+            if stripped:
+                chunk_start = start + (len(raw) - len(raw.lstrip()))
+                while len(page_starts) > 1 and page_starts[1][0] <= chunk_start:
+                    page_starts.popleft()
+                yield {
+                    "index": index,
+                    "text": stripped,
+                    "start": chunk_start,
+                    "end": chunk_start + len(stripped),
+                    "page_number": page_starts[0][1]
+                }
+                index += 1
+
+            if end >= total:
+                return
+
+            # Step forward, keeping `overlap` units; end > min_end guarantees progress
+            if by_tokens:
+                next_token = bisect_left(tokens, end) + token_base
+                start_token = max(next_token - self.overlap, start_token + 1)
+                start = tokens[start_token - token_base]
+            else:
+                start = end - self.overlap
+
+            # Drop consumed text once it is most of the buffer (amortised linear)
+            if start - base > len(buffer) // 2:
+                buffer = buffer[start - base:]
+                base = start
+                breaks = breaks[bisect_left(breaks, start):]
+                if by_tokens:
+                    tokens = tokens[start_token - token_base:]
+                    token_base = start_token
+
+    @staticmethod
+    def _find_break(buffer: str, base: int, breaks: List[int], min_end: int, limit: int) -> int:
+        """
+        Pick where a full window ends
+
+        Prefers the last sentence break in (min_end, limit), then the last
+        whitespace in that range, then a hard cut at limit.
+        """
+        # Sentence break b means "... ." at b-1 and a space at b, inside the window
+        i = bisect_right(breaks, limit - 1) - 1
+        if i >= 0 and breaks[i] > min_end:
+            return breaks[i]
+
+        space = buffer.rfind(" ", min_end - base + 1, limit - base)
+        if space != -1:
+            return base + space
+
+        return limit
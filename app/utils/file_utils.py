@@ -0,0 +1,28 @@
+from typing import BinaryIO, Tuple
+import hashlib
+
+# Copy buffer size for streaming uploads to disk
+COPY_CHUNK_SIZE = 1024 * 1024
+
+def save_with_hash(source: BinaryIO, dest_path: str) -> Tuple[int, str]:
+    """
+    Stream a file to disk while hashing its raw bytes
+    
+    Args:
+        source: Readable binary file object
+        dest_path: Where to write the file
+        
+    Returns:
+        Tuple of (size in bytes, SHA-256 hex digest)
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    with open(dest_path, "wb") as buffer:
+        while True:
+            data = source.read(COPY_CHUNK_SIZE)
+            if not data:
+                break
+            hasher.update(data)
+            buffer.write(data)
+            size += len(data)
+    return size, hasher.hexdigest()
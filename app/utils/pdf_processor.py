@@ -1,53 +1,121 @@
 import pypdf
-from typing import List, Dict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Dict
+from app.utils.chunker import TextChunker, PAGE_SEPARATOR
 import hashlib
+import math
+import multiprocessing
+import threading
+
+# Upper bound on pages per worker task, keeps in-flight text bounded
+MAX_PAGES_PER_RANGE = 16
+
+# Extraction pools shared by every PDF in this process, by worker count
+_extract_pools: Dict[int, ProcessPoolExecutor] = {}
+_extract_pools_lock = threading.Lock()
+
+def _extract_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Long-lived process pool for page extraction
+
+    Workers are spawned rather than forked: extraction runs from
+    threads of a server process whose other threads (Chroma, SQLite,
+    httpx) may hold locks, and a forked child inherits those locks
+    held, which can deadlock it.
+    """
+    with _extract_pools_lock:
+        pool = _extract_pools.get(max_workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _extract_pools[max_workers] = pool
+        return pool
+
+def _discard_pool(max_workers: int, pool: ProcessPoolExecutor):
+    """Forget a broken pool so the next PDF starts a new one"""
+    with _extract_pools_lock:
+        if _extract_pools.get(max_workers) is pool:
+            del _extract_pools[max_workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_extract_pools():
+    """Stop the extraction workers (called on application shutdown)"""
+    with _extract_pools_lock:
+        pools = list(_extract_pools.values())
+        _extract_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _extract_pages(pdf_reader: pypdf.PdfReader, start: int, end: int) -> List[Dict]:
+    """Extract the non-empty pages in [start, end) from an open reader"""
+    text_content = []
+    for page_num in range(start, end):
+        text = pdf_reader.pages[page_num].extract_text()
+        if text.strip():  # Only add non-empty pages
+            text_content.append({
+                "page_number": page_num + 1,
+                "text": text.strip()
+            })
+    return text_content
+
+def _extract_page_range(pdf_file_path: str, start: int, end: int) -> List[Dict]:
+    """Extract a page range in a worker process (opens its own reader)"""
+    with open(pdf_file_path, 'rb') as file:
+        return _extract_pages(pypdf.PdfReader(file), start, end)
 
 class PDFProcessor:
     """Handles PDF text extraction"""
     
     @staticmethod
-    def extract_text_from_pdf(pdf_file_path: str) -> Dict[str, any]:
+    def extract_text_from_pdf(
+        pdf_file_path: str,
+        max_workers: int = 1,
+        parallel_threshold: int = 50
+    ) -> Dict[str, any]:
         """
         Extract text from PDF file
         
+        PDFs with at least `parallel_threshold` pages are split into page
+        ranges and extracted on a process pool; results are merged in page
+        order so the output is identical to the serial path.
+        
         Args:
             pdf_file_path: Path to the PDF file
+            max_workers: Number of worker processes (1 disables parallel mode)
+            parallel_threshold: Minimum page count for parallel extraction
             
         Returns:
             Dictionary with extracted text and metadata
         """
         try:
-            # Open the PDF
-            with open(pdf_file_path, 'rb') as file:
-                pdf_reader = pypdf.PdfReader(file)
-                
-                # Get metadata
-                num_pages = len(pdf_reader.pages)
-                
-                # Extract text from all pages
-                text_content = []
-                for page_num, page in enumerate(pdf_reader.pages):
-                    text = page.extract_text()
-                    if text.strip():  # Only add non-empty pages
-                        text_content.append({
-                            "page_number": page_num + 1,
-                            "text": text.strip()
-                        })
-                
-                # Combine all text
-                full_text = "\n\n".join([page["text"] for page in text_content])
-                
-                # Generate document hash (unique identifier)
-                doc_hash = hashlib.md5(full_text.encode()).hexdigest()
-                
-                return {
-                    "success": True,
-                    "num_pages": num_pages,
-                    "pages": text_content,
-                    "full_text": full_text,
-                    "doc_hash": doc_hash,
-                    "message": f"Successfully extracted text from {num_pages} pages"
-                }
+            # Get metadata
+            num_pages = PDFProcessor.get_num_pages(pdf_file_path)
+            
+            # Extract text from all pages
+            text_content = list(PDFProcessor.iter_pages(
+                pdf_file_path,
+                max_workers=max_workers,
+                parallel_threshold=parallel_threshold
+            ))
+            
+            # Combine all text
+            full_text = "\n\n".join([page["text"] for page in text_content])
+            
+            # Generate document hash (unique identifier)
+            doc_hash = hashlib.md5(full_text.encode()).hexdigest()
+            
+            return {
+                "success": True,
+                "num_pages": num_pages,
+                "pages": text_content,
+                "full_text": full_text,
+                "doc_hash": doc_hash,
+                "message": f"Successfully extracted text from {num_pages} pages"
+            }
                 
         except Exception as e:
             return {
@@ -56,11 +124,100 @@ class PDFProcessor:
                 "message": f"Failed to process PDF: {str(e)}"
             }
     
+    @staticmethod
+    def get_num_pages(pdf_file_path: str) -> int:
+        """Count the pages of a PDF without extracting any text"""
+        with open(pdf_file_path, 'rb') as file:
+            return len(pypdf.PdfReader(file).pages)
+    
+    @staticmethod
+    def iter_pages(
+        pdf_file_path: str,
+        max_workers: int = 1,
+        parallel_threshold: int = 50
+    ) -> Iterator[Dict]:
+        """
+        Yield non-empty pages in page order, one at a time
+        
+        Args:
+            pdf_file_path: Path to the PDF file
+            max_workers: Number of worker processes (1 disables parallel mode)
+            parallel_threshold: Minimum page count for parallel extraction
+            
+        Yields:
+            Dictionaries with page_number and text
+        """
+        with open(pdf_file_path, 'rb') as file:
+            pdf_reader = pypdf.PdfReader(file)
+            num_pages = len(pdf_reader.pages)
+            
+            if max_workers > 1 and num_pages >= parallel_threshold:
+                yield from PDFProcessor._iter_pages_parallel(
+                    pdf_file_path, num_pages, max_workers
+                )
+                return
+            
+            for page_num in range(num_pages):
+                yield from _extract_pages(pdf_reader, page_num, page_num + 1)
+    
+    @staticmethod
+    def _iter_pages_parallel(pdf_file_path: str, num_pages: int, max_workers: int) -> Iterator[Dict]:
+        """
+        Extract pages on a process pool
+        
+        Pages are split into a few ranges per worker so uneven pages
+        balance out. Only a bounded window of ranges is in flight, and
+        results are yielded back in page order. The pool is shared with
+        other PDFs; ranges not yet started are cancelled if the caller
+        stops early.
+        """
+        range_size = max(1, min(
+            MAX_PAGES_PER_RANGE,
+            math.ceil(num_pages / (max_workers * 2))
+        ))
+        ranges = [
+            (start, min(start + range_size, num_pages))
+            for start in range(0, num_pages, range_size)
+        ]
+        
+        executor = _extract_pool(max_workers)
+        pending = deque()
+        try:
+            for start, end in ranges:
+                pending.append(executor.submit(_extract_page_range, pdf_file_path, start, end))
+                if len(pending) >= max_workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        except BrokenProcessPool:
+            _discard_pool(max_workers, executor)
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    @staticmethod
+    def hash_pages(pages: Iterator[Dict], hasher) -> Iterator[Dict]:
+        """
+        Pass pages through while feeding their text to a hash
+        
+        Gives the same digest as hashing the full text (pages joined by
+        PAGE_SEPARATOR), i.e. the doc_hash of extract_text_from_pdf.
+        """
+        for i, page in enumerate(pages):
+            if i:
+                hasher.update(PAGE_SEPARATOR.encode())
+            hasher.update(page["text"].encode())
+            yield page
+    
     @staticmethod
     def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
         """
         Split text into overlapping chunks for better context
         
+        Kept for existing callers; see TextChunker for offsets, page
+        numbers and token-based sizing.
+        
         Args:
             text: The text to chunk
             chunk_size: Size of each chunk in characters
@@ -69,27 +226,5 @@ class PDFProcessor:
         Returns:
             List of text chunks
         """
-        chunks = []
-        start = 0
-        text_length = len(text)
-        
-        while start < text_length:
-            end = start + chunk_size
-            chunk = text[start:end]
-            
-            # Try to break at sentence end
-            if end < text_length:
-                # Find the last period, question mark, or exclamation
-                last_break = max(
-                    chunk.rfind('. '),
-                    chunk.rfind('? '),
-                    chunk.rfind('! ')
-                )
-                if last_break != -1:
-                    chunk = chunk[:last_break + 1]
-                    end = start + last_break + 1
-            
-            chunks.append(chunk.strip())
-            start = end - overlap
-        
-        return chunks
\ No newline at end of file
+        chunker = TextChunker(chunk_size=chunk_size, overlap=overlap)
+        return [chunk["text"] for chunk in chunker.chunk_text(text)]
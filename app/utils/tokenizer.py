@@ -0,0 +1,46 @@
+from typing import List
+import re
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a regex approximation
+    tiktoken = None
+
+# Words and individual punctuation marks, roughly what BPE tokenizers produce
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class Tokenizer:
+    """
+    Local tokenizer for sizing chunks and prompts
+
+    Uses tiktoken (a requirement), whose counts the chunk sizes and
+    context budgets are set in. tiktoken downloads the encoding file on
+    first use and caches it (TIKTOKEN_CACHE_DIR); offline hosts need that
+    cache pre-filled. If tiktoken or its encoding is unavailable, a regex
+    approximation (words and punctuation marks) is used instead, which
+    counts fewer tokens for the same text.
+    """
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:
+                print(f"tiktoken encoding {encoding} unavailable, using regex tokenizer: {e}")
+        self.name = encoding if self._encoding else "regex"
+
+    def count(self, text: str) -> int:
+        """Number of tokens in a text"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return sum(1 for _ in TOKEN_PATTERN.finditer(text))
+
+    def offsets(self, text: str) -> List[int]:
+        """Character offset at which each token starts"""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            _, offsets = self._encoding.decode_with_offsets(tokens)
+            return offsets
+        return [match.start() for match in TOKEN_PATTERN.finditer(text)]
@@ -0,0 +1,111 @@
+import sys
+import os
+import argparse
+import glob
+import statistics
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+import chromadb
+import numpy as np
+
+from app.database.vector_store import hnsw_configuration
+
+def synthetic_corpus(num_vectors: int, dim: int, rng: "np.random.Generator"):
+    """Clustered vectors, roughly like embeddings of a few topics"""
+    centers = rng.normal(size=(max(num_vectors // 200, 1), dim))
+    labels = rng.integers(len(centers), size=num_vectors)
+    return (centers[labels] + 0.5 * rng.normal(size=(num_vectors, dim))).astype(np.float32)
+
+def pdf_corpus(num_vectors: int):
+    """Embeddings of the sample PDF chunks in uploads/ (configured embedding backend)"""
+    from app.core.embeddings import create_embedding_provider
+    from app.utils.chunker import TextChunker
+    from app.utils.pdf_processor import PDFProcessor
+
+    chunks = []
+    chunker = TextChunker()
+    for pdf_path in sorted(glob.glob(os.path.join(backend_dir, "uploads", "*.pdf"))):
+        chunks.extend(chunk["text"] for chunk in chunker.iter_chunks(PDFProcessor.iter_pages(pdf_path)))
+    chunks = list(dict.fromkeys(chunks))[:num_vectors]
+    return np.asarray(create_embedding_provider().embed(chunks), dtype=np.float32)
+
+def exact_neighbours(corpus: "np.ndarray", queries: "np.ndarray", k: int, space: str):
+    """Brute-force top-k ids in the same distance space as the index"""
+    if space == "cosine":
+        corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    if space in ("cosine", "ip"):
+        distances = -(queries @ corpus.T)
+    else:
+        distances = (queries ** 2).sum(1)[:, None] - 2 * queries @ corpus.T + (corpus ** 2).sum(1)[None, :]
+    return np.argsort(distances, axis=1)[:, :k]
+
+def benchmark_ann_params(corpus, num_queries: int, k: int, space: str, ms, construction_efs, search_efs):
+    """Recall@k against exact search and query latency for each HNSW setting"""
+    rng = np.random.default_rng(1)
+    picks = rng.integers(len(corpus), size=num_queries)
+    queries = corpus[picks] + 0.3 * rng.normal(size=(num_queries, corpus.shape[1])).astype(np.float32)
+    truth = exact_neighbours(corpus, queries, k, space)
+    ids = [str(i) for i in range(len(corpus))]
+    client = chromadb.Client()
+
+    print(f"{len(corpus)} vectors, dim {corpus.shape[1]}, {num_queries} queries, space {space}\n")
+    print(f"{'M':>4} {'build ef':>9} {'search ef':>10} {'build s':>8} {f'recall@{k}':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    print("-" * 64)
+
+    for m in ms:
+        for construction_ef in construction_efs:
+            for search_ef in search_efs:
+                # A loaded index keeps the ef it was opened with, so each setting gets its own build
+                name = f"bench_m{m}_ef{construction_ef}_{search_ef}"
+                started = time.perf_counter()
+                collection = client.create_collection(
+                    name=name,
+                    configuration=hnsw_configuration(space, m, construction_ef, search_ef),
+                    embedding_function=None
+                )
+                for i in range(0, len(corpus), 5000):
+                    collection.add(ids=ids[i:i + 5000], embeddings=corpus[i:i + 5000])
+                build_seconds = time.perf_counter() - started
+
+                timings, recalls = [], []
+                for query, expected in zip(queries, truth):
+                    started = time.perf_counter()
+                    found = collection.query(query_embeddings=[query], n_results=k, include=[])["ids"][0]
+                    timings.append((time.perf_counter() - started) * 1000)
+                    recalls.append(len(set(found) & {str(i) for i in expected}) / k)
+                timings.sort()
+                print(f"{m:>4} {construction_ef:>9} {search_ef:>10} {build_seconds:>8.1f} "
+                      f"{statistics.mean(recalls):>10.3f} {statistics.median(timings):>8.2f} "
+                      f"{timings[int(len(timings) * 0.99) - 1]:>8.2f}")
+
+                client.delete_collection(name)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark HNSW recall and latency per index setting")
+    parser.add_argument("--corpus", choices=["synthetic", "pdfs"], default="synthetic")
+    parser.add_argument("--num-vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384, help="Vector size of the synthetic corpus")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--space", choices=["l2", "cosine", "ip"], default="l2")
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 50, 100, 200])
+    args = parser.parse_args()
+
+    if args.corpus == "pdfs":
+        corpus = pdf_corpus(args.num_vectors)
+    else:
+        corpus = synthetic_corpus(args.num_vectors, args.dim, np.random.default_rng(0))
+
+    print("=" * 60)
+    print("ANN Index Benchmark")
+    print("=" * 60)
+
+    benchmark_ann_params(corpus, args.num_queries, args.k, args.space, args.m, args.construction_ef, args.search_ef)
+
+    print("=" * 60)
@@ -0,0 +1,180 @@
+import sys
+import os
+import argparse
+import asyncio
+import random
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+import json
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# Throwaway stores, and OpenRouter replaced by the mock endpoint below
+PORT = free_port()
+scratch = tempfile.mkdtemp(prefix="bench_async_")
+os.environ.setdefault("CHUNK_STORE_DIR", os.path.join(scratch, "chunks"))
+os.environ.setdefault("CHROMA_PERSIST_DIR", os.path.join(scratch, "chroma"))
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ["ANSWER_CACHE_BACKEND"] = "none"
+os.environ["LLM_RATE_LIMIT_PER_MINUTE"] = "0"  # The mock has no rate limit to stay under
+os.environ["OPENROUTER_BASE_URL"] = f"http://127.0.0.1:{PORT}/v1"
+
+from app.core.rag_engine import RAGEngine
+
+WORDS = ("ball pass shot goal pitch player coach sprint tackle keeper defence "
+         "attack hydration energy muscle training match league season kick").split()
+
+class MockOpenRouter:
+    """Chat completions endpoint that answers after a fixed delay (or streams tokens across it)"""
+
+    num_tokens = 20
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = set()
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self.complete)
+
+    async def complete(self, request: Request):
+        body = await request.json()
+        self.connections.add(request.client.port)  # One client port per TCP connection
+        if body.get("stream"):
+            return StreamingResponse(self.stream(body["model"]), media_type="text/event-stream")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        return {
+            "id": "mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "Mock answer."},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 3, "total_tokens": 103}
+        }
+
+    async def stream(self, model: str):
+        """Tokens spread evenly over the latency, then usage, like OpenRouter with include_usage"""
+        for number in range(self.num_tokens):
+            await asyncio.sleep(self.latency / self.num_tokens)
+            chunk = {
+                "id": "mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": f"token{number} "}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        usage = {"prompt_tokens": 100, "completion_tokens": self.num_tokens, "total_tokens": 100 + self.num_tokens}
+        yield f"data: {json.dumps({'id': 'mock', 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model, 'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    def reset(self):
+        self.max_in_flight = 0
+        self.connections = set()
+
+    def start(self):
+        server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=PORT, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+
+async def run_batch(engine: RAGEngine, questions, use_async: bool):
+    """Serve the questions concurrently from one event loop, as one uvicorn worker would"""
+    latencies = []
+    started = time.perf_counter()
+
+    async def handle(question: str):
+        # Measured from when all requests arrived, so time spent queued counts
+        if use_async:
+            result = await engine.aquery(question)
+        else:
+            result = engine.query(question)  # What the handler used to do
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert result["success"], result.get("error") or result.get("message")
+
+    await asyncio.gather(*(handle(question) for question in questions))
+    return time.perf_counter() - started, sorted(latencies)
+
+async def run_streams(engine: RAGEngine, questions):
+    """Stream the answers concurrently; time to first token and to the full answer"""
+    first_tokens, totals = [], []
+
+    async def handle(question: str):
+        started = time.perf_counter()
+        async for event in engine.astream_query(question):
+            assert event["type"] != "error", event.get("error") or event.get("message")
+            if event["type"] == "done":
+                first_tokens.append(event["ttft_ms"])
+        totals.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(handle(question) for question in questions))
+    return sorted(first_tokens), sorted(totals)
+
+def benchmark_async_queries(concurrency_levels, latency: float, num_docs: int):
+    """Compare blocking and async queries at several concurrency levels"""
+    mock = MockOpenRouter(latency)
+    mock.start()
+
+    rng = random.Random(0)
+    engine = RAGEngine()
+    engine.vector_store.add_document_batches([
+        {"doc_id": f"doc{number}", "chunks": [" ".join(rng.choice(WORDS) for _ in range(120)) for _ in range(20)]}
+        for number in range(num_docs)
+    ])
+    print(f"Mock LLM latency {latency * 1000:.0f} ms, {engine.vector_store.count()} chunks\n")
+
+    print(f"{'mode':>9} {'queries':>8} {'wall s':>7} {'q/s':>7} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'in flight':>10} {'conns':>6}")
+    print("-" * 72)
+
+    for concurrency in concurrency_levels:
+        questions = [" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(concurrency)]
+        for mode, use_async in (("blocking", False), ("async", True)):
+            mock.reset()
+            wall, latencies = asyncio.run(run_batch(engine, questions, use_async))
+            print(f"{mode:>9} {concurrency:>8} {wall:>7.2f} {concurrency / wall:>7.1f} "
+                  f"{statistics.median(latencies):>8.0f} {latencies[int(len(latencies) * 0.99) - 1]:>8.0f} "
+                  f"{mock.max_in_flight:>10} {len(mock.connections):>6}")
+
+    print(f"\n{'streamed':>9} {'ttft p50':>9} {'ttft p99':>9} {'full p50':>9}")
+    print("-" * 40)
+    for concurrency in concurrency_levels:
+        questions = [" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(concurrency)]
+        first_tokens, totals = asyncio.run(run_streams(engine, questions))
+        print(f"{concurrency:>9} {statistics.median(first_tokens):>9.0f} "
+              f"{first_tokens[int(len(first_tokens) * 0.99) - 1]:>9.0f} {statistics.median(totals):>9.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent and streamed queries from one event loop")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds the mock LLM takes per answer")
+    parser.add_argument("--num-docs", type=int, default=50)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Async Query Benchmark")
+    print("=" * 60)
+
+    benchmark_async_queries(args.concurrency, args.latency, args.num_docs)
+
+    print("=" * 60)
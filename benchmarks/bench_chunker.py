@@ -0,0 +1,60 @@
+import sys
+import os
+import glob
+import argparse
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.utils.chunker import TextChunker
+from app.utils.pdf_processor import PDFProcessor
+
+def build_corpus(size_mb: float) -> str:
+    """Repeat the sample PDFs' text up to roughly size_mb megabytes"""
+    texts = [
+        PDFProcessor.extract_text_from_pdf(pdf_path)["full_text"]
+        for pdf_path in sorted(glob.glob(os.path.join(backend_dir, "uploads", "*.pdf")))
+    ]
+    sample = "\n\n".join(texts)
+    repeats = max(1, int(size_mb * 1_000_000 / len(sample)))
+    return "\n\n".join([sample] * repeats)
+
+def pathological_corpus(size_mb: float) -> str:
+    """Short sentences: a break lands in every window's overlap region"""
+    sentence = "Tiny. "
+    return sentence * int(size_mb * 1_000_000 / len(sentence))
+
+def benchmark_chunker(text: str, label: str, configs):
+    """Time chunking a text with each (unit, chunk_size, overlap)"""
+    print(f"\n{label}: {len(text) / 1_000_000:.1f} MB")
+    print(f"{'unit':>7} {'size':>6} {'overlap':>8} {'chunks':>8} {'seconds':>8} {'MB/s':>7}")
+    print("-" * 50)
+    for unit, chunk_size, overlap in configs:
+        chunker = TextChunker(chunk_size=chunk_size, overlap=overlap, unit=unit)
+        started = time.perf_counter()
+        num_chunks = sum(1 for _ in chunker.chunk_text(text))
+        elapsed = time.perf_counter() - started
+        print(f"{unit:>7} {chunk_size:>6} {overlap:>8} {num_chunks:>8} {elapsed:>8.2f} "
+              f"{len(text) / 1_000_000 / elapsed:>7.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the text chunker")
+    parser.add_argument("--size-mb", type=float, default=10)
+    args = parser.parse_args()
+
+    configs = [
+        ("chars", 1000, 200),
+        ("chars", 4000, 400),
+        ("tokens", 256, 50),
+        ("tokens", 512, 64),
+    ]
+
+    print("=" * 60)
+    print("Chunker Benchmark")
+    print("=" * 60)
+
+    benchmark_chunker(build_corpus(args.size_mb), "Sample PDFs", configs)
+    benchmark_chunker(pathological_corpus(args.size_mb), "Breaks inside the overlap", configs)
+
+    print("=" * 60)
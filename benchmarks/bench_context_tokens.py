@@ -0,0 +1,87 @@
+import sys
+import os
+import argparse
+import glob
+import statistics
+import tempfile
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Index the sample PDFs into throwaway stores, not the real ones
+scratch = tempfile.mkdtemp(prefix="bench_context_")
+os.environ.setdefault("CHUNK_STORE_DIR", os.path.join(scratch, "chunks"))
+os.environ.setdefault("CHROMA_PERSIST_DIR", os.path.join(scratch, "chroma"))
+os.environ.setdefault("ANSWER_CACHE_BACKEND", "none")
+
+from app.core.context_packer import CONTEXT_SEPARATOR
+from app.core.rag_engine import RAGEngine
+
+QUESTIONS = [
+    "What are the main forces acting on the ball during a kick?",
+    "How much fluid should players drink during a match?",
+    "What should a footballer eat before a game?",
+    "Which muscles are most active when sprinting?",
+    "How does dehydration affect performance?",
+    "What is the role of carbohydrates in recovery?",
+    "How is kicking technique analysed?",
+    "What are the risks of heading the ball?",
+]
+
+def logged_questions(limit: int):
+    """Most recent questions from the MongoDB query log"""
+    # Imported here: only this mode needs a MongoDB connection
+    from app.database.mongodb import mongodb
+    cursor = mongodb.queries.find({}, {"question": 1}).sort("timestamp", -1).limit(limit)
+    return [entry["question"] for entry in cursor if entry.get("question")]
+
+def benchmark_context_tokens(pdf_paths, questions, baseline_chunks: int):
+    """Compare context tokens of the raw top chunks with the packed context"""
+    engine = RAGEngine()
+    tokenizer = engine.context_packer.tokenizer
+
+    for number, path in enumerate(pdf_paths):
+        result = engine.process_and_store_pdf(path, doc_id=f"doc{number}")
+        assert result["success"], result.get("message")
+    print(f"Indexed {len(pdf_paths)} PDFs ({engine.vector_store.count()} chunks), "
+          f"budget {engine.context_budget(engine.llm_client.model)} tokens")
+
+    before, after = [], []
+    for question in questions:
+        # What the prompt used to get: the top chunks joined as retrieved
+        retrieval = engine.retrieve(question, n_results=baseline_chunks)
+        assert retrieval["success"], retrieval.get("error")
+        raw = CONTEXT_SEPARATOR.join(chunk["text"] for chunk in retrieval["chunks"])
+
+        built = engine.build_context(question)
+        assert built["success"], built.get("error")
+        before.append(tokenizer.count(raw))
+        after.append(built["report"]["context_tokens"])
+
+    reductions = [1 - a / b for a, b in zip(after, before) if b]
+
+    print(f"{'':>10} {'mean':>8} {'median':>8} {'max':>8}")
+    print("-" * 38)
+    for label, values in (("raw top-%d" % baseline_chunks, before), ("packed", after)):
+        print(f"{label:>10} {statistics.mean(values):>8.1f} {statistics.median(values):>8.1f} {max(values):>8}")
+    print(f"Token reduction: mean {statistics.mean(reductions):.1%}, "
+          f"median {statistics.median(reductions):.1%} over {len(questions)} questions")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark prompt context tokens before and after packing")
+    parser.add_argument("--pdfs", nargs="+", default=None, help="PDFs to index (default: uploads/*.pdf)")
+    parser.add_argument("--from-mongo", action="store_true", help="Replay questions from the MongoDB query log")
+    parser.add_argument("--limit", type=int, default=200, help="Questions to replay from the log")
+    parser.add_argument("--baseline-chunks", type=int, default=3, help="Chunks /query used to send unpacked")
+    args = parser.parse_args()
+
+    pdf_paths = args.pdfs or sorted(glob.glob(os.path.join(backend_dir, "uploads", "*.pdf")))
+    questions = logged_questions(args.limit) if args.from_mongo else QUESTIONS
+
+    print("=" * 60)
+    print("Context Token Benchmark")
+    print("=" * 60)
+
+    benchmark_context_tokens(pdf_paths, questions, args.baseline_chunks)
+
+    print("=" * 60)
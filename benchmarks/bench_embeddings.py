@@ -0,0 +1,57 @@
+import sys
+import os
+import glob
+import argparse
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.embeddings import OnnxEmbeddingProvider, HashingEmbeddingProvider
+from app.utils.pdf_processor import PDFProcessor
+from app.utils.chunker import TextChunker
+
+def load_sample_chunks(num_chunks: int):
+    """Chunk the sample PDFs in uploads/ and repeat them up to num_chunks"""
+    chunks = []
+    chunker = TextChunker()
+    for pdf_path in sorted(glob.glob(os.path.join(backend_dir, "uploads", "*.pdf"))):
+        pages = PDFProcessor.iter_pages(pdf_path)
+        chunks.extend(chunk["text"] for chunk in chunker.iter_chunks(pages))
+    return [chunks[i % len(chunks)] for i in range(num_chunks)]
+
+def benchmark_embeddings(backend: str, batch_sizes, worker_counts, num_chunks: int):
+    """Report chunks/sec for each batch size and worker count"""
+    chunks = load_sample_chunks(num_chunks)
+    provider_class = OnnxEmbeddingProvider if backend == "onnx" else HashingEmbeddingProvider
+
+    print(f"Backend: {backend}, {len(chunks)} chunks\n")
+    print(f"{'batch':>6} {'workers':>8} {'seconds':>9} {'chunks/s':>10}")
+    print("-" * 36)
+
+    for workers in worker_counts:
+        for batch_size in batch_sizes:
+            provider = provider_class(batch_size=batch_size, max_workers=workers)
+            provider.embed(chunks[:batch_size])  # warm up (model load)
+
+            started = time.perf_counter()
+            provider.embed(chunks)
+            elapsed = time.perf_counter() - started
+
+            print(f"{batch_size:>6} {workers:>8} {elapsed:>9.2f} {len(chunks) / elapsed:>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark embedding throughput")
+    parser.add_argument("--backend", choices=["onnx", "hashing"], default="onnx")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 64, 128])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--num-chunks", type=int, default=1000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Embedding Throughput Benchmark")
+    print("=" * 60)
+
+    benchmark_embeddings(args.backend, args.batch_sizes, args.workers, args.num_chunks)
+
+    print("=" * 60)
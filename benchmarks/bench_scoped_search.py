@@ -0,0 +1,88 @@
+import sys
+import os
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Keep benchmark chunk text and indexes out of the real stores
+os.environ.setdefault("CHUNK_STORE_DIR", tempfile.mkdtemp(prefix="bench_chunks_"))
+os.environ.setdefault("CHROMA_PERSIST_DIR", tempfile.mkdtemp(prefix="bench_chroma_"))
+
+from app.core.embeddings import HashingEmbeddingProvider
+from app.database.vector_store import ChromaVectorStore
+
+WORDS = ("ball pass shot goal pitch player coach sprint tackle keeper defence "
+         "attack hydration energy muscle training match league season kick").split()
+
+def random_chunk(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(120))
+
+def add_documents(store: ChromaVectorStore, rng: random.Random, first: int, count: int, chunks_per_doc: int):
+    """Add `count` synthetic documents, numbered from `first`"""
+    store.add_document_batches([
+        {
+            "doc_id": f"doc{number}",
+            "chunks": [random_chunk(rng) for _ in range(chunks_per_doc)],
+            "metadata": {"user_id": f"user{number % 10}"}
+        }
+        for number in range(first, first + count)
+    ])
+
+def latency_ms(search, queries):
+    """Median and p99 latency of running search over each query"""
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        result = search(query)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert result["success"], result.get("error")
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+def benchmark_scoped_search(corpus_sizes, chunks_per_doc: int, num_queries: int, sharding: str):
+    """Compare unscoped and doc_id-scoped search as the corpus grows"""
+    rng = random.Random(0)
+    store = ChromaVectorStore(embedding_provider=HashingEmbeddingProvider(), sharding=sharding)
+    queries = [" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(num_queries)]
+    num_docs = 0
+
+    print(f"{'chunks':>8} {'all p50':>9} {'all p99':>9} {'doc p50':>9} {'doc p99':>9} {'user p50':>9}")
+    print("-" * 58)
+
+    for corpus_size in corpus_sizes:
+        target_docs = corpus_size // chunks_per_doc
+        while num_docs < target_docs:
+            count = min(50, target_docs - num_docs)
+            add_documents(store, rng, num_docs, count, chunks_per_doc)
+            num_docs += count
+
+        all_p50, all_p99 = latency_ms(lambda q: store.search(q, n_results=3), queries)
+        doc_p50, doc_p99 = latency_ms(
+            lambda q: store.search(q, n_results=3, doc_id=f"doc{rng.randrange(num_docs)}"),
+            queries
+        )
+        user_p50, _ = latency_ms(lambda q: store.search(q, n_results=3, user_id="user3"), queries)
+
+        print(f"{store.count():>8} {all_p50:>9.2f} {all_p99:>9.2f} "
+              f"{doc_p50:>9.2f} {doc_p99:>9.2f} {user_p50:>9.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scoped vs unscoped vector search")
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[1000, 5000, 20000, 50000])
+    parser.add_argument("--chunks-per-doc", type=int, default=50)
+    parser.add_argument("--num-queries", type=int, default=100)
+    parser.add_argument("--sharding", choices=["none", "user", "hash"], default="none")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Scoped Search Benchmark (latency in ms, sharding: {args.sharding})")
+    print("=" * 60)
+
+    benchmark_scoped_search(args.corpus_sizes, args.chunks_per_doc, args.num_queries, args.sharding)
+
+    print("=" * 60)
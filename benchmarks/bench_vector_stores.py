@@ -0,0 +1,106 @@
+import sys
+import os
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Keep benchmark chunk text and indexes out of the real stores
+scratch = tempfile.mkdtemp(prefix="bench_vector_stores_")
+os.environ.setdefault("CHUNK_STORE_DIR", os.path.join(scratch, "chunks"))
+os.environ.setdefault("CHROMA_PERSIST_DIR", os.path.join(scratch, "chroma"))
+
+parser = argparse.ArgumentParser(description="Benchmark ChromaDB against pgvector on the same corpus")
+parser.add_argument("--postgres-url", default=None, help="PostgreSQL with pgvector (default: POSTGRES_URL)")
+parser.add_argument("--num-docs", type=int, default=200)
+parser.add_argument("--chunks-per-doc", type=int, default=50)
+parser.add_argument("--num-queries", type=int, default=100)
+parser.add_argument("--k", type=int, default=5)
+args = parser.parse_args()
+
+# Settings are read on import, so the URL has to be in place first
+if args.postgres_url:
+    os.environ["POSTGRES_URL"] = args.postgres_url
+
+from app.core.embeddings import HashingEmbeddingProvider
+from app.database.pg_vector_store import PgVectorStore
+from app.database.vector_store import ChromaVectorStore, VectorStore
+
+WORDS = ("ball pass shot goal pitch player coach sprint tackle keeper defence "
+         "attack hydration energy muscle training match league season kick").split()
+
+def random_chunk(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(120))
+
+def load(store: VectorStore, batches) -> float:
+    """Write the corpus and return the seconds it took"""
+    started = time.perf_counter()
+    for i in range(0, len(batches), 50):
+        result = store.add_document_batches(batches[i:i + 50])
+        assert result["success"], result.get("error")
+    return time.perf_counter() - started
+
+def run_queries(store: VectorStore, queries, k: int, **filters):
+    """Median and p99 latency, plus the ids found for each query"""
+    timings, found = [], []
+    for query in queries:
+        started = time.perf_counter()
+        result = store.search(query, n_results=k, **filters)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert result["success"], result.get("error")
+        found.append(result["results"]["ids"][0])
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1], found
+
+def benchmark_vector_stores(num_docs: int, chunks_per_doc: int, num_queries: int, k: int):
+    """Compare ingest time, search latency and result overlap of both stores"""
+    rng = random.Random(0)
+    batches = [
+        {
+            "doc_id": f"bench_doc{number}",
+            "chunks": [random_chunk(rng) for _ in range(chunks_per_doc)],
+            "metadata": {"user_id": f"bench_user{number % 10}"}
+        }
+        for number in range(num_docs)
+    ]
+    queries = [" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(num_queries)]
+    scoped_doc = f"bench_doc{num_docs // 2}"
+    stores = {
+        "chroma": ChromaVectorStore(embedding_provider=HashingEmbeddingProvider()),
+        "pgvector": PgVectorStore(embedding_provider=HashingEmbeddingProvider())
+    }
+
+    print(f"{num_docs * chunks_per_doc} chunks, {num_queries} queries, top {k}\n")
+    print(f"{'store':>9} {'ingest s':>9} {'all p50':>8} {'all p99':>8} "
+          f"{'doc p50':>8} {'doc p99':>8} {'user p50':>9} {'user p99':>9}")
+    print("-" * 78)
+
+    found = {}
+    try:
+        for name, store in stores.items():
+            ingest_seconds = load(store, batches)
+            all_p50, all_p99, found[name] = run_queries(store, queries, k)
+            doc_p50, doc_p99, _ = run_queries(store, queries, k, doc_id=scoped_doc)
+            user_p50, user_p99, _ = run_queries(store, queries, k, user_id="bench_user3")
+            print(f"{name:>9} {ingest_seconds:>9.1f} {all_p50:>8.2f} {all_p99:>8.2f} "
+                  f"{doc_p50:>8.2f} {doc_p99:>8.2f} {user_p50:>9.2f} {user_p99:>9.2f}")
+    finally:
+        # pgvector writes to a shared database, so remove what was added
+        for batch in batches:
+            stores["pgvector"].delete_document(batch["doc_id"])
+
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(found["chroma"], found["pgvector"])]
+    print(f"\nTop-{k} overlap between stores: {statistics.mean(overlap):.1%}")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Vector Store Benchmark")
+    print("=" * 60)
+
+    benchmark_vector_stores(args.num_docs, args.chunks_per_doc, args.num_queries, args.k)
+
+    print("=" * 60)
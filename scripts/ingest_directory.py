@@ -0,0 +1,165 @@
+import sys
+import os
+import argparse
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.bulk_ingest import BulkIngestor, extract_document
+from app.core.config import settings
+from app.core.upload_index import UploadHashIndex
+from app.database.postgres import postgres_db
+from app.database.vector_store import create_vector_store
+from app.models.document import Document
+from app.utils.file_utils import save_with_hash
+
+UPLOAD_DIR = os.path.join(backend_dir, "uploads")
+
+# Extractions submitted per worker before waiting for results to be written
+IN_FLIGHT_PER_WORKER = 2
+
+def find_pdfs(directory: str, recursive: bool):
+    """PDF paths under a directory, sorted"""
+    if not recursive:
+        return sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(".pdf")
+        )
+    paths = []
+    for root, _, names in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in names if name.lower().endswith(".pdf"))
+    return sorted(paths)
+
+def copy_new_files(pdf_paths, index: UploadHashIndex, user_id: str):
+    """Copy PDFs whose content the user has not stored yet into the uploads directory"""
+    items = []
+    for source_path in pdf_paths:
+        doc_id = str(uuid.uuid4())
+        filename = os.path.basename(source_path)
+        file_path = os.path.join(UPLOAD_DIR, f"{doc_id}_{filename}")
+        with open(source_path, "rb") as source:
+            file_size, file_hash = save_with_hash(source, file_path)
+
+        existing = index.claim(user_id, file_hash, doc_id)
+        if existing is not None:
+            os.remove(file_path)
+            print(f"  skip {filename}: already stored as {existing['doc_id']}")
+            continue
+
+        items.append({
+            "doc_id": doc_id,
+            "filename": filename,
+            "file_path": file_path,
+            "file_size": file_size,
+            "file_hash": file_hash
+        })
+    return items
+
+def extract_all(items, workers: int):
+    """
+    Extract PDFs in worker processes, yielding results as they finish
+
+    Each result holds all of a document's chunks, and workers extract
+    faster than the vectors are written, so only a few extractions per
+    worker are in flight; the next PDF is submitted as a result is taken.
+    """
+    queued = iter(items)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def submit_next(in_flight):
+            for item in queued:
+                in_flight.add(executor.submit(
+                    extract_document,
+                    item["file_path"],
+                    settings.CHUNK_SIZE,
+                    settings.CHUNK_OVERLAP,
+                    settings.CHUNK_UNIT
+                ))
+                if len(in_flight) >= workers * IN_FLIGHT_PER_WORKER:
+                    break
+
+        in_flight = set()
+        submit_next(in_flight)
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+            submit_next(in_flight)
+
+def save_rows(rows):
+    postgres_db.add_all([Document(**row) for row in rows])
+
+def ingest(items, user_id: str, workers: int):
+    """Extract PDFs in worker processes and write them in groups"""
+    ingestor = BulkIngestor(create_vector_store(), save_rows)
+    items_by_path = {item["file_path"]: item for item in items}
+    failed = []
+
+    for done, extraction in enumerate(extract_all(items, workers), start=1):
+        item = items_by_path[extraction["pdf_path"]]
+        if not extraction["success"]:
+            print(f"  [{done}/{len(items)}] {item['filename']}: {extraction['message']}")
+            failed.append(item)
+            continue
+
+        print(f"  [{done}/{len(items)}] {item['filename']}: "
+              f"{extraction['num_pages']} pages, {len(extraction['chunks'])} chunks")
+        ingestor.add(
+            item["doc_id"],
+            extraction,
+            metadata={"user_id": user_id, "original_filename": item["filename"]},
+            row={
+                "id": item["doc_id"],
+                "filename": item["filename"],
+                "file_path": item["file_path"],
+                "file_size": item["file_size"],
+                "num_pages": extraction["num_pages"],
+                "user_id": user_id,
+                "file_hash": item["file_hash"],
+                "full_text": "",
+                "doc_metadata": {"user_id": user_id}
+            }
+        )
+    ingestor.flush()
+
+    for failure in ingestor.failed:
+        print(f"  failed {failure['filename']}: {failure['message']}")
+    failed_ids = {item["doc_id"] for item in failed} | {failure["doc_id"] for failure in ingestor.failed}
+    for item in items:
+        if item["doc_id"] in failed_ids and os.path.exists(item["file_path"]):
+            os.remove(item["file_path"])
+
+    return ingestor.summary()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest every PDF in a directory")
+    parser.add_argument("directory")
+    parser.add_argument("--user-id", default="default_user")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--recursive", action="store_true")
+    args = parser.parse_args()
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    postgres_db.create_tables()
+
+    print("=" * 60)
+    print(f"Ingesting {args.directory}")
+    print("=" * 60)
+
+    pdf_paths = find_pdfs(args.directory, args.recursive)
+    print(f"Found {len(pdf_paths)} PDF files")
+
+    index = UploadHashIndex(lookup=postgres_db.find_document_id_by_hash)
+    items = copy_new_files(pdf_paths, index, args.user_id)
+    print(f"{len(items)} new documents to ingest")
+
+    if items:
+        summary = ingest(items, args.user_id, args.workers)
+        print("=" * 60)
+        print(f"Documents: {summary['documents']} ingested, {summary['failed']} failed")
+        print(f"Pages:     {summary['pages']}")
+        print(f"Chunks:    {summary['chunks']}")
+        print(f"Time:      {summary['seconds']}s "
+              f"({summary['docs_per_second']} docs/s, {summary['pages_per_second']} pages/s)")
+    print("=" * 60)
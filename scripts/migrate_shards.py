@@ -0,0 +1,48 @@
+import sys
+import os
+import argparse
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.config import settings
+from app.database.vector_store import ChromaVectorStore
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Split the shared 'documents' collection into per-user shards"
+    )
+    parser.add_argument(
+        "--sharding", choices=["user", "hash"], default=None,
+        help="Target mode (default: VECTOR_SHARDING); set the same value in .env afterwards"
+    )
+    parser.add_argument("--batch-size", type=int, default=500, help="Chunks moved per batch")
+    args = parser.parse_args()
+
+    sharding = args.sharding or settings.VECTOR_SHARDING
+    if sharding == "none":
+        parser.error("VECTOR_SHARDING is 'none'; pass --sharding user or --sharding hash")
+
+    store = ChromaVectorStore(sharding=sharding)
+
+    print("=" * 60)
+    print(f"Migrating {store.collection.count()} chunks to '{sharding}' shards")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    result = store.migrate_to_shards(
+        batch_size=args.batch_size,
+        progress_callback=lambda moved, kept: print(f"  moved {moved}, kept {kept}")
+    )
+
+    print("=" * 60)
+    if result["success"]:
+        print(f"Chunks moved: {result['moved']} ({result['documents']} documents)")
+        print(f"Chunks kept:  {result['kept']} (no user_id)")
+        print(f"Shards:       {len(store.shard_names())}")
+        print(f"Time:         {time.perf_counter() - started:.1f}s")
+    else:
+        # Safe to re-run: moved chunks are already gone from the source
+        print(f"Migration stopped after {result['moved']} chunks: {result['error']}")
+    print("=" * 60)
@@ -0,0 +1,60 @@
+import sys
+import os
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.answer_cache import AnswerCache, LocalAnswerCache
+
+def test_answer_cache_hits_and_invalidation():
+    """Answers are reused for the same question and chunks until a document changes"""
+    print("Testing answer cache...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LocalAnswerCache(os.path.join(tmp, "answers.sqlite3"), ttl_seconds=60)
+        chunk_ids = ["doc1_chunk_0", "doc2_chunk_3"]
+        key = AnswerCache.make_key("What are the key dates?", None, chunk_ids, "model-a")
+
+        assert key == AnswerCache.make_key("what are the key dates", None, chunk_ids, "model-a")
+        assert key != AnswerCache.make_key("What are the key dates?", None, chunk_ids[:1], "model-a")
+        assert key != AnswerCache.make_key("What are the key dates?", "doc1", chunk_ids, "model-a")
+        assert key != AnswerCache.make_key("What are the key dates?", None, chunk_ids, "model-b")
+
+        assert cache.get(key) is None
+        cache.put(key, {"answer": "March 3rd.", "model": "model-a", "tokens_used": 42}, ["doc1", "doc2", None])
+        assert cache.get(key)["answer"] == "March 3rd."
+
+        assert cache.invalidate_document("doc9") == 0
+        assert cache.invalidate_document("doc2") == 1
+        assert cache.get(key) is None
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 2
+        cache.close()
+
+    print(f"✅ Answer cache works: {stats}")
+
+def test_answer_cache_ttl():
+    """Expired answers are not served"""
+    print("Testing answer cache TTL...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LocalAnswerCache(os.path.join(tmp, "answers.sqlite3"), ttl_seconds=0)
+        cache.put("k", {"answer": "stale"}, ["doc1"])
+        time.sleep(0.01)
+        assert cache.get("k") is None
+        cache.close()
+
+    print("✅ Answer cache TTL works")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Answer Cache")
+    print("=" * 60)
+
+    test_answer_cache_hits_and_invalidation()
+    test_answer_cache_ttl()
+
+    print("=" * 60)
@@ -0,0 +1,163 @@
+import sys
+import os
+import hashlib
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.bulk_ingest import BulkIngestor
+
+class FakeVectorStore:
+    """Records writes; the writes numbered in fail_writes are rejected"""
+
+    def __init__(self, fail_writes=(), produced=None):
+        self.fail_writes = set(fail_writes)
+        self.produced = produced
+        self.read_before_write = []
+        self.writes = []
+        self.vectors = {}
+        self.deleted = []
+
+    def add_document_batches(self, batches):
+        self.writes.append(batches)
+        if self.produced is not None:
+            self.read_before_write.append(len(self.produced))
+        if len(self.writes) in self.fail_writes:
+            return False
+        for batch in batches:
+            for offset, text in enumerate(batch["chunks"]):
+                self.vectors[f"{batch['doc_id']}_chunk_{batch['start_index'] + offset}"] = text
+        return True
+
+    def delete_document(self, doc_id):
+        self.deleted.append(doc_id)
+        for chunk_id in [chunk_id for chunk_id in self.vectors if chunk_id.startswith(f"{doc_id}_chunk_")]:
+            del self.vectors[chunk_id]
+
+class FakeDatabase:
+    """save_documents stand-in; rows whose id is in bad_ids fail"""
+
+    def __init__(self, bad_ids=()):
+        self.bad_ids = set(bad_ids)
+        self.rows = []
+        self.transactions = 0
+
+    def save(self, rows):
+        self.transactions += 1
+        if any(row["id"] in self.bad_ids for row in rows):
+            raise ValueError("duplicate key")
+        self.rows.extend(rows)
+
+def streamed(doc_id, num_chunks, produced=None, fail_at=None):
+    """A stream_document-style extraction whose chunks are generated on demand"""
+    hasher = hashlib.md5()
+
+    def chunks():
+        for number in range(num_chunks):
+            if number == fail_at:
+                raise RuntimeError("broken page")
+            text = f"{doc_id} chunk {number}"
+            hasher.update(text.encode())
+            if produced is not None:
+                produced.append(number)
+            yield {"text": text, "page_number": 1, "start": 0, "end": len(text)}
+
+    return {"pdf_path": f"/uploads/{doc_id}.pdf", "num_pages": 1, "chunks": chunks(), "hasher": hasher}
+
+def row(doc_id):
+    return {"id": doc_id, "filename": f"{doc_id}.pdf", "num_pages": 1}
+
+def test_chunks_are_written_while_streaming():
+    """A long document goes out in vector batches before its last chunk is read"""
+    print("Testing streamed writes...")
+
+    produced = []
+    store, database = FakeVectorStore(produced=produced), FakeDatabase()
+    ingestor = BulkIngestor(store, database.save, vector_batch_size=10, db_batch_size=100)
+    extraction = streamed("doc1", 25, produced)
+    ingestor.add("doc1", extraction, metadata={"user_id": "alice"}, row=row("doc1"))
+
+    assert [sum(len(batch["chunks"]) for batch in write) for write in store.writes] == [10, 10]
+    assert store.read_before_write == [10, 20]  # Never more than one batch held
+    assert database.rows == []  # The row waits for the last vectors
+    ingestor.flush()
+
+    assert len(store.vectors) == 25 and store.vectors["doc1_chunk_24"] == "doc1 chunk 24"
+    assert database.rows[0]["num_chunks"] == 25
+    assert database.rows[0]["doc_hash"] == extraction["hasher"].hexdigest()
+    assert ingestor.summary()["chunks"] == 25 and ingestor.saved_ids == ["doc1"]
+    print(f"✅ 25 chunks written as {[len(write[0]['chunks']) for write in store.writes]}")
+
+def test_documents_share_vector_batches():
+    """Small documents are grouped into one write and one transaction"""
+    print("Testing grouped writes...")
+
+    store, database = FakeVectorStore(), FakeDatabase()
+    ingestor = BulkIngestor(store, database.save, vector_batch_size=100, db_batch_size=100)
+    for doc_id in ("doc1", "doc2", "doc3"):
+        ingestor.add(doc_id, streamed(doc_id, 4), metadata={}, row=row(doc_id))
+    ingestor.flush()
+
+    assert len(store.writes) == 1 and len(store.writes[0]) == 3
+    assert database.transactions == 1 and len(database.rows) == 3
+    print("✅ 3 documents in one write and one transaction")
+
+def test_failed_vector_write():
+    """A rejected write removes the document's earlier vectors and skips its row"""
+    print("Testing failed vector write...")
+
+    store, database = FakeVectorStore(fail_writes={2}), FakeDatabase()
+    ingestor = BulkIngestor(store, database.save, vector_batch_size=10, db_batch_size=100)
+    ingestor.add("doc1", streamed("doc1", 25), metadata={}, row=row("doc1"))
+    ingestor.add("doc2", streamed("doc2", 3), metadata={}, row=row("doc2"))
+    ingestor.flush()
+
+    assert "doc1" in store.deleted
+    assert not any(chunk_id.startswith("doc1_") for chunk_id in store.vectors)
+    assert [saved["id"] for saved in database.rows] == ["doc2"]
+    assert [failure["doc_id"] for failure in ingestor.failed] == ["doc1"]
+    print("✅ Failed document fully removed, the next one stored")
+
+def test_extraction_error_mid_document():
+    """A PDF that breaks part-way leaves no vectors behind"""
+    print("Testing extraction error...")
+
+    store, database = FakeVectorStore(), FakeDatabase()
+    ingestor = BulkIngestor(store, database.save, vector_batch_size=10, db_batch_size=100)
+    ingestor.add("doc1", streamed("doc1", 30, fail_at=15), metadata={}, row=row("doc1"))
+    ingestor.add("doc2", streamed("doc2", 0), metadata={}, row=row("doc2"))
+    ingestor.flush()
+
+    assert store.vectors == {} and database.rows == []
+    failures = {failure["doc_id"]: failure["message"] for failure in ingestor.failed}
+    assert "broken page" in failures["doc1"]
+    assert failures["doc2"] == "No text could be extracted from the PDF"
+    print(f"✅ Failures recorded: {failures}")
+
+def test_bad_row_does_not_sink_batch():
+    """A failing insert is retried row by row; only the bad document is removed"""
+    print("Testing row-by-row retry...")
+
+    store, database = FakeVectorStore(), FakeDatabase(bad_ids={"doc2"})
+    ingestor = BulkIngestor(store, database.save, vector_batch_size=100, db_batch_size=100)
+    for doc_id in ("doc1", "doc2", "doc3"):
+        ingestor.add(doc_id, streamed(doc_id, 2), metadata={}, row=row(doc_id))
+    ingestor.flush()
+
+    assert [saved["id"] for saved in database.rows] == ["doc1", "doc3"]
+    assert store.deleted == ["doc2"]
+    assert ingestor.summary()["documents"] == 2 and ingestor.summary()["failed"] == 1
+    print("✅ Good rows saved, bad document removed")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Bulk Ingestion")
+    print("=" * 60)
+
+    test_chunks_are_written_while_streaming()
+    test_documents_share_vector_batches()
+    test_failed_vector_write()
+    test_extraction_error_mid_document()
+    test_bad_row_does_not_sink_batch()
+
+    print("=" * 60)
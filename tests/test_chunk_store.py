@@ -0,0 +1,46 @@
+import sys
+import os
+import tempfile
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.database.chunk_store import ChunkTextStore, split_chunk_id
+
+def test_chunk_store_roundtrip():
+    """Chunks appended in batches read back by index"""
+    print("Testing chunk text store...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChunkTextStore(tmp)
+        store.append("doc1", 0, ["First chunk.", "Zweiter Abschnitt – ü"])
+        store.append("doc1", 2, ["Third chunk."])
+
+        assert store.get("doc1", 1) == "Zweiter Abschnitt – ü"
+        assert store.get_many([("doc1", 2), ("doc1", 0), ("doc1", 3), ("missing", 0)]) == [
+            "Third chunk.", "First chunk.", None, None
+        ]
+        assert split_chunk_id("doc1_chunk_2") == ("doc1", 2)
+        assert store.count("doc1") == 3
+        assert store.count("missing") == 0
+
+        # Re-ingesting from index 0 replaces the document
+        store.append("doc1", 0, ["Replaced."])
+        assert store.get("doc1", 0) == "Replaced."
+        assert store.get("doc1", 1) is None
+        assert store.count("doc1") == 1
+
+        assert store.delete("doc1") > 0
+        assert store.get("doc1", 0) is None
+        assert store.get("../doc1", 0) is None
+
+    print("✅ Chunk store round trip works")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Chunk Store")
+    print("=" * 60)
+
+    test_chunk_store_roundtrip()
+
+    print("=" * 60)
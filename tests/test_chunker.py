@@ -0,0 +1,74 @@
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.utils.chunker import TextChunker, PAGE_SEPARATOR
+
+def test_chunker_makes_progress():
+    """Sentence breaks inside the overlap used to loop forever"""
+    print("Testing chunker progress...")
+
+    text = "Tiny. " * 2000
+    chunks = TextChunker(chunk_size=100, overlap=90).chunk_text(text)
+
+    assert chunks
+    assert all(len(chunk["text"]) <= 100 for chunk in chunks)
+    assert all(a["start"] <= b["start"] for a, b in zip(chunks, chunks[1:]))
+    assert chunks[-1]["end"] == len(text.rstrip())
+
+    print(f"✅ {len(chunks)} chunks, chunking terminated")
+
+def test_chunk_offsets_and_pages():
+    """Offsets point into the joined full text and pages are tracked"""
+    pages = [
+        {"page_number": 1, "text": "First page talks about hydration. " * 20},
+        {"page_number": 2, "text": "Second page covers recovery meals. " * 20},
+        {"page_number": 3, "text": "Third page lists references. " * 20},
+    ]
+    full_text = PAGE_SEPARATOR.join(page["text"] for page in pages)
+
+    chunks = list(TextChunker(chunk_size=200, overlap=40).iter_chunks(pages))
+
+    for chunk in chunks:
+        assert full_text[chunk["start"]:chunk["end"]] == chunk["text"]
+    assert [chunk["index"] for chunk in chunks] == list(range(len(chunks)))
+    assert chunks[0]["page_number"] == 1
+    assert chunks[-1]["page_number"] == 3
+    assert {chunk["page_number"] for chunk in chunks} == {1, 2, 3}
+
+    print(f"✅ {len(chunks)} chunks with exact offsets across 3 pages")
+
+def test_token_sized_chunks():
+    """Token mode keeps every chunk within the token budget"""
+    chunker = TextChunker(chunk_size=32, overlap=8, unit="tokens")
+    text = "Players should drink 500 ml of fluid, two hours before kick-off! " * 100
+
+    chunks = chunker.chunk_text(text)
+
+    assert len(chunks) > 1
+    assert all(chunker.tokenizer.count(chunk["text"]) <= 32 for chunk in chunks)
+
+    print(f"✅ {len(chunks)} token-sized chunks ({chunker.tokenizer.name} tokenizer)")
+
+def test_invalid_overlap():
+    """Overlap must be smaller than the chunk size"""
+    try:
+        TextChunker(chunk_size=100, overlap=100)
+    except ValueError:
+        print("✅ Invalid overlap rejected")
+        return
+    raise AssertionError("overlap >= chunk_size was accepted")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Text Chunker")
+    print("=" * 60)
+
+    test_chunker_makes_progress()
+    test_chunk_offsets_and_pages()
+    test_token_sized_chunks()
+    test_invalid_overlap()
+
+    print("=" * 60)
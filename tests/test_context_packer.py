@@ -0,0 +1,102 @@
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.config import settings
+from app.core.context_packer import ContextPacker, CONTEXT_SEPARATOR
+from app.core.rag_engine import RAGEngine
+
+def test_pack_within_budget():
+    """Passages fill the budget in order and the last one ends at a sentence"""
+    print("Testing context packer...")
+
+    packer = ContextPacker(min_trimmed_tokens=5)
+    count = packer.tokenizer.count
+    first = {"chunk_id": "d_chunk_0", "text": "The match starts at noon. Players arrive early."}
+    second = {
+        "chunk_id": "d_chunk_7",
+        "start_offset": 500,
+        "end_offset": 600,
+        "text": "Drink water before kick-off. Eat carbohydrates the night before. Rest well after the game."
+    }
+    third = {"chunk_id": "d_chunk_9", "text": "Never reached."}
+
+    # Everything fits
+    roomy = packer.pack([first, second], budget=1000)
+    assert roomy["context"] == first["text"] + CONTEXT_SEPARATOR + second["text"]
+    assert not roomy["trimmed"]
+
+    # Room for the first passage and part of the second
+    budget = count(first["text"]) + packer.separator_tokens + count("Drink water before kick-off. Eat")
+    packed = packer.pack([first, second, third], budget=budget)
+    assert [p["chunk_id"] for p in packed["passages"]] == ["d_chunk_0", "d_chunk_7"]
+    assert packed["passages"][1]["text"] == "Drink water before kick-off."
+    assert packed["passages"][1]["end_offset"] == 500 + len("Drink water before kick-off.")
+    assert packed["trimmed"]
+    assert packed["tokens"] <= budget
+    assert second["text"].startswith("Drink water before kick-off. Eat")  # input left untouched
+
+    # Nothing fits
+    assert packer.pack([first], budget=3)["passages"] == []
+
+    print(f"✅ Context packer works: {packed['tokens']} of {budget} tokens")
+
+def test_passage_without_sentence_ends():
+    """An over-budget passage with no sentence end is cut at a token boundary"""
+    print("Testing passage without sentence ends...")
+
+    packer = ContextPacker()
+    lines = "\n".join(f"Item {n}: shin pads, boots, water bottle" for n in range(80))
+    assert packer.tokenizer.count(lines) > 600
+
+    packed = packer.pack([{"chunk_id": "d_chunk_0", "start_offset": 0, "text": lines}], budget=400)
+    text = packed["passages"][0]["text"]
+    assert packed["trimmed"] and lines.startswith(text)
+    assert 390 <= packed["tokens"] <= 400 and packer.tokenizer.count(text) == packed["tokens"]
+    assert packed["passages"][0]["end_offset"] == len(text)
+    print(f"✅ Cut to {packed['tokens']} tokens instead of an empty context")
+
+def test_later_passages_still_tried():
+    """A passage that cannot be used does not stop smaller ones after it"""
+    print("Testing later passages...")
+
+    packer = ContextPacker(min_trimmed_tokens=20)
+    count = packer.tokenizer.count
+    first = {"chunk_id": "d_chunk_0", "text": "The match starts at noon. Players arrive early."}
+    long = {"chunk_id": "d_chunk_1", "text": "Warm up with a jog and stretches. " * 10}
+    short = {"chunk_id": "d_chunk_2", "text": "Bring water."}
+
+    budget = count(first["text"]) + 2 * packer.separator_tokens + count(short["text"]) + 2
+    packed = packer.pack([first, long, short], budget=budget)
+    assert [p["chunk_id"] for p in packed["passages"]] == ["d_chunk_0", "d_chunk_2"]
+    assert packed["tokens"] <= budget and not packed["trimmed"]
+    print("✅ Smaller passage used after one that did not fit")
+
+def test_budget_fits_every_model_tried():
+    """The context is packed for the smallest budget among the models that may answer"""
+    print("Testing budget across models...")
+
+    saved = settings.CONTEXT_TOKEN_BUDGETS
+    settings.CONTEXT_TOKEN_BUDGETS = {"big": 2000, "small": 800}
+    try:
+        assert RAGEngine.context_budget(["big"]) == 2000
+        assert RAGEngine.context_budget(["big", "small"]) == 800
+        assert RAGEngine.context_budget(["big", "other"]) == settings.CONTEXT_TOKEN_BUDGET
+        assert RAGEngine.context_budget([]) == settings.CONTEXT_TOKEN_BUDGET
+    finally:
+        settings.CONTEXT_TOKEN_BUDGETS = saved
+    print("✅ Smallest budget wins")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Context Packer")
+    print("=" * 60)
+
+    test_pack_within_budget()
+    test_passage_without_sentence_ends()
+    test_later_passages_still_tried()
+    test_budget_fits_every_model_tried()
+
+    print("=" * 60)
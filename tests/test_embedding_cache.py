@@ -0,0 +1,64 @@
+import sys
+import os
+import tempfile
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.embeddings import HashingEmbeddingProvider
+from app.core.embedding_cache import EmbeddingCache, CachedEmbeddingProvider
+
+def test_cache_hits_and_persistence():
+    """Cached texts skip the model and survive a reopen"""
+    print("Testing embedding cache...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        provider = HashingEmbeddingProvider()
+        cached = CachedEmbeddingProvider(provider, EmbeddingCache(path))
+
+        texts = ["Disclaimer: for information only.", "Header", "Disclaimer: for information only."]
+        first = cached.embed(texts)
+        assert provider.get_stats()["texts_embedded"] == 2  # duplicate embedded once
+        assert first[0] == first[2]
+
+        second = cached.embed(texts)
+        assert second == first
+        assert provider.get_stats()["texts_embedded"] == 2
+        assert cached.cache.hits == 3
+        cached.cache.close()
+
+        # Reopen: vectors are still there
+        reopened = EmbeddingCache(path)
+        key = EmbeddingCache.make_key(provider.model_id, "Header")
+        assert reopened.get(key) == first[1]
+        reopened.close()
+
+    print("✅ Cache hits served without embedding calls")
+
+def test_cache_lru_eviction():
+    """Least recently used entries go first once over the cap"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(os.path.join(tmp, "cache.sqlite3"), max_entries=10)
+
+        cache.put_many({f"k{i}": [float(i)] for i in range(10)})
+        cache.get("k0")  # k0 becomes most recently used
+        cache.put_many({"k10": [10.0]})
+
+        stats = cache.get_stats()
+        assert stats["entries"] <= 10
+        assert cache.get("k0") == [0.0]
+        assert cache.get("k1") is None
+        cache.close()
+
+    print(f"✅ Eviction keeps recently used entries: {stats}")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Embedding Cache")
+    print("=" * 60)
+
+    test_cache_hits_and_persistence()
+    test_cache_lru_eviction()
+
+    print("=" * 60)
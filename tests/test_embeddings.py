@@ -0,0 +1,45 @@
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.embeddings import HashingEmbeddingProvider
+
+def test_hashing_embeddings_are_deterministic():
+    """Same text gives the same unit vector, regardless of batching"""
+    print("Testing hashing embedding provider...")
+
+    texts = [f"Chunk number {i} about football nutrition." for i in range(50)]
+
+    serial = HashingEmbeddingProvider(batch_size=64).embed(texts)
+    batched = HashingEmbeddingProvider(batch_size=7, max_workers=3).embed(texts)
+
+    assert serial == batched
+    assert len(serial) == len(texts) and len(serial[0]) == 384
+    assert abs(sum(x * x for x in serial[0]) - 1.0) < 1e-9
+    assert serial[0] != serial[1]
+
+    print(f"✅ {len(texts)} texts embedded identically across batch sizes")
+
+def test_embedding_stats():
+    """Throughput counters track embedded texts"""
+    provider = HashingEmbeddingProvider(batch_size=4)
+    provider.embed(["a b c"] * 10)
+    provider.embed_query("a")
+
+    stats = provider.get_stats()
+    assert stats["texts_embedded"] == 11
+    assert stats["model_id"] == "hashing-384"
+
+    print(f"✅ Stats: {stats}")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Embedding Providers")
+    print("=" * 60)
+
+    test_hashing_embeddings_are_deterministic()
+    test_embedding_stats()
+
+    print("=" * 60)
@@ -0,0 +1,111 @@
+import sys
+import os
+import asyncio
+import time
+from types import SimpleNamespace
+import httpx
+import openai
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.llm_client import OpenRouterClient
+from app.core.model_stats import ModelStats
+from app.core.rate_limiter import ModelRateLimiter
+
+class FakeCompletions:
+    """Chat completions that answer after a set delay per model, or fail"""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+
+    async def create(self, model, **kwargs):
+        delay, fails = self.behaviour.get(model, (0.01, False))
+        await asyncio.sleep(delay)
+        if fails:
+            response = httpx.Response(429, request=httpx.Request("POST", "https://openrouter.ai/api/v1/chat/completions"))
+            raise openai.RateLimitError("Error code: 429 - rate limited", response=response, body=None)
+        message = SimpleNamespace(content=f"answer from {model}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+class FakeClient(OpenRouterClient):
+    def __init__(self, behaviour, hedge_delay: float):
+        super().__init__()
+        self.model = "primary"
+        self.fallback_models = ["second", "third"]
+        self.fallback_mode = "hedged"
+        self.hedge_delay = hedge_delay
+        self.stats = ModelStats()
+        self.rate_limiter = ModelRateLimiter(per_minute=0, burst=1, max_wait=0)
+        self.fake = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(behaviour)))
+
+    def async_client(self):
+        return self.fake
+
+def ask(client: OpenRouterClient):
+    started = time.perf_counter()
+    result = asyncio.run(client.agenerate_response("question", "context"))
+    return result, time.perf_counter() - started
+
+def test_hedge_wins_over_slow_primary():
+    """A slow primary is raced after the delay and cancelled when the hedge answers"""
+    print("Testing hedge against a slow primary...")
+
+    client = FakeClient({"primary": (2.0, False)}, hedge_delay=0.05)
+    result, elapsed = ask(client)
+
+    assert result["success"] and result["model"] == "second"
+    assert elapsed < 1.0
+    stats = client.stats.get_stats()
+    assert stats["hedges_started"] == 1 and stats["hedge_wins"] == 1
+    assert stats["models"]["primary"]["cancelled"] == 1
+    assert stats["models"]["second"]["wins"] == 1 and stats["models"]["second"]["p50_ms"] is not None
+    print(f"✅ Hedge answered in {elapsed * 1000:.0f} ms: {stats['models']}")
+
+def test_failure_starts_next_model_at_once():
+    """A failed request does not wait out the hedge delay"""
+    print("Testing failure replacement...")
+
+    client = FakeClient({"primary": (0.01, True)}, hedge_delay=5.0)
+    result, elapsed = ask(client)
+
+    assert result["success"] and result["model"] == "second"
+    assert elapsed < 1.0
+    assert client.stats.get_stats()["models"]["primary"]["failures"] == 1
+    print(f"✅ Next model started right after the failure ({elapsed * 1000:.0f} ms)")
+
+def test_fast_primary_is_not_hedged():
+    """No extra requests when the primary answers within the delay"""
+    print("Testing fast primary...")
+
+    client = FakeClient({}, hedge_delay=0.5)
+    result, _ = ask(client)
+
+    stats = client.stats.get_stats()
+    assert result["model"] == "primary"
+    assert stats["hedges_started"] == 0
+    assert [model for model, counters in stats["models"].items() if counters["requests"]] == ["primary"]
+    print("✅ Fast primary answered alone")
+
+def test_all_models_fail():
+    """Every model failing gives the usual failure response"""
+    print("Testing all models failing...")
+
+    client = FakeClient({model: (0.01, True) for model in ("primary", "second", "third")}, hedge_delay=0.05)
+    result, _ = ask(client)
+
+    assert not result["success"] and "429" in result["error"]
+    assert sum(model["failures"] for model in client.stats.get_stats()["models"].values()) == 3
+    print("✅ All failures reported")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Hedged Model Requests")
+    print("=" * 60)
+
+    test_hedge_wins_over_slow_primary()
+    test_failure_starts_next_model_at_once()
+    test_fast_primary_is_not_hedged()
+    test_all_models_fail()
+
+    print("=" * 60)
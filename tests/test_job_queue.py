@@ -0,0 +1,101 @@
+import sys
+import os
+import threading
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.job_queue import IngestionJobQueue, JOB_DONE, JOB_EXTRACTING, JOB_FAILED, JOB_QUEUED
+
+def wait_for(queue: IngestionJobQueue, job_id: str, status: str, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job and job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}: {queue.get(job_id)}")
+
+def test_status_transitions():
+    """Queued, progress reported by the task, then done or failed"""
+    print("Testing job status transitions...")
+
+    queue = IngestionJobQueue(max_workers=1, max_pending=5)
+    release = threading.Event()
+
+    def task(progress):
+        progress(JOB_EXTRACTING, message="Extracting")
+        release.wait(5)
+        return {"success": True, "num_pages": 3, "num_chunks": 7}
+
+    job_id = queue.submit(task, doc_id="doc1", filename="a.pdf")
+    assert queue.get(job_id)["status"] in (JOB_QUEUED, JOB_EXTRACTING)
+    wait_for(queue, job_id, JOB_EXTRACTING)
+    release.set()
+    job = wait_for(queue, job_id, JOB_DONE)
+    assert job["num_pages"] == 3 and job["num_chunks"] == 7
+
+    failed = queue.submit(lambda progress: {"success": False, "message": "bad pdf"}, doc_id="doc2", filename="b.pdf")
+    assert wait_for(queue, failed, JOB_FAILED)["message"] == "bad pdf"
+
+    def crash(progress):
+        raise RuntimeError("boom")
+
+    crashed = queue.submit(crash, doc_id="doc3", filename="c.pdf")
+    assert "boom" in wait_for(queue, crashed, JOB_FAILED)["message"]
+    queue.shutdown()
+    print("✅ queued -> extracting -> done, failures recorded")
+
+def test_queue_full():
+    """submit returns None once max_pending jobs are queued or running (the 503 path)"""
+    print("Testing full queue...")
+
+    queue = IngestionJobQueue(max_workers=1, max_pending=2)
+    release = threading.Event()
+    blocked = lambda progress: {"success": release.wait(5)}
+
+    first = queue.submit(blocked, doc_id="doc1", filename="a.pdf")
+    second = queue.submit(blocked, doc_id="doc2", filename="b.pdf")
+    assert first and second
+    assert queue.submit(blocked, doc_id="doc3", filename="c.pdf") is None
+
+    release.set()
+    wait_for(queue, second, JOB_DONE)
+    # The slot is released just after the job is marked done
+    deadline = time.monotonic() + 5
+    while queue.submit(blocked, doc_id="doc4", filename="d.pdf") is None:
+        assert time.monotonic() < deadline, "slot never came back"
+        time.sleep(0.01)
+    queue.shutdown()
+    print("✅ Full queue rejects, slots come back when jobs finish")
+
+def test_finished_jobs_expire():
+    """Finished jobs are dropped after the TTL and beyond the history cap"""
+    print("Testing job expiry...")
+
+    queue = IngestionJobQueue(max_workers=1, max_pending=10, job_ttl=0.2, max_finished=2)
+    done = lambda progress: {"success": True}
+
+    jobs = [queue.submit(done, doc_id=f"doc{n}", filename="a.pdf") for n in range(3)]
+    for job_id in jobs:
+        wait_for(queue, job_id, JOB_DONE)
+    assert queue.get(jobs[0]) is None  # Over the cap of 2
+    assert queue.get(jobs[2]) is not None
+
+    time.sleep(0.25)
+    assert queue.get(jobs[2]) is None
+    assert len(queue._jobs) == 0
+    queue.shutdown()
+    print("✅ Finished jobs expire")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Ingestion Job Queue")
+    print("=" * 60)
+
+    test_status_transitions()
+    test_queue_full()
+    test_finished_jobs_expire()
+
+    print("=" * 60)
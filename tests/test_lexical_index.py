@@ -0,0 +1,88 @@
+import sys
+import os
+import tempfile
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.database.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+def test_bm25_exact_terms():
+    """Codes and clause numbers are single terms and rank their chunk first"""
+    print("Testing BM25 index...")
+
+    assert tokenize("See clause 4.2.1 and part AB-1234.") == ["see", "clause", "4.2.1", "and", "part", "ab-1234"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = BM25Index(os.path.join(tmp, "bm25.sqlite3"))
+        index.add(
+            ["a_chunk_0", "a_chunk_1", "a_chunk_2"],
+            ["The warranty is described in clause 4.2.1 of the contract.",
+             "Replacement part AB-1234 ships within five days.",
+             "The contract ends after two years."],
+            doc_id="a", user_id="alice"
+        )
+        index.add(["b_chunk_0"], ["Clause 7 covers the contract for part XY-9."], doc_id="b", user_id="bob")
+
+        assert index.search("clause 4.2.1")[0][0] == "a_chunk_0"
+        assert index.search("AB-1234")[0][0] == "a_chunk_1"
+        assert [chunk_id for chunk_id, _ in index.search("contract", doc_ids=["b"])] == ["b_chunk_0"]
+        assert all(chunk_id.startswith("a_") for chunk_id, _ in index.search("contract", user_id="alice"))
+        assert index.search("nothing matches") == []
+
+        # Re-adding a chunk replaces it; deleting a document drops its terms
+        index.add(["a_chunk_1"], ["Replacement part CD-5678 ships within five days."], doc_id="a", user_id="alice")
+        assert index.search("AB-1234") == []
+        assert index.delete_document("b") == 1
+        assert index.search("XY-9") == []
+        stats = index.get_stats()
+        assert stats["chunks"] == 3
+        index.close()
+
+        # The index survives a reopen
+        reopened = BM25Index(os.path.join(tmp, "bm25.sqlite3"))
+        assert reopened.search("CD-5678")[0][0] == "a_chunk_1"
+        assert reopened.get_stats() == stats
+        reopened.close()
+
+    print(f"✅ BM25 index ranks exact terms: {stats}")
+
+def test_common_terms_are_bounded():
+    """Terms in most chunks are skipped, and no term reads more than max_postings"""
+    print("Testing common query terms...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = BM25Index(os.path.join(tmp, "bm25.sqlite3"), min_idf=0.5, max_postings=5)
+        texts = [f"the match report number {n}" for n in range(49)] + ["the keeper saved a penalty"]
+        index.add([f"a_chunk_{n}" for n in range(50)], texts, doc_id="a")
+
+        # "the" is everywhere: only "penalty" is scored
+        assert index.search("the penalty", n_results=10) == index.search("penalty", n_results=10)
+        assert [chunk_id for chunk_id, _ in index.search("the penalty", n_results=10)] == ["a_chunk_49"]
+
+        # Only common terms: the rarest is still used, capped at 5 postings
+        assert len(index.search("the match", n_results=50)) == 5
+        index.close()
+
+    print("✅ Common terms skipped, postings capped")
+
+def test_reciprocal_rank_fusion():
+    """Items ranked well by both lists come first"""
+    print("Testing reciprocal-rank fusion...")
+
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]], k=60)
+    assert [item for item, _ in fused] == ["a", "c", "b", "d"]
+    assert fused[0][1] == 1 / 61 + 1 / 62
+
+    print("✅ Reciprocal-rank fusion works")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Lexical Index")
+    print("=" * 60)
+
+    test_bm25_exact_terms()
+    test_common_terms_are_bounded()
+    test_reciprocal_rank_fusion()
+
+    print("=" * 60)
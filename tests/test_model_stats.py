@@ -0,0 +1,108 @@
+import sys
+import os
+import time
+import httpx
+import openai
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from types import SimpleNamespace
+from app.core.model_stats import ModelStats, is_transient, CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN
+
+MODELS = ["primary", "second", "third"]
+RATE_LIMITED = openai.RateLimitError(
+    "Error code: 429 - rate limited",
+    response=httpx.Response(429, request=httpx.Request("POST", "https://openrouter.ai/api/v1/chat/completions")),
+    body=None
+)
+
+def fail(stats: ModelStats, model: str, error: Exception = RATE_LIMITED, times: int = 1):
+    for _ in range(times):
+        stats.record_start(model)
+        stats.record_failure(model, error)
+
+def succeed(stats: ModelStats, model: str, latency_ms: float):
+    stats.record_start(model)
+    stats.record_win(model, latency_ms)
+
+def test_order_by_health_and_speed():
+    """Failing models drop back, faster models move ahead, unmeasured ones keep their place"""
+    print("Testing model ordering...")
+
+    stats = ModelStats()
+    assert stats.order(MODELS) == MODELS
+
+    succeed(stats, "primary", 900)
+    succeed(stats, "third", 200)
+    assert stats.order(MODELS) == ["third", "primary", "second"]
+
+    fail(stats, "third", RuntimeError("Error code: 500"))
+    assert stats.order(MODELS) == ["primary", "second", "third"]
+    print(f"✅ Order: {stats.order(MODELS)}")
+
+def test_circuit_opens_after_repeated_rate_limits():
+    """Only rate limits and timeouts in a row open the circuit"""
+    print("Testing circuit opening...")
+
+    stats = ModelStats(failure_threshold=3, cooldown=60)
+    fail(stats, "primary", RuntimeError("Error code: 400 - bad request"), times=5)
+    assert stats.get_stats()["models"]["primary"]["circuit"] == CIRCUIT_CLOSED
+
+    fail(stats, "second", times=2)
+    succeed(stats, "second", 300)
+    fail(stats, "second", times=2)
+    assert stats.get_stats()["models"]["second"]["circuit"] == CIRCUIT_CLOSED
+
+    fail(stats, "second", TimeoutError("Request timed out."))
+    model = stats.get_stats()["models"]["second"]
+    assert model["circuit"] == CIRCUIT_OPEN and model["retry_in_seconds"] > 0
+    assert "second" not in stats.order(MODELS)
+    print(f"✅ Circuit opened after 3 in a row: {model}")
+
+def test_half_open_probe():
+    """After the cooldown one request probes the model first; its outcome decides"""
+    print("Testing half-open probes...")
+
+    stats = ModelStats(failure_threshold=2, cooldown=0.05)
+    fail(stats, "primary", times=2)
+    assert stats.order(MODELS)[0] != "primary"
+
+    time.sleep(0.06)
+    assert stats.order(MODELS)[0] == "primary"
+    stats.record_start("primary")
+    assert "primary" not in stats.order(MODELS)  # Probe in flight
+    stats.record_failure("primary", RATE_LIMITED)
+    assert stats.get_stats()["models"]["primary"]["circuit"] == CIRCUIT_OPEN
+
+    time.sleep(0.06)
+    assert stats.get_stats()["models"]["primary"]["circuit"] == CIRCUIT_HALF_OPEN
+    succeed(stats, "primary", 150)
+    model = stats.get_stats()["models"]["primary"]
+    assert model["circuit"] == CIRCUIT_CLOSED and model["times_opened"] == 2
+    print(f"✅ Failed probe reopened, successful probe closed: {model}")
+
+def test_transient_errors():
+    """Transient means a rate limit or timeout by type or status, not by wording"""
+    print("Testing transient errors...")
+
+    assert is_transient(RATE_LIMITED)
+    assert is_transient(httpx.ReadTimeout("read timed out"))
+    assert is_transient(TimeoutError())
+    assert is_transient(SimpleNamespace(status_code=429))
+    for message in ("Could not generate a reply", "Content was moderated", "Use a separate key"):
+        assert not is_transient(RuntimeError(message))
+    assert not is_transient(SimpleNamespace(status_code=500))
+    print("✅ Only rate limits and timeouts are transient")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Model Health")
+    print("=" * 60)
+
+    test_order_by_health_and_speed()
+    test_circuit_opens_after_repeated_rate_limits()
+    test_half_open_probe()
+    test_transient_errors()
+
+    print("=" * 60)
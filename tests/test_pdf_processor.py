@@ -0,0 +1,46 @@
+import sys
+import os
+import glob
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.utils import pdf_processor
+from app.utils.pdf_processor import PDFProcessor
+
+def _sample_pdf():
+    """Pick the largest PDF from the uploads folder"""
+    pdfs = glob.glob(os.path.join(backend_dir, "uploads", "*.pdf"))
+    return max(pdfs, key=os.path.getsize)
+
+def test_parallel_extraction_matches_serial():
+    """Parallel extraction must produce exactly the serial output"""
+    print("Testing parallel PDF extraction...")
+
+    pdf_path = _sample_pdf()
+    serial = PDFProcessor.extract_text_from_pdf(pdf_path)
+    parallel = PDFProcessor.extract_text_from_pdf(pdf_path, max_workers=2, parallel_threshold=1)
+
+    assert serial["success"] and parallel["success"]
+    assert parallel["num_pages"] == serial["num_pages"]
+    assert parallel["pages"] == serial["pages"]
+    assert parallel["full_text"] == serial["full_text"]
+    assert parallel["doc_hash"] == serial["doc_hash"]
+
+    # A second PDF reuses the spawned workers instead of starting a pool
+    pool = pdf_processor._extract_pools[2]
+    assert pool._mp_context.get_start_method() == "spawn"
+    again = PDFProcessor.extract_text_from_pdf(pdf_path, max_workers=2, parallel_threshold=1)
+    assert again["pages"] == serial["pages"] and pdf_processor._extract_pools[2] is pool
+    pdf_processor.shutdown_extract_pools()
+
+    print(f"✅ {serial['num_pages']} pages extracted identically")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing PDF Processor")
+    print("=" * 60)
+
+    test_parallel_extraction_matches_serial()
+
+    print("=" * 60)
@@ -0,0 +1,79 @@
+import sys
+import os
+import tempfile
+
+import pytest
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Chunk text and the keyword index go to a scratch directory, vectors to POSTGRES_URL
+scratch = tempfile.mkdtemp(prefix="test_pgvector_")
+os.environ.setdefault("CHUNK_STORE_DIR", os.path.join(scratch, "chunks"))
+os.environ.setdefault("CHROMA_PERSIST_DIR", os.path.join(scratch, "chroma"))
+
+pytest.importorskip("pgvector")
+
+from sqlalchemy import text
+from app.core.embeddings import HashingEmbeddingProvider
+from app.database.pg_vector_store import PgVectorStore
+from app.database.postgres import postgres_db
+
+def require_postgres():
+    """Skip unless POSTGRES_URL points at a reachable PostgreSQL server"""
+    if postgres_db.engine.dialect.name != "postgresql":
+        pytest.skip("POSTGRES_URL is not a PostgreSQL database")
+    try:
+        with postgres_db.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        pytest.skip(f"PostgreSQL unreachable: {e}")
+
+def test_pg_vector_store():
+    """Test add, filtered search and delete against PostgreSQL with pgvector"""
+    print("Testing pgvector store...")
+
+    require_postgres()
+
+    store = PgVectorStore(embedding_provider=HashingEmbeddingProvider())
+    print("✅ Extension, table and index ready")
+
+    store.add_documents(
+        ["Hydration before kick-off keeps sprint speed up.", "Carbohydrates refill muscle glycogen."],
+        doc_id="test_pg_doc_a",
+        metadata={"user_id": "test_pg_user_a"}
+    )
+    store.add_documents(
+        ["Heading the ball repeatedly is a concussion risk."],
+        doc_id="test_pg_doc_b",
+        metadata={"user_id": "test_pg_user_b"}
+    )
+    print("✅ Chunks written")
+
+    result = store.search("hydration and sprint speed", n_results=2, doc_id="test_pg_doc_a")
+    assert result["success"], result.get("error")
+    assert result["results"]["metadatas"][0][0]["doc_id"] == "test_pg_doc_a"
+    assert "Hydration" in result["results"]["documents"][0][0]
+    print(f"✅ Doc-scoped search: {result['results']['documents'][0][0][:40]}...")
+
+    result = store.search("heading the ball", n_results=5, user_id="test_pg_user_b")
+    assert [metadata["doc_id"] for metadata in result["results"]["metadatas"][0]] == ["test_pg_doc_b"]
+    print("✅ User-scoped search only returns that user's chunks")
+
+    distances = store.search("muscle glycogen", n_results=3)["results"]["distances"][0]
+    assert distances == sorted(distances)
+    print("✅ Results ordered by distance")
+
+    assert store.delete_document("test_pg_doc_a")["success"]
+    assert store.delete_document("test_pg_doc_b")["success"]
+    assert store.search("hydration", n_results=3, doc_id="test_pg_doc_a")["results"]["ids"] == [[]]
+    print("✅ Test documents deleted")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing pgvector Store")
+    print("=" * 60)
+
+    test_pg_vector_store()
+
+    print("=" * 60)
@@ -0,0 +1,74 @@
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.query_cache import LRUCache, SearchResultCache
+
+def test_lru_cache():
+    """Least recently used entries are evicted first"""
+    print("Testing LRU cache...")
+
+    cache = LRUCache(max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]
+    cache.put("c", [3.0])
+
+    assert cache.get("b") is None
+    assert cache.get("c") == [3.0]
+    stats = cache.get_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["evictions"] == 1
+
+    disabled = LRUCache(max_entries=0)
+    disabled.put("a", [1.0])
+    assert disabled.get("a") is None
+
+    print(f"✅ LRU cache works: {stats}")
+
+def test_search_result_invalidation():
+    """Adding or deleting a document drops only the results it affects"""
+    print("Testing search result cache...")
+
+    cache = SearchResultCache(max_entries=10)
+    key = cache.make_key("What are the key dates?", 3)
+    assert key == cache.make_key("  what are the KEY dates ", 3)
+    assert key != cache.make_key("What are the key dates?", 5)
+
+    doc_key = cache.make_key("Summarize", 3, doc_id="doc1")
+    other_key = cache.make_key("Summarize", 3, doc_ids=["doc3", "doc2"])
+    assert other_key == cache.make_key("Summarize", 3, doc_ids=["doc2", "doc3"])
+
+    cache.put(key, ["doc1_chunk_0"])
+    cache.put(doc_key, ["doc1_chunk_4"], scope=cache.scope_of(doc_id="doc1"))
+    cache.put(other_key, ["doc2_chunk_1"], scope=cache.scope_of(doc_ids=["doc2", "doc3"]))
+
+    # A new document can show up in unscoped results, but not in other documents'
+    assert cache.invalidate_document("doc9") == 1
+    assert cache.get(key) is None
+    assert cache.get(doc_key) == ["doc1_chunk_4"]
+
+    assert cache.invalidate_document("doc2") == 1
+    assert cache.get(other_key) is None
+    assert cache.get(doc_key) == ["doc1_chunk_4"]
+
+    # A search that overlapped an invalidation does not store its result
+    generation = cache.generation
+    cache.invalidate_document("doc1")
+    cache.put(doc_key, ["doc1_chunk_4"], scope=cache.scope_of(doc_id="doc1"), generation=generation)
+    assert cache.get(doc_key) is None
+
+    stats = cache.get_stats()
+    assert stats["invalidations"] == 3
+    print(f"✅ Search result cache invalidation works: {stats}")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Query Caches")
+    print("=" * 60)
+
+    test_lru_cache()
+    test_search_result_invalidation()
+
+    print("=" * 60)
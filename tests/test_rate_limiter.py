@@ -0,0 +1,76 @@
+import sys
+import os
+import asyncio
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.rate_limiter import LocalRateLimitError, ModelRateLimiter, TokenBucket
+
+def test_token_bucket_queues_in_order():
+    """The burst goes out at once, later requests get increasing waits"""
+    print("Testing token bucket...")
+
+    bucket = TokenBucket(per_minute=600, burst=2)  # 10 per second
+    waits = [bucket.reserve(max_wait=1.0) for _ in range(4)]
+
+    assert waits[0] == 0 and waits[1] == 0
+    assert 0.05 < waits[2] < waits[3] <= 0.2
+    assert bucket.queued() == 2
+    assert bucket.reserve(max_wait=0.01) is None
+    print(f"✅ Waits: {[round(wait, 3) for wait in waits]}")
+
+def test_limiter_rejects_past_max_wait():
+    """Requests that would queue too long fail fast; unlimited models never wait"""
+    print("Testing per-model limiter...")
+
+    limiter = ModelRateLimiter(per_minute=60, burst=1, max_wait=0.5, overrides={"unlimited": 0})
+    limiter.acquire("limited")
+    try:
+        limiter.acquire("limited")
+        assert False, "second request should not fit in 0.5 s"
+    except LocalRateLimitError:
+        pass
+
+    started = time.perf_counter()
+    for _ in range(100):
+        limiter.acquire("unlimited")
+    assert time.perf_counter() - started < 0.1
+
+    stats = limiter.get_stats()
+    assert stats["rejected"] == 1 and list(stats["queued"]) == ["limited"]
+    print(f"✅ Limiter stats: {stats}")
+
+def test_async_acquire_spreads_requests():
+    """Concurrent async requests are spaced out instead of sent together"""
+    print("Testing async back-pressure...")
+
+    limiter = ModelRateLimiter(per_minute=1200, burst=1, max_wait=2.0)  # 20 per second
+
+    async def burst():
+        sent = []
+
+        async def request():
+            await limiter.aacquire("model")
+            sent.append(time.perf_counter())
+
+        await asyncio.gather(*(request() for _ in range(5)))
+        return sent
+
+    sent = asyncio.run(burst())
+    span = max(sent) - min(sent)
+    assert 0.15 < span < 0.5
+    assert limiter.get_stats()["waited"] == 4
+    print(f"✅ 5 requests spread over {span * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing LLM Rate Limiter")
+    print("=" * 60)
+
+    test_token_bucket_queues_in_order()
+    test_limiter_rejects_past_max_wait()
+    test_async_acquire_spreads_requests()
+
+    print("=" * 60)
@@ -0,0 +1,69 @@
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.reranker import merge_adjacent_chunks, mmr_select
+from app.utils.chunker import TextChunker
+
+def _references(doc_id, chunks):
+    return [
+        {
+            "chunk_id": f"{doc_id}_chunk_{chunk['index']}",
+            "doc_id": doc_id,
+            "chunk_index": chunk["index"],
+            "page_number": chunk["page_number"],
+            "start_offset": chunk["start"],
+            "end_offset": chunk["end"],
+            "text": chunk["text"]
+        }
+        for chunk in chunks
+    ]
+
+def test_merge_adjacent_chunks():
+    """Overlapping chunks become one passage without repeated text"""
+    print("Testing chunk merging...")
+
+    text = " ".join(f"Sentence number {i} talks about topic {i % 7}." for i in range(200))
+    chunks = _references("doc1", TextChunker(chunk_size=300, overlap=60).chunk_text(text))
+    other = _references("doc2", TextChunker(chunk_size=300, overlap=60).chunk_text("Another document."))
+
+    # Retrieval order: chunk 5, other doc, chunk 4, chunk 9, chunk 6
+    retrieved = [chunks[5], other[0], chunks[4], chunks[9], chunks[6]]
+    passages = merge_adjacent_chunks(retrieved)
+
+    assert [p["chunk_id"] for p in passages] == ["doc1_chunk_4", "doc2_chunk_0", "doc1_chunk_9"]
+    merged = passages[0]
+    assert merged["merged_chunk_ids"] == ["doc1_chunk_4", "doc1_chunk_5", "doc1_chunk_6"]
+    assert merged["text"] == text[merged["start_offset"]:merged["end_offset"]]
+    assert "merged_chunk_ids" not in passages[2]
+
+    separate = sum(len(chunk["text"]) for chunk in (chunks[4], chunks[5], chunks[6]))
+    print(f"✅ Merged 3 chunks: {separate} -> {len(merged['text'])} characters")
+
+def test_mmr_prefers_diverse_passages():
+    """A near-duplicate of the best passage loses to a different relevant one"""
+    print("Testing MMR selection...")
+
+    query = [1.0, 0.2, 0.0]
+    passages = [
+        [1.0, 0.1, 0.0],    # best match
+        [1.0, 0.08, 0.0],   # near-duplicate of the best
+        [0.7, 0.0, 0.7],    # relevant, different
+    ]
+    assert mmr_select(query, passages, k=2, lambda_mult=1.0) == [0, 1]
+    assert mmr_select(query, passages, k=2, lambda_mult=0.3) == [0, 2]
+    assert mmr_select(query, [], k=2) == []
+
+    print("✅ MMR selection works")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Reranker")
+    print("=" * 60)
+
+    test_merge_adjacent_chunks()
+    test_mmr_prefers_diverse_passages()
+
+    print("=" * 60)
@@ -0,0 +1,111 @@
+import sys
+import os
+import tempfile
+from contextlib import contextmanager
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.config import settings
+from app.core.embeddings import HashingEmbeddingProvider
+from app.database.shards import DEFAULT_COLLECTION, shard_name
+from app.database.vector_store import ChromaVectorStore
+
+DOCUMENTS = {
+    "alice_1": ("alice", ["Drink water before kick-off.", "Eat pasta the night before."]),
+    "alice_2": ("alice", ["Stretch after the match."]),
+    "bob_1": ("bob", ["The keeper dives to the left.", "Penalties are taken from eleven metres."]),
+    "shared": (None, ["The pitch is 105 metres long."]),
+}
+
+@contextmanager
+def scratch_store_dirs():
+    """Point the Chroma and chunk directories at a throwaway folder"""
+    saved = (settings.CHROMA_PERSIST_DIR, settings.CHUNK_STORE_DIR, settings.CHROMA_CLIENT, settings.VECTOR_SNAPSHOT_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.CHROMA_PERSIST_DIR = os.path.join(tmp, "chroma")
+        settings.CHUNK_STORE_DIR = os.path.join(tmp, "chunks")
+        settings.CHROMA_CLIENT = "persistent"
+        settings.VECTOR_SNAPSHOT_PATH = ""
+        try:
+            yield
+        finally:
+            settings.CHROMA_PERSIST_DIR, settings.CHUNK_STORE_DIR, settings.CHROMA_CLIENT, settings.VECTOR_SNAPSHOT_PATH = saved
+
+def add_documents(store: ChromaVectorStore):
+    assert store.add_document_batches([
+        {"doc_id": doc_id, "chunks": chunks, "metadata": {"user_id": user_id} if user_id else {}}
+        for doc_id, (user_id, chunks) in DOCUMENTS.items()
+    ])
+
+def result_ids(store: ChromaVectorStore, query: str, **scope):
+    result = store.search(query, n_results=10, **scope)
+    assert result["success"], result.get("error")
+    return set(result["results"]["ids"][0])
+
+def test_sharded_search():
+    """Users get their own collections and searches only open the ones they need"""
+    print("Testing sharded search...")
+
+    with scratch_store_dirs():
+        store = ChromaVectorStore(embedding_provider=HashingEmbeddingProvider(), sharding="user")
+        add_documents(store)
+
+        alice, bob = shard_name("alice", "user"), shard_name("bob", "user")
+        assert store.shard_names() == sorted([DEFAULT_COLLECTION, alice, bob])
+        assert store.count() == 6
+
+        assert result_ids(store, "water", user_id="alice") == {"alice_1_chunk_0", "alice_1_chunk_1", "alice_2_chunk_0"}
+        assert result_ids(store, "keeper", doc_id="bob_1") == {"bob_1_chunk_0", "bob_1_chunk_1"}
+        assert result_ids(store, "metres", doc_ids=["bob_1", "shared"]) == {"bob_1_chunk_0", "bob_1_chunk_1", "shared_chunk_0"}
+        unscoped = store.search("metres", n_results=10)  # Would open every shard
+        assert not unscoped["success"] and "user_id" in unscoped["error"]
+
+        assert store.delete_document("alice_2")["success"]
+        assert result_ids(store, "water", user_id="alice") == {"alice_1_chunk_0", "alice_1_chunk_1"}
+
+        # A restart only counts the default collection and opens no shard
+        restarted = ChromaVectorStore(embedding_provider=HashingEmbeddingProvider(), sharding="user")
+        assert restarted.startup["chunks"] == 1
+        assert restarted.shards.get_stats()["opened"] == 0
+
+    print("✅ Sharded search is scoped to the right collections")
+
+def test_migrate_to_shards():
+    """Chunks indexed before sharding move to their users' shards and stay searchable"""
+    print("Testing migration to shards...")
+
+    with scratch_store_dirs():
+        add_documents(ChromaVectorStore(embedding_provider=HashingEmbeddingProvider(), sharding="none"))
+
+        store = ChromaVectorStore(embedding_provider=HashingEmbeddingProvider(), sharding="user")
+        before = result_ids(store, "water", user_id="alice")
+        assert len(before) == 3  # Still in the default collection
+
+        progress = []
+        result = store.migrate_to_shards(batch_size=2, progress_callback=lambda moved, kept: progress.append(moved))
+        assert result["success"], result.get("error")
+        assert (result["moved"], result["kept"], result["documents"]) == (5, 1, 3)
+        assert progress[-1] == 5
+        assert store.collection.count() == 1
+        assert store.shards.get(shard_name("alice", "user")).count() == 3
+
+        assert result_ids(store, "water", user_id="alice") == before
+        assert result_ids(store, "keeper", doc_id="bob_1") == {"bob_1_chunk_0", "bob_1_chunk_1"}
+        assert store.count() == 6
+
+        # Re-running finds nothing left to move
+        again = store.migrate_to_shards()
+        assert (again["moved"], again["kept"]) == (0, 1)
+
+    print(f"✅ Migration moved {result['moved']} chunks, kept {result['kept']}")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Sharded Vector Store")
+    print("=" * 60)
+
+    test_sharded_search()
+    test_migrate_to_shards()
+
+    print("=" * 60)
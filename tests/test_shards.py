@@ -0,0 +1,91 @@
+import sys
+import os
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.database.shards import DEFAULT_COLLECTION, ShardMap, ShardPool, shard_name
+
+def test_shard_names():
+    """Users map to stable, valid collection names"""
+    print("Testing shard names...")
+
+    assert shard_name("alice", "none") == DEFAULT_COLLECTION
+    assert shard_name(None, "user") == DEFAULT_COLLECTION
+    assert shard_name("alice", "user") == shard_name("alice", "user")
+    assert shard_name("alice", "user") != shard_name("bob", "user")
+    assert shard_name("alice@example.com / team 1", "user").startswith("user_")
+
+    buckets = {shard_name(f"user{i}", "hash", num_buckets=4) for i in range(100)}
+    assert buckets == {f"shard_{i:04d}" for i in range(4)}
+
+    print(f"✅ Shard names work: {shard_name('alice', 'user')}")
+
+def test_shard_map():
+    """Documents remember their shard; unknown ones are in the default collection"""
+    print("Testing shard map...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "shard_map.sqlite3")
+        shard_map = ShardMap(path)
+        shard_map.assign({"doc1": "user_a", "doc2": "user_b"})
+        assert shard_map.lookup(["doc1", "doc2", "legacy"]) == {
+            "doc1": "user_a", "doc2": "user_b", "legacy": DEFAULT_COLLECTION
+        }
+        shard_map.forget("doc1")
+        shard_map.close()
+
+        reopened = ShardMap(path)
+        assert reopened.lookup(["doc1", "doc2"]) == {"doc1": DEFAULT_COLLECTION, "doc2": "user_b"}
+        reopened.close()
+
+    print("✅ Shard map works")
+
+def test_shard_pool():
+    """Shards open lazily and idle or excess handles are released"""
+    print("Testing shard pool...")
+
+    existing = {"documents"}
+    opened = []
+
+    def open_collection(name, create):
+        if create:
+            existing.add(name)
+        if name not in existing:
+            return None
+        opened.append(name)
+        return f"collection:{name}"
+
+    pool = ShardPool(open_collection, idle_seconds=0.05, max_open=2)
+    assert pool.get("user_a") is None
+    assert pool.get("user_a", create=True) == "collection:user_a"
+    assert pool.get("user_a") == "collection:user_a"
+    assert opened == ["user_a"]
+
+    # Over max_open the least recently used handle goes
+    pool.get("documents")
+    pool.get("user_a")
+    pool.get("user_b", create=True)
+    assert pool.get_stats()["open"] == 2
+    pool.get("documents")
+    assert opened.count("documents") == 2
+
+    time.sleep(0.1)
+    assert pool.evict_idle() == 2
+    stats = pool.get_stats()
+    assert stats["open"] == 0 and stats["evicted"] == 4
+
+    print(f"✅ Shard pool works: {stats}")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Vector Shards")
+    print("=" * 60)
+
+    test_shard_names()
+    test_shard_map()
+    test_shard_pool()
+
+    print("=" * 60)
@@ -0,0 +1,91 @@
+import sys
+import os
+import asyncio
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.single_flight import SingleFlight
+
+class Upstream:
+    """Counts calls and answers after a short delay"""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+
+    async def call(self, value: str):
+        self.calls += 1
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {"answer": value}
+
+def test_identical_requests_share_one_call():
+    """Concurrent requests with the same key make one upstream call"""
+    print("Testing coalescing...")
+
+    flight, upstream = SingleFlight(), Upstream()
+
+    async def burst():
+        same = [flight.run("q1", lambda: upstream.call("one")) for _ in range(10)]
+        other = [flight.run("q2", lambda: upstream.call("two"))]
+        return await asyncio.gather(*same, *other)
+
+    results = asyncio.run(burst())
+    assert upstream.calls == 2
+    assert [result["answer"] for result in results] == ["one"] * 10 + ["two"]
+    stats = flight.get_stats()
+    assert stats["coalesced"] == 9 and stats["in_flight"] == 0
+    print(f"✅ 11 requests, {upstream.calls} upstream calls: {stats}")
+
+def test_finished_calls_are_not_reused():
+    """Only in-flight calls are shared"""
+    print("Testing sequential requests...")
+
+    flight, upstream = SingleFlight(), Upstream()
+
+    async def twice():
+        await flight.run("q", lambda: upstream.call("one"))
+        await flight.run("q", lambda: upstream.call("one"))
+
+    asyncio.run(twice())
+    assert upstream.calls == 2
+    print("✅ A request after the call ended started a new one")
+
+def test_cancellation_needs_every_waiter():
+    """One cancelled waiter leaves the call running; the last one cancels it"""
+    print("Testing cancellation...")
+
+    flight, upstream = SingleFlight(), Upstream()
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.run("q", lambda: upstream.call("one")))
+        second = asyncio.ensure_future(flight.run("q", lambda: upstream.call("one")))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert (await second)["answer"] == "one"
+        assert upstream.cancelled == 0
+
+        alone = asyncio.ensure_future(flight.run("q", lambda: upstream.call("one")))
+        await asyncio.sleep(0.01)
+        alone.cancel()
+        await asyncio.gather(alone, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert upstream.cancelled == 1 and flight.get_stats()["in_flight"] == 0
+    print("✅ Upstream call cancelled only when nobody waits for it")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Request Coalescing")
+    print("=" * 60)
+
+    test_identical_requests_share_one_call()
+    test_finished_calls_are_not_reused()
+    test_cancellation_needs_every_waiter()
+
+    print("=" * 60)
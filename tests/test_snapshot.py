@@ -0,0 +1,66 @@
+import sys
+import os
+import sqlite3
+import tempfile
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.database.snapshot import create_snapshot, read_manifest, restore_snapshot
+
+def test_snapshot_round_trip():
+    """A snapshot restores the index files, SQLite data and chunk text"""
+    print("Testing vector snapshot...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chroma_dir = os.path.join(tmp, "chroma")
+        chunk_dir = os.path.join(tmp, "chunks")
+        os.makedirs(os.path.join(chroma_dir, "segment"))
+        os.makedirs(chunk_dir)
+        with open(os.path.join(chroma_dir, "segment", "data_level0.bin"), "wb") as f:
+            f.write(b"\x01" * 64)
+        with open(os.path.join(chunk_dir, "doc1.txt"), "w") as f:
+            f.write("chunk text")
+
+        # A WAL-mode database with an open connection still snapshots consistently
+        conn = sqlite3.connect(os.path.join(chroma_dir, "chroma.sqlite3"))
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(100)])
+        conn.commit()
+
+        archive = os.path.join(tmp, "snapshots", "index.tar.gz")
+        result = create_snapshot(archive, chroma_dir, chunk_dir, manifest={"chunks": 1})
+        conn.close()
+        assert read_manifest(archive)["chunks"] == 1
+        assert result["archive_bytes"] > 0
+
+        restored_chroma = os.path.join(tmp, "new", "chroma")
+        restored_chunks = os.path.join(tmp, "new", "chunks")
+        manifest = restore_snapshot(archive, restored_chroma, restored_chunks)
+        assert manifest["data_bytes"] == result["data_bytes"]
+        with open(os.path.join(restored_chunks, "doc1.txt")) as f:
+            assert f.read() == "chunk text"
+        assert os.path.getsize(os.path.join(restored_chroma, "segment", "data_level0.bin")) == 64
+        restored_db = sqlite3.connect(os.path.join(restored_chroma, "chroma.sqlite3"))
+        assert restored_db.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 100
+        restored_db.close()
+
+        # Existing data is only replaced when asked
+        try:
+            restore_snapshot(archive, restored_chroma, restored_chunks)
+            assert False, "restore over existing data should fail"
+        except FileExistsError:
+            pass
+        restore_snapshot(archive, restored_chroma, restored_chunks, force=True)
+
+    print(f"✅ Snapshot round trip works: {result['data_bytes']} bytes")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Vector Snapshot")
+    print("=" * 60)
+
+    test_snapshot_round_trip()
+
+    print("=" * 60)
@@ -0,0 +1,127 @@
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.llm_client import OpenRouterClient
+from app.core.model_stats import ModelStats
+from app.core.rate_limiter import ModelRateLimiter
+
+class FakeStream:
+    """Async chunk stream that records whether it was closed, like openai.AsyncStream"""
+
+    def __init__(self, pieces, fail_after=None):
+        self.pieces = pieces
+        self.fail_after = fail_after
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        self.closed = True
+
+    async def __aiter__(self):
+        for number, piece in enumerate(self.pieces):
+            if number == self.fail_after:
+                raise RuntimeError("connection reset")
+            await asyncio.sleep(0)
+            delta = SimpleNamespace(content=piece)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=42))
+
+class FakeCompletions:
+    def __init__(self, streams):
+        self.streams = streams
+        self.opened = []
+
+    async def create(self, model, **kwargs):
+        assert kwargs["stream"]
+        stream = self.streams[model]
+        self.opened.append(stream)
+        return stream
+
+class FakeClient(OpenRouterClient):
+    def __init__(self, streams):
+        super().__init__()
+        self.model = "primary"
+        self.fallback_models = ["second"]
+        self.stats = ModelStats()
+        self.rate_limiter = ModelRateLimiter(per_minute=0, burst=1, max_wait=0)
+        self.completions = FakeCompletions(streams)
+        self.fake = SimpleNamespace(chat=SimpleNamespace(completions=self.completions))
+
+    def async_client(self):
+        return self.fake
+
+def collect(client: OpenRouterClient, limit: int = None):
+    """Events of one streamed answer; stop reading after `limit` events"""
+    async def run():
+        events = []
+        stream = client.astream_response("question", "context")
+        async for event in stream:
+            events.append(event)
+            if limit is not None and len(events) == limit:
+                await stream.aclose()  # What a client disconnect does
+                break
+        return events
+
+    return asyncio.run(run())
+
+def test_stream_completes():
+    """Tokens arrive in order, then a done event with usage; the stream is closed"""
+    print("Testing full stream...")
+
+    client = FakeClient({"primary": FakeStream(["Drink ", "water."])})
+    events = collect(client)
+
+    assert [event["text"] for event in events if event["type"] == "token"] == ["Drink ", "water."]
+    done = events[-1]
+    assert done["type"] == "done" and done["answer"] == "Drink water." and done["tokens_used"] == 42
+    assert all(stream.closed for stream in client.completions.opened)
+    print(f"✅ Streamed answer: {done['answer']!r}")
+
+def test_disconnect_closes_stream():
+    """A client that stops reading mid-answer releases the upstream stream"""
+    print("Testing disconnect...")
+
+    client = FakeClient({"primary": FakeStream(["one ", "two ", "three"])})
+    events = collect(client, limit=1)
+
+    assert len(events) == 1 and client.completions.opened[0].closed
+    assert client.stats.get_stats()["models"]["primary"]["cancelled"] == 1
+    print("✅ Upstream stream closed after the disconnect")
+
+def test_failures_close_streams():
+    """A failure before the first token falls back; one after it ends with an error"""
+    print("Testing failed streams...")
+
+    client = FakeClient({
+        "primary": FakeStream(["never"], fail_after=0),
+        "second": FakeStream(["Rest ", "well."])
+    })
+    events = collect(client)
+    assert events[-1]["type"] == "done" and events[-1]["model"] == "second"
+
+    client = FakeClient({"primary": FakeStream(["Rest ", "well."], fail_after=1)})
+    events = collect(client)
+    assert events[-1]["type"] == "error" and events[-1]["answer"] == "Rest "
+    assert all(stream.closed for stream in client.completions.opened)
+    print("✅ Failed streams closed; fallback only before the first token")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Streamed Answers")
+    print("=" * 60)
+
+    test_stream_completes()
+    test_disconnect_closes_stream()
+    test_failures_close_streams()
+
+    print("=" * 60)
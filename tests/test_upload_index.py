@@ -0,0 +1,145 @@
+import sys
+import os
+import threading
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.upload_index import UploadHashIndex
+from app.models.document import Base, Document
+
+def test_duplicate_upload():
+    """A second upload of the same bytes by the same user gets the first doc_id"""
+    print("Testing duplicate upload...")
+
+    index = UploadHashIndex()
+    assert index.claim("alice", "hash1", "doc1") is None
+    index.set_job("alice", "hash1", "job1")
+
+    existing = index.claim("alice", "hash1", "doc2")
+    assert existing == {"doc_id": "doc1", "job_id": "job1"}
+    print(f"✅ Duplicate answered with {existing}")
+
+def test_failed_ingest_release():
+    """A released upload (failed ingestion) can be uploaded again"""
+    print("Testing release after failed ingestion...")
+
+    index = UploadHashIndex()
+    index.claim("alice", "hash1", "doc1")
+    index.release("alice", "hash1")
+    assert index.claim("alice", "hash1", "doc2") is None
+
+    index.release_document("doc2")
+    assert index.claim("alice", "hash1", "doc3") is None
+    print("✅ Released uploads are new again")
+
+def test_cross_user_uploads():
+    """The same file uploaded by another user is a new document for that user"""
+    print("Testing uploads by different users...")
+
+    stored = {("alice", "hash1"): "stored_doc"}
+    calls = []
+
+    def lookup(user_id, file_hash):
+        calls.append((user_id, file_hash))
+        return stored.get((user_id, file_hash))
+
+    index = UploadHashIndex(lookup=lookup)
+    assert index.claim("alice", "hash1", "doc1") == {"doc_id": "stored_doc", "job_id": None}
+    assert index.claim("bob", "hash1", "doc2") is None
+    assert index.claim("bob", "hash1", "doc3") == {"doc_id": "doc2", "job_id": None}
+    assert calls == [("alice", "hash1"), ("bob", "hash1")]
+
+    index.release("alice", "hash1")
+    assert index.claim("bob", "hash1", "doc4")["doc_id"] == "doc2"
+    print("✅ Each user gets their own document")
+
+def test_lookup_runs_outside_lock():
+    """A slow database lookup for one upload does not hold up the others"""
+    print("Testing concurrent claims...")
+
+    slow_lookup_started, finish_slow_lookup = threading.Event(), threading.Event()
+
+    def lookup(user_id, file_hash):
+        if user_id == "alice":
+            slow_lookup_started.set()
+            finish_slow_lookup.wait(5)
+        return None
+
+    index = UploadHashIndex(lookup=lookup)
+    results = {}
+    slow = threading.Thread(target=lambda: results.update(alice=index.claim("alice", "hash1", "doc1")))
+    slow.start()
+    assert slow_lookup_started.wait(5)
+
+    assert index.claim("bob", "hash2", "doc2") is None  # Not blocked by alice's lookup
+    finish_slow_lookup.set()
+    slow.join(5)
+    assert results["alice"] is None
+    assert index.claim("alice", "hash1", "doc3")["doc_id"] == "doc1"
+    print("✅ Claims don't wait on each other's lookups")
+
+def test_stored_uploads_leave_the_index():
+    """Once a document's row is committed the lookup answers for it"""
+    print("Testing eviction of stored uploads...")
+
+    stored = {}
+    index = UploadHashIndex(lookup=lambda user_id, file_hash: stored.get((user_id, file_hash)))
+    assert index.claim("alice", "hash1", "doc1") is None
+
+    stored[("alice", "hash1")] = "doc1"
+    index.mark_stored("doc1")
+    assert index._entries == {} and index._keys_by_doc == {}
+    assert index.claim("alice", "hash1", "doc2") == {"doc_id": "doc1", "job_id": None}
+    assert index._entries == {}
+
+    # Without a lookup the entry is the only record, so it stays
+    local = UploadHashIndex()
+    local.claim("alice", "hash1", "doc1")
+    local.mark_stored("doc1")
+    assert local.claim("alice", "hash1", "doc2")["doc_id"] == "doc1"
+    print("✅ Stored uploads are answered by the lookup")
+
+def test_same_file_stored_for_two_users():
+    """The documents table accepts one row per user for the same bytes"""
+    print("Testing document rows for two users...")
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    for number, user_id in enumerate(("alice", "bob")):
+        session.add(Document(
+            id=f"doc{number}", filename="a.pdf", file_path=f"/tmp/doc{number}.pdf",
+            user_id=user_id, doc_hash="text_hash", file_hash="hash1"
+        ))
+    session.commit()
+
+    rows = session.query(Document.user_id).filter(Document.file_hash == "hash1").all()
+    assert sorted(row[0] for row in rows) == ["alice", "bob"]
+
+    session.add(Document(id="doc2", filename="a.pdf", file_path="/tmp/doc2.pdf", user_id="bob", file_hash="hash1"))
+    try:
+        session.commit()
+        assert False, "a user's second row for the same file should be rejected"
+    except IntegrityError:
+        session.rollback()
+    session.close()
+    print("✅ Unique per (user_id, file_hash)")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Upload Hash Index")
+    print("=" * 60)
+
+    test_duplicate_upload()
+    test_failed_ingest_release()
+    test_cross_user_uploads()
+    test_lookup_runs_outside_lock()
+    test_stored_uploads_leave_the_index()
+    test_same_file_stored_for_two_users()
+
+    print("=" * 60)